@@ -1,6 +1,8 @@
-import pygame, random
+import pygame
 import map
+import backend
 from car import Car
+from tilegrid import KIND_CROSSWALK, KIND_GRASS
 
 class Agent(Car):
     """
@@ -10,24 +12,28 @@ class Agent(Car):
     - Waits indefinitely at red lights/traffic (no forced rerouting)
     - Replans only when waypoint becomes obstacle
     """
+    rng_stream = 'agent'
 
     def __init__(self, world, spawn=None):
         super().__init__(world, always_drive=False)
 
-        # Agent sprite
-        try:
-            self.image_orig = pygame.image.load("images/agent.png").convert_alpha()
-        except pygame.error:
-            self.image_orig = pygame.Surface((map.CELL_SIZE, map.CELL_SIZE), pygame.SRCALPHA)
-            pygame.draw.rect(self.image_orig, (255, 0, 0, 200), (0, 0, map.CELL_SIZE, map.CELL_SIZE))
-
         scale_factor = 1.75
-        self.image_orig = pygame.transform.scale(
-            self.image_orig,
-            (int(map.CELL_SIZE * scale_factor), int(map.CELL_SIZE * scale_factor))
-        )
-        self.image = self.image_orig
-        self.rect = self.image.get_rect(center=(self.pixel_x + map.CELL_SIZE // 2, self.pixel_y + map.CELL_SIZE // 2))
+        if backend.HEADLESS:
+            self.set_headless_rect(scale_factor)
+        else:
+            # Agent sprite
+            try:
+                self.image_orig = pygame.image.load("images/agent.png").convert_alpha()
+            except pygame.error:
+                self.image_orig = pygame.Surface((map.CELL_SIZE, map.CELL_SIZE), pygame.SRCALPHA)
+                pygame.draw.rect(self.image_orig, (255, 0, 0, 200), (0, 0, map.CELL_SIZE, map.CELL_SIZE))
+
+            self.image_orig = pygame.transform.scale(
+                self.image_orig,
+                (int(map.CELL_SIZE * scale_factor), int(map.CELL_SIZE * scale_factor))
+            )
+            self.image = self.image_orig
+            self.rect = self.image.get_rect(center=(self.pixel_x + map.CELL_SIZE // 2, self.pixel_y + map.CELL_SIZE // 2))
 
         # Path state
         self.path = []
@@ -41,6 +47,17 @@ class Agent(Car):
         self.awaiting_approval = False  # NEW: waiting for user to approve new path
         self.pending_path = None  # NEW: stores the replanned path
 
+        # Change-driven path checks: cell -> last index on the path, remaining path cells that
+        # edits turned impassable, and grass cells edited in since the path was set
+        self._path_cells = {}
+        self._blocked_cells = set()
+        self._edited_grass = set()
+        world.subscribe(self._on_world_change)
+
+        # Fleet schedule (cooperative.FleetSchedule): last path index the agent may drive to
+        # this tick (it waits on its cell until then), None when it is not scheduled
+        self.hold_index = None
+
         self.is_agent = True
 
         # Start stopped
@@ -58,7 +75,7 @@ class Agent(Car):
                 pass
 
     def set_position(self, grid_y, grid_x):
-        if not (0 <= grid_x < map.GRID_WIDTH and 0 <= grid_y < map.GRID_HEIGHT):
+        if not (0 <= grid_x < self.world.grid_width and 0 <= grid_y < self.world.grid_height):
             raise ValueError("Position outside bounds")
         tile = self.world.grid[grid_y][grid_x]
         if not isinstance(tile, (map.Road, map.Crosswalk)):
@@ -91,6 +108,19 @@ class Agent(Car):
         self.is_active = True
         self.state = 'driving'
         self.destination = self.path[-1]
+        self._path_cells = {cell: i for i, cell in enumerate(self.path)}
+        # edits made after planning (e.g. while the GO/CANCEL prompt was shown) raised no event
+        # for this path yet: seed the change sets with the cells that are impassable right now
+        graph = self.world.lane_graph
+        kinds = self.world.tiles.kind_at
+        self._blocked_cells.clear()
+        self._edited_grass.clear()
+        for cell in self.path:
+            i = graph.index(*cell)
+            if not graph.allow[i]:
+                self._blocked_cells.add(cell)
+                if kinds[i] == KIND_GRASS:
+                    self._edited_grass.add(cell)
         self.awaiting_approval = False  # Reset approval flag
         self.pending_path = None
         
@@ -100,14 +130,42 @@ class Agent(Car):
 
         print(f"[Agent] Following {len(self.path)} waypoints to {self.destination}")
 
+    def follow_field(self, field):
+        """Follow the route read off a distfield.DistanceField (no search). Returns False if unreachable."""
+        path = field.route((self.grid_y, self.grid_x))
+        if not path:
+            return False
+        self.move(path)
+        return True
+
     def stop(self):
         """Stop the agent completely."""
         self.path = []
         self.path_index = 0
+        self._path_cells = {}
+        self._blocked_cells.clear()
+        self._edited_grass.clear()
         self.is_active = False
         self.state = 'stopped'
         self.speed = 0
 
+    def _on_world_change(self, cells):
+        """World edit callback: record only the edits that touch the remaining path or the road ahead."""
+        graph = self.world.lane_graph
+        kinds = self.world.tiles.kind_at
+        front = (self.grid_y + int(self.direction_vector.y), self.grid_x + int(self.direction_vector.x))
+        for cell in cells:
+            i = graph.index(*cell)
+            if graph.allow[i]:
+                self._blocked_cells.discard(cell)
+                self._edited_grass.discard(cell)
+                continue
+            ahead = self._path_cells.get(cell, -1) >= self.path_index
+            if ahead:
+                self._blocked_cells.add(cell)
+            if kinds[i] == KIND_GRASS and (ahead or cell == front):
+                self._edited_grass.add(cell)
+
     def approve_replan(self, new_path):
         """Called by main.py after user approves the replanned path."""
         if new_path:
@@ -119,6 +177,13 @@ class Agent(Car):
             print(f"[Agent] No valid path found. Agent remains stopped.")
             self.stop()
 
+    def shares_schedule(self, car):
+        """
+        True if both are run by the fleet schedule: its timed paths already keep them on separate
+        cells, and the body-length collision box would stop one behind the other a cell short.
+        """
+        return self.hold_index is not None and getattr(car, 'hold_index', None) is not None
+
     def look_ahead(self, other_cars, scan_distance=5):
         """
         OVERRIDE: Agent's look_ahead ignores grass/obstacles in the distance.
@@ -132,13 +197,13 @@ class Agent(Car):
             check_x = self.grid_x + int(self.direction_vector.x * i)
             check_y = self.grid_y + int(self.direction_vector.y * i)
 
-            if not (0 <= check_x < map.GRID_WIDTH and 0 <= check_y < map.GRID_HEIGHT):
+            if not (0 <= check_x < self.world.grid_width and 0 <= check_y < self.world.grid_height):
                 break
 
-            tile = self.world.grid[check_y][check_x]
+            kind = self.world.tiles.kind_at[check_y * self.world.grid_width + check_x]
 
             # CHECK CROSSWALK/PEDESTRIANS FIRST (highest priority)
-            if isinstance(tile, map.Crosswalk):
+            if kind == KIND_CROSSWALK:
                 # Check for pedestrians
                 if hasattr(self.world, "pedestrian_manager") and self.world.pedestrian_manager:
                     for ped in self.world.pedestrian_manager.group:
@@ -156,7 +221,7 @@ class Agent(Car):
             # CHECK CARS
             if other_cars:
                 for car in other_cars:
-                    if car is not self and car.grid_x == check_x and car.grid_y == check_y:
+                    if car is not self and car.grid_x == check_x and car.grid_y == check_y and not self.shares_schedule(car):
                         return ('car_ahead', i)
             
             # DON'T check for grass/obstacles here - agent handles that separately!
@@ -173,7 +238,7 @@ class Agent(Car):
         - NEVER makes random turns or U-turns
         """
         # Out of bounds check
-        if not (0 <= self.grid_x < map.GRID_WIDTH and 0 <= self.grid_y < map.GRID_HEIGHT):
+        if not (0 <= self.grid_x < self.world.grid_width and 0 <= self.grid_y < self.world.grid_height):
             print("[Agent] Out of bounds! Stopping.")
             self.stop()
             return
@@ -243,14 +308,8 @@ class Agent(Car):
         for move_dir_str, (ddx, ddy) in moves.items():
             nx, ny = self.grid_x + ddx, self.grid_y + ddy
             
-            # Check bounds
-            if not (0 <= nx < map.GRID_WIDTH and 0 <= ny < map.GRID_HEIGHT):
-                continue
-            
-            tile = self.world.grid[ny][nx]
-            
-            # Must be road or crosswalk
-            if not isinstance(tile, (map.Road, map.Crosswalk)):
+            # Must be road or crosswalk inside the map (precompiled lane graph)
+            if not self.world.lane_graph.is_passable(ny, nx):
                 continue
             
             forward_blocked = preferred not in possible_dirs
@@ -281,7 +340,7 @@ class Agent(Car):
         else:
             # Preferred direction not available - pick another valid one
             # Agent trusts its path, so any forward direction should eventually work
-            chosen_dir = random.choice(possible_dirs)
+            chosen_dir = self.rng.choice(possible_dirs)
         
         self.follow_road_direction(chosen_dir)
 
@@ -348,12 +407,18 @@ class Agent(Car):
             self.rotate_image()
             return
 
-        # Check if next waypoint has become an obstacle
-        if self.path_index < len(self.path):
+        # Fleet schedule: the next waypoint belongs to a later tick -> wait on this cell
+        if self.hold_index is not None and self.path_index > self.hold_index:
+            self.state = 'stopped'
+            self.speed = 0
+            return
+
+        # Check if next waypoint has become an obstacle (only after an edit hit the remaining path)
+        if self._blocked_cells and self.path_index < len(self.path):
             next_wp = self.path[self.path_index]
             try:
                 tile = self.world.grid[next_wp[0]][next_wp[1]]
-                if not isinstance(tile, (map.Road, map.Crosswalk)):
+                if next_wp in self._blocked_cells:
                     print(f"[Agent] Waypoint {next_wp} is now {type(tile).__name__}!")
 
                     # If the blocked waypoint is directly in front of the car, perform the deterministic U-turn
@@ -382,14 +447,12 @@ class Agent(Car):
         # ---------------------------------------------------
         # DETECT SUDDEN GRASS DIRECTLY IN FRONT OF THE AGENT
         # ---------------------------------------------------
-        fx = self.grid_x + int(self.direction_vector.x)
-        fy = self.grid_y + int(self.direction_vector.y)
-
-        if 0 <= fx < map.GRID_WIDTH and 0 <= fy < map.GRID_HEIGHT:
-            front_tile = self.world.grid[fy][fx]
+        # Unexpected grass means it was NOT grass during planning: only edited cells can be
+        if self._edited_grass:
+            fx = self.grid_x + int(self.direction_vector.x)
+            fy = self.grid_y + int(self.direction_vector.y)
 
-            # Unexpected grass means it was NOT grass during planning
-            if isinstance(front_tile, map.Grass) and not self.doing_uturn:
+            if (fy, fx) in self._edited_grass and not self.doing_uturn:
                 print(f"[Agent] Sudden grass detected in ({fy}, {fx}) → initiating U-turn.")
                 self.doing_uturn = True
                 self.state = 'stopped'
@@ -448,7 +511,7 @@ class Agent(Car):
         target_y = self.grid_y + int(self.direction_vector.y)
 
         # Bounds + road check
-        if not (0 <= target_x < map.GRID_WIDTH and 0 <= target_y < map.GRID_HEIGHT):
+        if not (0 <= target_x < self.world.grid_width and 0 <= target_y < self.world.grid_height):
             return True  # consider it 'done'
 
         tile = self.world.grid[target_y][target_x]
@@ -513,7 +576,7 @@ class Agent(Car):
         collision_detected = False
         if other_cars:
             for car in other_cars:
-                if car is self:
+                if car is self or self.shares_schedule(car):
                     continue
                 
                 other_collision_rect = pygame.Rect(0, 0, smaller_width, smaller_height)
@@ -549,18 +612,19 @@ class Agent(Car):
             self.grid_y = new_grid_y
             self.on_new_tile_ai(other_cars)
 
-    def draw(self, screen):
-        """Draw agent and its path."""
+    def draw(self, screen, offset=(0, 0)):
+        """Draw agent and its path; offset is added to world positions (camera view)."""
+        ox, oy = offset
         # Draw remaining path
         try:
             if self.is_active and self.path and self.path_index < len(self.path):
-                pts = [(int(self.pixel_x + map.CELL_SIZE // 2), 
-                       int(self.pixel_y + map.CELL_SIZE // 2))]
+                pts = [(int(self.pixel_x + map.CELL_SIZE // 2) + ox, 
+                       int(self.pixel_y + map.CELL_SIZE // 2) + oy)]
                 
                 for i in range(self.path_index, len(self.path)):
                     wp = self.path[i]
-                    pts.append((wp[1] * map.CELL_SIZE + map.CELL_SIZE // 2,
-                               wp[0] * map.CELL_SIZE + map.CELL_SIZE // 2))
+                    pts.append((wp[1] * map.CELL_SIZE + map.CELL_SIZE // 2 + ox,
+                               wp[0] * map.CELL_SIZE + map.CELL_SIZE // 2 + oy))
                                 
                 # Draw path line (RED if replanning, GREEN if active)
                 path_color = (255, 0, 0) if self.replan_needed else (0, 255, 0)
@@ -571,4 +635,4 @@ class Agent(Car):
             pass
 
         # Draw agent sprite
-        screen.blit(self.image, self.rect)
\ No newline at end of file
+        screen.blit(self.image, self.rect.move(offset))
\ No newline at end of file
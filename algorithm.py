@@ -1,73 +1,166 @@
+from array import array
 import pygame
-import heapq
 import map
+from search import SearchEngine, SearchStepper
 
 # Colors
 YELLOW = (255, 220, 0)
 GREEN = (0, 255, 0)
 GREY = (140, 140, 140)
 
+class SearchOverlay:
+    """
+    Search trace / path lines of one World, drawn onto a surface the size of the camera view.
+    Lines are kept in world pixels, bucketed per map.CHUNK_CELLS chunk and grouped by style
+    (flat int arrays), so memory follows the trace rather than the map size; render(view)
+    repaints only the chunks in view and, when the camera pans, scrolls the surface and
+    repaints just the strips that came into view. main.py keeps one per World and hands it
+    to every visualizer.
+    """
+    def __init__(self, cell_size=None):
+        self.cell_size = cell_size if cell_size is not None else map.CELL_SIZE
+        self._span = map.CHUNK_CELLS * self.cell_size
+        # (chunk row, chunk col) -> {(color, width): array of ax, ay, bx, by}
+        self._lines = {}
+        # styles in order of first use: repaints draw them in this order (the path over the trace)
+        self._styles = []
+        # (center, color, radius) markers
+        self._circles = []
+        # the surface covers the view plus a one-cell margin, so clipped thick-line ends stay
+        # out of sight; `view` is the world pixel rect it shows, _inner the visible part
+        self._pad = self.cell_size
+        self.surface = None
+        self._inner = None
+        self.view = None
+
+    def clear(self):
+        self._lines.clear()
+        self._styles.clear()
+        self._circles.clear()
+        if self.surface is not None:
+            self.surface.fill((0, 0, 0, 0))
+
+    def _origin(self):
+        return self.view.x - self._pad, self.view.y - self._pad
+
+    def line(self, a, b, color, width):
+        """Add a line between two world pixel points."""
+        key = (a[1] // self._span, a[0] // self._span)
+        styles = self._lines.setdefault(key, {})
+        style = (color, width)
+        coords = styles.get(style)
+        if coords is None:
+            coords = styles[style] = array('i')
+            if style not in self._styles:
+                self._styles.append(style)
+        coords.extend((a[0], a[1], b[0], b[1]))
+        if self.surface is not None:
+            ox, oy = self._origin()
+            pygame.draw.line(self.surface, color, (a[0] - ox, a[1] - oy), (b[0] - ox, b[1] - oy), width)
+
+    def circle(self, center, color, radius):
+        self._circles.append((center, color, radius))
+        if self.surface is not None:
+            ox, oy = self._origin()
+            pygame.draw.circle(self.surface, color, (center[0] - ox, center[1] - oy), radius)
+
+    def render(self, view):
+        """The overlay of the world pixel rect `view`, as a surface of view.size to blit at the view's origin."""
+        view = pygame.Rect(view)
+        pad = self._pad
+        if self.view is None or self.view.size != view.size:
+            self.surface = pygame.Surface((view.width + 2 * pad, view.height + 2 * pad), pygame.SRCALPHA)
+            self._inner = self.surface.subsurface((pad, pad, view.width, view.height))
+            self.view = view
+            self._repaint(self.surface.get_rect())
+            return self._inner
+        dx, dy = self.view.x - view.x, self.view.y - view.y
+        if not (dx or dy):
+            return self._inner
+        self.view = view
+        w, h = self.surface.get_size()
+        if abs(dx) >= view.width or abs(dy) >= view.height:
+            self._repaint(self.surface.get_rect())
+            return self._inner
+        # pan: keep what is still in view, repaint the strips that scrolled in (plus the old
+        # margin next to them)
+        self.surface.scroll(dx, dy)
+        if dx:
+            self._repaint(pygame.Rect(0 if dx > 0 else w + dx - pad, 0, abs(dx) + pad, h))
+        if dy:
+            self._repaint(pygame.Rect(0, 0 if dy > 0 else h + dy - pad, w, abs(dy) + pad))
+        return self._inner
+
+    def _repaint(self, area):
+        """Redraw `area` (surface coordinates) from the stored lines."""
+        surface = self.surface
+        area = area.clip(surface.get_rect())
+        # draw on a scratch surface a margin larger than `area`: the copied part then never
+        # contains clipped line ends, so it matches what drawing the lines one by one gave
+        pad = self._pad
+        scratch_rect = area.inflate(2 * pad, 2 * pad)
+        scratch = pygame.Surface(scratch_rect.size, pygame.SRCALPHA)
+        sx, sy = self._origin()
+        ox, oy = sx + scratch_rect.x, sy + scratch_rect.y
+        # a line starts in its bucket but may end one cell into the next chunk
+        world = scratch_rect.move(sx, sy).inflate(2 * self.cell_size, 2 * self.cell_size)
+        span = self._span
+        buckets = [self._lines[key] for key in
+                   ((cr, cc) for cr in range(world.top // span, (world.bottom - 1) // span + 1)
+                    for cc in range(world.left // span, (world.right - 1) // span + 1))
+                   if key in self._lines]
+        draw = pygame.draw.line
+        for style in self._styles:
+            color, width = style
+            for styles in buckets:
+                coords = styles.get(style)
+                if coords is None:
+                    continue
+                for i in range(0, len(coords), 4):
+                    draw(scratch, color, (coords[i] - ox, coords[i + 1] - oy),
+                         (coords[i + 2] - ox, coords[i + 3] - oy), width)
+        for (cx, cy), color, radius in self._circles:
+            pygame.draw.circle(scratch, color, (cx - ox, cy - oy), radius)
+        surface.fill((0, 0, 0, 0), area)
+        surface.blit(scratch, area.topleft, area.move(-scratch_rect.x, -scratch_rect.y))
+
+
 class SearchVisualizer:
-    def __init__(self, world, screen, cell_size=None, clock=None):
+    # SearchEngine method run by search() and the default replay speed (seconds per edge)
+    algorithm = 'astar'
+    default_speed = 0.02
+
+    def __init__(self, world, screen, cell_size=None, clock=None, heuristic=None, cache=None, overlay=None):
         self.world = world
         self.screen = screen
         self.cell_size = cell_size if cell_size is not None else map.CELL_SIZE
         self.clock = clock if clock is not None else pygame.time.Clock()
-        self.overlay = pygame.Surface((map.SCREEN_WIDTH, map.SCREEN_HEIGHT), pygame.SRCALPHA)
+        # trace / path lines; shared by every visualizer of the same World when main.py passes one
+        self.overlay = overlay if overlay is not None else SearchOverlay(self.cell_size)
         # edges are stored as frozenset({a,b}) where a=(r,c)
         self.visited_edges = set()
+        # heuristic: optional h(cell, goal) for A* / Greedy (default Manhattan)
+        self.engine = SearchEngine(world, heuristic=heuristic)
+        # optional routecache.RouteCache shared by every visualizer of the same World
+        self.cache = cache
+        # SearchResult of the latest search() call (path + exploration trace)
+        self.last_result = None
+        # frame-budgeted search started by begin_search(), advanced by advance()
+        self.stepper = None
+        self._player = None
+        self._graph_version = None
 
     def is_passable(self, cell):
-        r, c = cell
-        if not (0 <= r < map.GRID_HEIGHT and 0 <= c < map.GRID_WIDTH):
-            return False
-        tile = self.world.grid[r][c]
-        return isinstance(tile, (map.Road, map.Crosswalk))
+        return self.engine.is_passable(cell)
 
     def _movement_dir(self, a, b):
-        dr = b[0] - a[0]
-        dc = b[1] - a[1]
-        if dr == -1 and dc == 0:
-            return 'N'
-        if dr == 1 and dc == 0:
-            return 'S'
-        if dr == 0 and dc == 1:
-            return 'E'
-        if dr == 0 and dc == -1:
-            return 'W'
-        return None
+        return self.engine.movement_dir(a, b)
 
     def _can_move(self, a, b):
-        # respects road direction and allows turns only at intersections (Road.direction is None)
-        if not (self.is_passable(a) and self.is_passable(b)):
-            return False
-        atile = self.world.grid[a[0]][a[1]]
-        btile = self.world.grid[b[0]][b[1]]
-        move_dir = self._movement_dir(a, b)
-        # treat Crosswalk as directional (no free turns): allow only moves that match the crosswalk orientation
-        def tile_allows(tile, dir_):
-            # Crosswalks only allow movement along their orientation (no turning while on/into crosswalk)
-            if isinstance(tile, map.Crosswalk):
-                # crosswalk.orientation expected 'horizontal' or 'vertical'
-                if getattr(tile, "orientation", "horizontal") == "horizontal":
-                    return dir_ in ("E", "W")
-                else:
-                    return dir_ in ("N", "S")
-            if isinstance(tile, map.Road):
-                # intersection (direction is None) allows turning when leaving it
-                return (tile.direction is None) or (tile.direction == dir_)
-            return False
-        # allow turning only when leaving an intersection (current is intersection) OR following road direction
-        return tile_allows(atile, move_dir) and tile_allows(btile, move_dir)
+        return self.engine.can_move(a, b)
 
     def neighbors(self, cell):
-        r, c = cell
-        # prefer straight-ish order but actual direction awareness done in _can_move
-        dirs = [(-1, 0), (0, -1), (0, 1), (1, 0)]
-        for dr, dc in dirs:
-            nr, nc = r + dr, c + dc
-            if 0 <= nr < map.GRID_HEIGHT and 0 <= nc < map.GRID_WIDTH:
-                yield (nr, nc)
+        return self.engine.neighbors(cell)
 
     def pixel_center(self, cell):
         r, c = cell
@@ -75,6 +168,12 @@ class SearchVisualizer:
         cy = r * self.cell_size + self.cell_size // 2
         return (cx, cy)
 
+    def _show_overlay(self):
+        """Blocking mode: blit the overlay over the screen (the view it last rendered, else the screen's)."""
+        view = self.overlay.view or self.screen.get_rect()
+        self.screen.blit(self.overlay.render(view), (0, 0))
+        pygame.display.flip()
+
     def _process_pygame_events(self):
         for ev in pygame.event.get():
             if ev.type == pygame.QUIT:
@@ -88,9 +187,9 @@ class SearchVisualizer:
             t = i / steps
             ix = int(ax + (bx - ax) * t)
             iy = int(ay + (by - ay) * t)
-            self.overlay.fill((0,0,0,0))
-            pygame.draw.line(self.overlay, color, a_px, (ix, iy), max(2, self.cell_size // 6))
-            self.screen.blit(self.overlay, (0, 0))
+            # the growing segment goes straight to the screen; draw_visited_edge() then keeps it
+            ox, oy = (self.overlay.view or self.screen.get_rect()).topleft
+            pygame.draw.line(self.screen, color, (ax - ox, ay - oy), (ix - ox, iy - oy), max(2, self.cell_size // 6))
             pygame.display.flip()
             self._process_pygame_events()
             self.clock.tick(max(1, int(1.0 / (duration / steps + 0.0001))))
@@ -98,10 +197,13 @@ class SearchVisualizer:
     def draw_visited_edge(self, a, b, color=YELLOW):
         a_px = self.pixel_center(a)
         b_px = self.pixel_center(b)
-        pygame.draw.line(self.overlay, color, a_px, b_px, max(2, self.cell_size // 6))
+        self.overlay.line(a_px, b_px, color, max(2, self.cell_size // 6))
         self.visited_edges.add(frozenset((a,b)))
-        self.screen.blit(self.overlay, (0,0))
-        pygame.display.flip()
+        self._show_overlay()
+
+    def draw_start_marker(self, cell):
+        cx, cy = self.pixel_center(cell)
+        self.overlay.circle((cx, cy), GREY, max(2, self.cell_size//10))
 
     def draw_final_path(self, path, color=GREEN):
         if not path:
@@ -109,26 +211,27 @@ class SearchVisualizer:
         for i in range(len(path)-1):
             a_px = self.pixel_center(path[i])
             b_px = self.pixel_center(path[i+1])
-            pygame.draw.line(self.overlay, color, a_px, b_px, max(3, self.cell_size // 4))
-        self.screen.blit(self.overlay, (0,0))
-        pygame.display.flip()
+            self.overlay.line(a_px, b_px, color, max(3, self.cell_size // 4))
+        self._show_overlay()
 
     def _recolor_after_search(self, final_path):
-        # Turn all visited edges grey, then draw final path green on top.
-        self.overlay.fill((0,0,0,0))
+        self._paint_summary(final_path)
+        self._show_overlay()
+
+    def _paint_summary(self, final_path):
+        # Turn all visited edges grey, then draw final path green on top (overlay only).
+        self.overlay.clear()
         for fe in self.visited_edges:
             a,b = tuple(fe)
             a_px = self.pixel_center(a)
             b_px = self.pixel_center(b)
-            pygame.draw.line(self.overlay, GREY, a_px, b_px, max(2, self.cell_size // 6))
+            self.overlay.line(a_px, b_px, GREY, max(2, self.cell_size // 6))
         # draw final path in green
         if final_path:
             for i in range(len(final_path)-1):
                 a_px = self.pixel_center(final_path[i])
                 b_px = self.pixel_center(final_path[i+1])
-                pygame.draw.line(self.overlay, GREEN, a_px, b_px, max(3, self.cell_size // 4))
-        self.screen.blit(self.overlay, (0,0))
-        pygame.display.flip()
+                self.overlay.line(a_px, b_px, GREEN, max(3, self.cell_size // 4))
 
     def _confirm_and_commit(self, final_path, auto_accept=False):
         # show all branches grey and path green then ask user in terminal
@@ -157,275 +260,208 @@ class SearchVisualizer:
             choice = 'y'
         if choice and choice[0] == 'y':
             # commit: keep only green path (clear grey by drawing only final path)
-            self.overlay.fill((0,0,0,0))
+            self.overlay.clear()
             if final_path:
                 for i in range(len(final_path)-1):
                     a_px = self.pixel_center(final_path[i])
                     b_px = self.pixel_center(final_path[i+1])
-                    pygame.draw.line(self.overlay, GREEN, a_px, b_px, max(3, self.cell_size // 4))
-            self.screen.blit(self.overlay, (0,0))
-            pygame.display.flip()
+                    self.overlay.line(a_px, b_px, GREEN, max(3, self.cell_size // 4))
+            self._show_overlay()
             return True
         else:
             # clear overlay
-            self.overlay.fill((0,0,0,0))
-            self.screen.blit(self.overlay, (0,0))
-            pygame.display.flip()
+            self.overlay.clear()
+            self._show_overlay()
             return False
 
-class DFSVisualizer(SearchVisualizer):
-    def search(self, start, goal, speed=0.03, auto_accept=False):
-        start = (int(start[0]), int(start[1]))
-        goal = (int(goal[0]), int(goal[1]))
-        if not self.is_passable(start) or not self.is_passable(goal):
+
+    def search(self, start, goal, speed=None, auto_accept=False, animate=True):
+        """
+        Compute the route headlessly with SearchEngine, then replay the exploration trace.
+        animate=False skips the per-edge animation: the overlay is drawn in one pass,
+        so the caller gets the route instantly with the grey/green overlay intact.
+        Returns path list or [] if not found. Direction-aware via SearchEngine.can_move.
+        """
+        if self.cache is not None:
+            result = self.cache.get_or_search(self.engine, self.algorithm, start, goal)
+        else:
+            result = getattr(self.engine, self.algorithm)(start, goal)
+        self.last_result = result
+
+        self.overlay.clear()
+        self.visited_edges.clear()
+        player = TracePlayer(self, result)
+        if animate:
+            player.play(self.default_speed if speed is None else speed)
+        else:
+            player.skip()
+
+        if not result.path:
+            self.overlay.clear()
+            self._show_overlay()
             return []
 
-        visited = set()
-        parent = {}
-        stack = [start]
-        self.overlay.fill((0,0,0,0))
+        committed = self._confirm_and_commit(result.path, auto_accept=auto_accept)
+        return result.path if committed else []
+
+    # --- frame-budgeted search (driven by the main loop) ---
+    @property
+    def searching(self):
+        return self.stepper is not None
+
+    def _start_stepper(self, stepper):
+        self.overlay.clear()
         self.visited_edges.clear()
+        self.stepper = stepper
+        self._graph_version = self.engine.graph.version
+        self._player = None
+        self.last_result = None
+
+    def begin_search(self, start, goal):
+        """Start a resumable search; the main loop then calls advance() once per frame."""
+        cached = self.cache.get(self.algorithm, start, goal) if self.cache is not None else None
+        if cached is not None:
+            self._start_stepper(SearchStepper.finished(cached))
+        else:
+            self._start_stepper(SearchStepper(self.engine, self.algorithm, start, goal))
 
-        while stack:
-            self._process_pygame_events()
-            current = stack.pop()
-            if current in visited:
-                continue
-            visited.add(current)
-
-            if current in parent:
-                p = parent[current]
-                # only animate and commit this edge if movement obeys tile directions
-                if self._can_move(p, current):
-                    self._animate_line(self.pixel_center(p), self.pixel_center(current), color=YELLOW, duration=speed)
-                    self.draw_visited_edge(p, current, color=YELLOW)
-            else:
-                cx, cy = self.pixel_center(current)
-                pygame.draw.circle(self.overlay, YELLOW, (cx, cy), min(2, self.cell_size//8))
-                self.screen.blit(self.overlay, (0,0))
-                pygame.display.flip()
-
-            if current == goal:
-                # reconstruct path
-                path = []
-                node = current
-                while True:
-                    path.append(node)
-                    if node == start:
-                        break
-                    node = parent[node]
-                path.reverse()
-                committed = self._confirm_and_commit(path, auto_accept=auto_accept)
-                return path if committed else []
-
-            # gather neighbors that obey tile-direction rules
-            nbs = []
-            for nb in self.neighbors(current):
-                if nb in visited:
-                    continue
-                if not self._can_move(current, nb):
-                    continue
-                nbs.append(nb)
-                if nb not in parent:
-                    parent[nb] = current
-            # push in reversed order to keep neighbor order preference
-            for nb in reversed(nbs):
-                stack.append(nb)
-
-        # not found
-        self.overlay.fill((0,0,0,0))
-        self.screen.blit(self.overlay, (0,0))
-        pygame.display.flip()
-        return []
+    def show_result(self, result):
+        """Draw a SearchResult computed elsewhere (e.g. planner.PlannerService); returns its path like advance()."""
+        self._start_stepper(SearchStepper.finished(result))
+        return self.advance()
 
-class BFSVisualizer(SearchVisualizer):
-    def search(self, start, goal, speed=0.02, auto_accept=False):
+    def advance(self, max_nodes=None, max_ms=None):
         """
-        Breadth-First Search with realtime visualization.
-        Returns path list or [] if not found. Direction-aware via _can_move.
+        Expand at most max_nodes nodes / max_ms milliseconds and draw the new trace edges
+        onto the overlay (no display flip). Returns the final path ([] if none) once the
+        search is finished, None while it is still running.
         """
-        from collections import deque
-        start = (int(start[0]), int(start[1]))
-        goal = (int(goal[0]), int(goal[1]))
-        if not self.is_passable(start) or not self.is_passable(goal):
+        stepper = self.stepper
+        if stepper is None:
+            return []
+        stepper.advance(max_nodes, max_ms)
+        result = stepper.result
+        if result is None:
+            return None
+        if self._player is None:
+            self._player = TracePlayer(self, result)
+        if stepper.done:
+            # a cached result replays in one go; a live one has already been drawn frame by frame
+            self._player.skip()
+        else:
+            self._player.step(result.visited_count - self._player.index)
+            return None
+
+        self.last_result = result
+        self.stepper = None
+        if self.cache is not None and self.engine.graph.version == self._graph_version:
+            self.cache.put(self.algorithm, result.start, result.goal, result)
+        if not result.path:
+            self.overlay.clear()
             return []
+        self._paint_summary(result.path)
+        return result.path
+
+
+class TracePlayer:
+    """
+    Replays the exploration trace of a SearchResult onto a visualizer's overlay.
+    play() animates edge by edge at the given speed, step() draws a few edges without
+    flipping the display, skip() draws everything that is left at once.
+    """
+    def __init__(self, visualizer, result):
+        self.vis = visualizer
+        self.result = result
+        self.index = 0
+
+    @property
+    def done(self):
+        return self.index >= self.result.visited_count
+
+    def _draw_entry(self, i):
+        result = self.result
+        cell = result.cell(result.expanded_nodes[i])
+        p = result.parent_nodes[i]
+        vis = self.vis
+        if p < 0:
+            vis.draw_start_marker(cell)
+        else:
+            p = result.cell(p)
+            vis.overlay.line(vis.pixel_center(p), vis.pixel_center(cell), YELLOW, max(2, vis.cell_size // 6))
+            vis.visited_edges.add(frozenset((p, cell)))
+
+    def step(self, count=1):
+        """Draw up to `count` more expansions onto the overlay; returns how many were drawn."""
+        end = min(self.index + count, self.result.visited_count)
+        for i in range(self.index, end):
+            self._draw_entry(i)
+        drawn = end - self.index
+        self.index = end
+        return drawn
+
+    def skip(self):
+        return self.step(self.result.visited_count - self.index)
+
+    def play(self, speed=0.02):
+        """Blocking replay: animate every remaining edge like the original realtime search."""
+        vis = self.vis
+        while not self.done:
+            vis._process_pygame_events()
+            result = self.result
+            cell = result.cell(result.expanded_nodes[self.index])
+            p = result.parent_nodes[self.index]
+            if p < 0:
+                self.step()
+                vis._show_overlay()
+                continue
+            p = result.cell(p)
+            vis._animate_line(vis.pixel_center(p), vis.pixel_center(cell), color=YELLOW, duration=speed)
+            vis.draw_visited_edge(p, cell, color=YELLOW)
+            self.index += 1
 
-        q = deque([start])
-        parent = {}
-        visited = set([start])
 
-        self.overlay.fill((0,0,0,0))
-        self.visited_edges.clear()
+class DFSVisualizer(SearchVisualizer):
+    algorithm = 'dfs'
+    default_speed = 0.03
 
-        while q:
-            self._process_pygame_events()
-            current = q.popleft()
-
-            if current in parent:
-                p = parent[current]
-                if self._can_move(p, current):
-                    self._animate_line(self.pixel_center(p), self.pixel_center(current), color=YELLOW, duration=speed)
-                    self.draw_visited_edge(p, current, color=YELLOW)
-            else:
-                cx, cy = self.pixel_center(current)
-                pygame.draw.circle(self.overlay, GREY, (cx, cy), max(2, self.cell_size//10))
-                self.screen.blit(self.overlay, (0,0))
-                pygame.display.flip()
-
-            if current == goal:
-                # reconstruct path
-                path = []
-                node = current
-                while True:
-                    path.append(node)
-                    if node == start:
-                        break
-                    node = parent[node]
-                path.reverse()
-                committed = self._confirm_and_commit(path, auto_accept=auto_accept)
-                return path if committed else []
-
-            for nb in self.neighbors(current):
-                if nb in visited:
-                    continue
-                if not self._can_move(current, nb):
-                    continue
-                visited.add(nb)
-                parent[nb] = current
-                q.append(nb)
+    def draw_start_marker(self, cell):
+        cx, cy = self.pixel_center(cell)
+        self.overlay.circle((cx, cy), YELLOW, min(2, self.cell_size//8))
+
+
+class BFSVisualizer(SearchVisualizer):
+    algorithm = 'bfs'
+    default_speed = 0.02
 
-        self.overlay.fill((0,0,0,0))
-        self.screen.blit(self.overlay, (0,0))
-        pygame.display.flip()
-        return []
 
 class AStarVisualizer(SearchVisualizer):
+    algorithm = 'astar'
+    default_speed = 0.02
+
     def manhattan(self, a, b):
-        return abs(a[0]-b[0]) + abs(a[1]-b[1])
+        return self.engine.manhattan(a, b)
 
-    def search(self, start, goal, speed=0.02, auto_accept=False):
-        start = (int(start[0]), int(start[1]))
-        goal = (int(goal[0]), int(goal[1]))
-        if not self.is_passable(start) or not self.is_passable(goal):
-            return []
 
-        open_heap = []
-        heapq.heappush(open_heap, (self.manhattan(start, goal), 0, start))
-        came_from = {}
-        gscore = {start: 0}
-        closed = set()
-        self.overlay.fill((0,0,0,0))
-        self.visited_edges.clear()
+class AnytimeAStarVisualizer(SearchVisualizer):
+    # weighted first path, then improved within the engine's time budget (SearchEngine.anytime_*)
+    algorithm = 'anytime'
+    default_speed = 0.02
 
-        while open_heap:
-            self._process_pygame_events()
-            _, g, current = heapq.heappop(open_heap)
-            if current in closed:
-                continue
-            closed.add(current)
-
-            if current in came_from:
-                p = came_from[current]
-                if self._can_move(p, current):
-                    self._animate_line(self.pixel_center(p), self.pixel_center(current), color=YELLOW, duration=speed)
-                    self.draw_visited_edge(p, current, color=YELLOW)
-            else:
-                cx, cy = self.pixel_center(current)
-                pygame.draw.circle(self.overlay, GREY, (cx, cy), max(2, self.cell_size//10))
-                self.screen.blit(self.overlay, (0,0))
-                pygame.display.flip()
-
-            if current == goal:
-                # reconstruct path
-                path = []
-                node = current
-                while node in came_from:
-                    path.append(node)
-                    node = came_from[node]
-                path.append(start)
-                path.reverse()
-                committed = self._confirm_and_commit(path, auto_accept=auto_accept)
-                return path if committed else []
-
-            for nb in self.neighbors(current):
-                if not self.is_passable(nb) or nb in closed:
-                    continue
-                if not self._can_move(current, nb):
-                    continue
-                tentative_g = gscore[current] + 1
-                if tentative_g < gscore.get(nb, 1e9):
-                    came_from[nb] = current
-                    gscore[nb] = tentative_g
-                    f = tentative_g + self.manhattan(nb, goal)
-                    heapq.heappush(open_heap, (f, tentative_g, nb))
-
-        self.overlay.fill((0,0,0,0))
-        self.screen.blit(self.overlay, (0,0))
-        pygame.display.flip()
-        return []
+    def __init__(self, world, screen, cell_size=None, clock=None, heuristic=None, cache=None,
+                 weight=None, budget_ms=None, overlay=None):
+        super().__init__(world, screen, cell_size, clock, heuristic=heuristic, cache=cache, overlay=overlay)
+        if weight is not None:
+            self.engine.anytime_weight = weight
+        if budget_ms is not None:
+            self.engine.anytime_budget_ms = budget_ms
 
-class GreedyBestFirstVisualizer(SearchVisualizer):
     def manhattan(self, a, b):
-        return abs(a[0]-b[0]) + abs(a[1]-b[1])
-
-    def search(self, start, goal, speed=0.015, auto_accept=False):
-        """
-        Greedy Best-First Search using Manhattan heuristic (f = h only).
-        Direction-aware via _can_move. Returns path or [].
-        """
-        import heapq
-        start = (int(start[0]), int(start[1]))
-        goal = (int(goal[0]), int(goal[1]))
-        if not self.is_passable(start) or not self.is_passable(goal):
-            return []
+        return self.engine.manhattan(a, b)
 
-        open_heap = []
-        heapq.heappush(open_heap, (self.manhattan(start, goal), start))
-        came_from = {}
-        closed = set()
 
-        self.overlay.fill((0,0,0,0))
-        self.visited_edges.clear()
-
-        while open_heap:
-            self._process_pygame_events()
-            _, current = heapq.heappop(open_heap)
-            if current in closed:
-                continue
-            closed.add(current)
-
-            if current in came_from:
-                p = came_from[current]
-                if self._can_move(p, current):
-                    self._animate_line(self.pixel_center(p), self.pixel_center(current), color=YELLOW, duration=speed)
-                    self.draw_visited_edge(p, current, color=YELLOW)
-            else:
-                cx, cy = self.pixel_center(current)
-                pygame.draw.circle(self.overlay, GREY, (cx, cy), max(2, self.cell_size//10))
-                self.screen.blit(self.overlay, (0,0))
-                pygame.display.flip()
-
-            if current == goal:
-                path = []
-                node = current
-                while node in came_from:
-                    path.append(node)
-                    node = came_from[node]
-                path.append(start)
-                path.reverse()
-                committed = self._confirm_and_commit(path, auto_accept=auto_accept)
-                return path if committed else []
-
-            for nb in self.neighbors(current):
-                if not self.is_passable(nb) or nb in closed:
-                    continue
-                if not self._can_move(current, nb):
-                    continue
-                if nb not in came_from:
-                    came_from[nb] = current
-                    heapq.heappush(open_heap, (self.manhattan(nb, goal), nb))
+class GreedyBestFirstVisualizer(SearchVisualizer):
+    algorithm = 'greedy'
+    default_speed = 0.015
 
-        self.overlay.fill((0,0,0,0))
-        self.screen.blit(self.overlay, (0,0))
-        pygame.display.flip()
-        return []
\ No newline at end of file
+    def manhattan(self, a, b):
+        return self.engine.manhattan(a, b)
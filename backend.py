@@ -0,0 +1,24 @@
+"""
+Display backend: explicit pygame setup, or a headless mode without a window, images or fonts.
+
+Receives: setup(headless=...) from the program's entry point, once, before Worlds, cars or
+          pedestrians are created. No module initializes pygame at import time.
+Outputs:  HEADLESS flag read at construction time by car.py, agent.py and pedestrian.py
+          (no sprites are loaded or scaled, only the rects used for positions are kept).
+main.py: calls setup() (windowed) at startup. Workers, tests and benchmarks call
+          setup(headless=True) and then build World / Car / Agent /
+          PedestrianManager(world, None) as usual; only update() is used, never draw().
+          Without a setup() call the windowed mode is assumed: sprites are loaded, and with
+          no display they fall back to placeholders with an image warning.
+"""
+import pygame
+
+HEADLESS = False
+
+
+def setup(headless=False):
+    """Initialize pygame for a window, or switch to headless mode (pygame stays uninitialized)."""
+    global HEADLESS
+    HEADLESS = headless
+    if not headless:
+        pygame.init()
@@ -0,0 +1,185 @@
+"""
+Batch route queries on a process pool.
+
+Receives: a World (or its LaneGraph), a list of ((row, col) start, (row, col) goal) queries
+          and an algorithm name ('BFS', 'DFS', 'A*', 'Greedy', 'hierarchical').
+Outputs:  BatchResult with columnar arrays: costs, visited counts and all paths
+          flattened into one node array with per-query offsets.
+Usage:    python batch.py [count] [out.csv] regenerates data in the format of
+          experiment_with_costs.csv without a window or the animation loop.
+
+The lane graph is serialized once (LaneGraph.snapshot()) and handed to every worker
+through the pool initializer; workers rebuild a read-only graph from it and never
+import pygame or map.py. Queries are split into chunks so throughput scales with
+the number of worker processes.
+"""
+import os
+import sys
+import random
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+
+from lanegraph import LaneGraph
+from hierarchy import CorridorGraph
+from landmarks import LandmarkHeuristic
+from search import SearchEngine
+
+
+class GraphWorld:
+    """Minimal World stand-in for SearchEngine: the compiled graphs only, no tiles or pygame."""
+    def __init__(self, lane_graph):
+        self.lane_graph = lane_graph
+        self.grid_width = lane_graph.width
+        self.grid_height = lane_graph.height
+        self._corridor_graph = None
+
+    @property
+    def corridor_graph(self):
+        # built on first use: only 'hierarchical' batches need it, and it is slow on big maps
+        if self._corridor_graph is None:
+            self._corridor_graph = CorridorGraph(self.lane_graph)
+        return self._corridor_graph
+
+
+class BatchResult:
+    """Columnar answers of one batch, in query order."""
+    def __init__(self, algorithm, width):
+        self.algorithm = algorithm
+        self.width = width
+        self.starts = array('i')
+        self.goals = array('i')
+        # cost = len(path) (0 when no route), like SearchResult.cost
+        self.costs = array('i')
+        self.visited = array('i')
+        # path of query i is path_nodes[path_offsets[i]:path_offsets[i + 1]] (flat node ints)
+        self.path_offsets = array('i', [0])
+        self.path_nodes = array('i')
+
+    def __len__(self):
+        return len(self.costs)
+
+    def path(self, i):
+        w = self.width
+        nodes = self.path_nodes[self.path_offsets[i]:self.path_offsets[i + 1]]
+        return [(n // w, n % w) for n in nodes]
+
+    def columns(self):
+        w = self.width
+        return {
+            'start': [(n // w, n % w) for n in self.starts],
+            'goal': [(n // w, n % w) for n in self.goals],
+            'cost': list(self.costs),
+            'visited': list(self.visited),
+        }
+
+    def _extend(self, chunk):
+        starts, goals, costs, visited, lengths, nodes = chunk
+        self.starts.extend(starts)
+        self.goals.extend(goals)
+        self.costs.extend(costs)
+        self.visited.extend(visited)
+        end = self.path_offsets[-1]
+        for n in lengths:
+            end += n
+            self.path_offsets.append(end)
+        self.path_nodes.extend(nodes)
+
+
+# --- worker side ---
+_worker_engine = None
+
+
+def _make_engine(snapshot, heuristic):
+    graph = LaneGraph.from_snapshot(snapshot)
+    h = LandmarkHeuristic(graph) if heuristic == 'landmarks' else None
+    return SearchEngine(GraphWorld(graph), heuristic=h)
+
+
+def _init_worker(snapshot, heuristic):
+    global _worker_engine
+    _worker_engine = _make_engine(snapshot, heuristic)
+
+
+def _solve_chunk(algorithm, queries, engine=None):
+    engine = engine if engine is not None else _worker_engine
+    w = engine.graph.width
+    starts, goals = array('i'), array('i')
+    costs, visited, lengths, nodes = array('i'), array('i'), array('i'), array('i')
+    for start, goal in queries:
+        result = engine.search(algorithm, start, goal)
+        starts.append(start[0] * w + start[1])
+        goals.append(goal[0] * w + goal[1])
+        costs.append(result.cost)
+        visited.append(result.visited_count)
+        lengths.append(len(result.path))
+        nodes.extend(r * w + c for r, c in result.path)
+    return starts, goals, costs, visited, lengths, nodes
+
+
+def solve_batch(world, queries, algorithm='A*', workers=None, heuristic=None, chunk_size=None):
+    """
+    Solve every (start, goal) query with `algorithm`.
+    world: a World or a LaneGraph. heuristic: None (Manhattan) or 'landmarks' for A* / Greedy.
+    workers: process count (default: CPU count); 1 solves in this process.
+    """
+    graph = getattr(world, 'lane_graph', world)
+    queries = [((int(s[0]), int(s[1])), (int(g[0]), int(g[1]))) for s, g in queries]
+    out = BatchResult(algorithm, graph.width)
+    if not queries:
+        return out
+
+    snapshot = graph.snapshot()
+    workers = workers or os.cpu_count() or 1
+    if workers <= 1 or len(queries) < 2 * workers:
+        out._extend(_solve_chunk(algorithm, queries, _make_engine(snapshot, heuristic)))
+        return out
+
+    if chunk_size is None:
+        chunk_size = max(1, len(queries) // (workers * 4))
+    chunks = [queries[i:i + chunk_size] for i in range(0, len(queries), chunk_size)]
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(snapshot, heuristic)) as pool:
+        # map() keeps chunk order, so results stay aligned with the queries
+        for chunk in pool.map(_solve_chunk, [algorithm] * len(chunks), chunks):
+            out._extend(chunk)
+    return out
+
+
+def random_queries(graph, count, seed=0):
+    """`count` random (start, goal) pairs of passable cells."""
+    rng = random.Random(seed)
+    cells = [graph.cells[i] for i in range(graph.size) if graph.allow[i]]
+    return [(rng.choice(cells), rng.choice(cells)) for _ in range(count)]
+
+
+def main():
+    """Regenerate an experiment table like experiment_with_costs.csv (reachable pairs only)."""
+    import csv
+    # only the parent process needs tiles; it never opens a window
+    import backend
+    import map
+    backend.setup(headless=True)
+
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    out_path = sys.argv[2] if len(sys.argv) > 2 else 'experiment_batch.csv'
+
+    world = map.World(map.GRID_WIDTH, map.GRID_HEIGHT)
+    queries = random_queries(world.lane_graph, count)
+    algos = [('bfs', 'BFS'), ('dfs', 'DFS'), ('astar', 'A*'), ('greedy', 'Greedy')]
+    results = {key: solve_batch(world, queries, name) for key, name in algos}
+
+    with open(out_path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['test_no'] + [f'{k}_visited' for k, _ in algos] + [f'{k}_cost' for k, _ in algos])
+        test_no = 0
+        for i in range(len(queries)):
+            if results['bfs'].costs[i] == 0:
+                continue
+            test_no += 1
+            writer.writerow([test_no] + [results[k].visited[i] for k, _ in algos]
+                            + [results[k].costs[i] for k, _ in algos])
+    print(f"[Batch] {test_no} reachable queries written to {out_path}")
+
+
+if __name__ == "__main__":
+    main()
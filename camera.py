@@ -0,0 +1,79 @@
+"""
+Scrolling, zoomable camera over the world's pixel plane.
+
+Receives: the map viewport size on screen (pixels), the world size in pixels and the cell size.
+Outputs:  Camera with
+            - world_rect(): the part of the world (world pixels) the viewport shows,
+            - to_world() / to_screen() / cell_at(): coordinate conversions for mouse input
+              and overlays,
+            - pan() / zoom_at() / center_on(): movement, always clamped to the map.
+main.py: keeps one Camera per World; arrow keys pan, the mouse wheel zooms around the cursor.
+          World.draw(), vehicles and pedestrians draw only what intersects world_rect(), at
+          1:1 scale; main.py scales that view to the viewport when zoom != 1.
+"""
+import math
+import pygame
+
+
+class Camera:
+    def __init__(self, view_width, view_height, world_width, world_height, cell_size, max_zoom=4.0, min_zoom=None):
+        self.view_width = view_width
+        self.view_height = view_height
+        self.world_width = world_width
+        self.world_height = world_height
+        self.cell_size = cell_size
+        self.max_zoom = max_zoom
+        # zooming out past "whole map fits" is pointless; past 0.25 a huge map would put
+        # thousands of chunks in view
+        fit = min(view_width / world_width, view_height / world_height)
+        self.min_zoom = min_zoom if min_zoom is not None else min(1.0, max(fit, 0.25))
+        self.zoom = 1.0
+        # world pixel shown at the viewport's top-left corner
+        self.x = 0.0
+        self.y = 0.0
+        self.clamp()
+
+    def clamp(self):
+        self.zoom = max(self.min_zoom, min(self.max_zoom, self.zoom))
+        span_w = self.view_width / self.zoom
+        span_h = self.view_height / self.zoom
+        self.x = max(0.0, min(self.x, self.world_width - span_w)) if span_w < self.world_width else 0.0
+        self.y = max(0.0, min(self.y, self.world_height - span_h)) if span_h < self.world_height else 0.0
+
+    def world_rect(self):
+        """Visible part of the world in world pixels (clipped to the map)."""
+        x, y = int(self.x), int(self.y)
+        w = min(math.ceil(self.view_width / self.zoom) + 1, self.world_width - x)
+        h = min(math.ceil(self.view_height / self.zoom) + 1, self.world_height - y)
+        return pygame.Rect(x, y, w, h)
+
+    def to_world(self, pos):
+        return (self.x + pos[0] / self.zoom, self.y + pos[1] / self.zoom)
+
+    def to_screen(self, world_pos):
+        return ((world_pos[0] - self.x) * self.zoom, (world_pos[1] - self.y) * self.zoom)
+
+    def cell_at(self, pos):
+        """(row, col) of the cell under a viewport pixel."""
+        wx, wy = self.to_world(pos)
+        return (int(wy // self.cell_size), int(wx // self.cell_size))
+
+    def pan(self, dx, dy):
+        """Move by (dx, dy) viewport pixels."""
+        self.x += dx / self.zoom
+        self.y += dy / self.zoom
+        self.clamp()
+
+    def zoom_at(self, factor, pos):
+        """Zoom by `factor`, keeping the world point under viewport pixel `pos` in place."""
+        wx, wy = self.to_world(pos)
+        self.zoom *= factor
+        self.clamp()
+        self.x = wx - pos[0] / self.zoom
+        self.y = wy - pos[1] / self.zoom
+        self.clamp()
+
+    def center_on(self, world_pos):
+        self.x = world_pos[0] - self.view_width / (2 * self.zoom)
+        self.y = world_pos[1] - self.view_height / (2 * self.zoom)
+        self.clamp()
@@ -1,10 +1,14 @@
 import pygame
-import random
 import map
+import backend
+from tilegrid import KIND_CROSSWALK, KIND_GRASS, KIND_LIGHT
+from crossings import DIRECTION_OF_VECTOR
 
 class Car:
     # Stable monotonically increasing id to break head-on ties
     next_id = 0
+    # world.random stream for spawn, speed and turn choices
+    rng_stream = 'car'
     def __init__(self, world, always_drive=False):
         """
         Car class constructor.
@@ -13,6 +17,7 @@ class Car:
         """
         self.world = world
         self.always_drive = always_drive
+        self.rng = world.random.stream(self.rng_stream)
         self.needs_reroute = False
 
         # Assign stable car id
@@ -24,27 +29,31 @@ class Car:
         self.pixel_x = self.grid_x * map.CELL_SIZE
         self.pixel_y = self.grid_y * map.CELL_SIZE
 
-        # Load car image
-        try:
-            # Try to load images/car.png
-            self.image_orig = pygame.image.load("images/car.png").convert_alpha()
-        except pygame.error:
-            # If not found, use a blue square as default
-            print("Warning: 'images/car.png' not found. Using a blue square as default.")
-            self.image_orig = pygame.Surface((map.CELL_SIZE, map.CELL_SIZE), pygame.SRCALPHA)
-            pygame.draw.rect(self.image_orig, (0, 0, 255, 200), (0, 0, map.CELL_SIZE, map.CELL_SIZE))
-
         # As large as possible -> Close to cell size (with a small margin)
         scale_factor = 1.5
-        self.image_orig = pygame.transform.scale(self.image_orig, (int(map.CELL_SIZE * scale_factor), int(map.CELL_SIZE * scale_factor)))
-        self.image = self.image_orig
-        self.rect = self.image.get_rect(center=(self.pixel_x + map.CELL_SIZE // 2, self.pixel_y + map.CELL_SIZE // 2))
+        if backend.HEADLESS:
+            # No display: no sprite, only the rect that tracks the car's position
+            self.set_headless_rect(scale_factor)
+        else:
+            # Load car image
+            try:
+                # Try to load images/car.png
+                self.image_orig = pygame.image.load("images/car.png").convert_alpha()
+            except pygame.error:
+                # If not found, use a blue square as default
+                print("Warning: 'images/car.png' not found. Using a blue square as default.")
+                self.image_orig = pygame.Surface((map.CELL_SIZE, map.CELL_SIZE), pygame.SRCALPHA)
+                pygame.draw.rect(self.image_orig, (0, 0, 255, 200), (0, 0, map.CELL_SIZE, map.CELL_SIZE))
+
+            self.image_orig = pygame.transform.scale(self.image_orig, (int(map.CELL_SIZE * scale_factor), int(map.CELL_SIZE * scale_factor)))
+            self.image = self.image_orig
+            self.rect = self.image.get_rect(center=(self.pixel_x + map.CELL_SIZE // 2, self.pixel_y + map.CELL_SIZE // 2))
 
         # Physics and Movement
         # Each car has random speed and acceleration
-        self.max_speed = random.uniform(1.5, 3.0)  # Pixels/frame
+        self.max_speed = self.rng.uniform(1.5, 3.0)  # Pixels/frame
         self.speed = 0.0
-        self.acceleration = random.uniform(0.05, 0.15) # Acceleration
+        self.acceleration = self.rng.uniform(0.05, 0.15) # Acceleration
         self.deceleration = 0.3  # Deceleration (braking)
         
         # ANGLE CORRECTION: Assumes image is facing RIGHT (East)
@@ -56,7 +65,7 @@ class Car:
         self.state = 'stopped'  # 'driving', 'stopping', 'stopped'
 
         # Set initial direction
-        if 0 <= self.grid_y < map.GRID_HEIGHT and 0 <= self.grid_x < map.GRID_WIDTH:
+        if 0 <= self.grid_y < self.world.grid_height and 0 <= self.grid_x < self.world.grid_width:
              self.current_tile = self.world.grid[self.grid_y][self.grid_x]
              self.set_initial_direction()
         else:
@@ -67,18 +76,20 @@ class Car:
         self.max_stuck_time = 3 * map.FPS  # 3 seconds at 60 FPS
         self.last_position = (0, 0)
 
+    def set_headless_rect(self, scale_factor):
+        """Headless backend: no images, a square rect of the sprite's size at the car's cell."""
+        size = int(map.CELL_SIZE * scale_factor)
+        self.image_orig = self.image = None
+        self.rect = pygame.Rect(0, 0, size, size)
+        self.rect.center = (self.pixel_x + map.CELL_SIZE // 2, self.pixel_y + map.CELL_SIZE // 2)
+
     def find_spawn_point(self):
         """Find a random valid road cell on the map to spawn the car."""
-        road_tiles = []
-        for r in range(map.GRID_HEIGHT):
-            for c in range(map.GRID_WIDTH):
-                tile = self.world.grid[r][c]
-                # Only start on roads that have a lane direction (not intersections)
-                if isinstance(tile, map.Road) and tile.direction is not None:
-                    road_tiles.append((r, c)) # (y, x) -> (col, row)
+        # Only start on roads that have a lane direction (not intersections)
+        road_tiles = self.world.spawn_cells() # (y, x) -> (col, row)
         
         if road_tiles:
-            return random.choice(road_tiles)
+            return self.rng.choice(road_tiles)
         else:
             # If no road cell is found, return (0, 0) and print an error
             print("Error: No road cell found in the map. (0, 0) is used.")
@@ -91,7 +102,7 @@ class Car:
             self.state = 'driving' # Start driving
         else:
             # If it's an intersection or an invalid location, choose a random direction
-            self.follow_road_direction(random.choice(['N', 'S', 'E', 'W']))
+            self.follow_road_direction(self.rng.choice(['N', 'S', 'E', 'W']))
             self.state = 'driving'
 
     def follow_road_direction(self, direction_str):
@@ -135,13 +146,13 @@ class Car:
             check_x = self.grid_x + int(self.direction_vector.x * i)
             check_y = self.grid_y + int(self.direction_vector.y * i)
 
-            if not (0 <= check_x < map.GRID_WIDTH and 0 <= check_y < map.GRID_HEIGHT):
+            if not (0 <= check_x < self.world.grid_width and 0 <= check_y < self.world.grid_height):
                 break
 
-            tile = self.world.grid[check_y][check_x]
+            kind = self.world.tiles.kind_at[check_y * self.world.grid_width + check_x]
 
             # CHECK CROSSWALK/PEDESTRIANS FIRST (highest priority)
-            if isinstance(tile, map.Crosswalk):
+            if kind == KIND_CROSSWALK:
                 # Check for pedestrians (law-breakers or legal crossers)
                 if hasattr(self.world, "pedestrian_manager") and self.world.pedestrian_manager:
                     for ped in self.world.pedestrian_manager.group:
@@ -164,7 +175,7 @@ class Car:
                         return ('car_ahead', i)
         
             # CHECK OBSTACLES (grass, buildings)
-            if isinstance(tile, (map.Grass, map.TrafficLight)):
+            if kind == KIND_GRASS or kind == KIND_LIGHT:
                 return ('obstacle', i)
             
         return None
@@ -173,30 +184,12 @@ class Car:
         """
         Find the traffic light to the RIGHT of the crosswalk (from car's perspective).
         crow = row, ccol = col of the crosswalk
+        Looked up in the World's precomputed crosswalk -> light table (crossings.py).
         """
-        # Determine which direction to look based on car's movement
-        if self.direction_vector.y == -1:  # Moving North
-            # Light should be to the right: col + 1
-            light_row, light_col = crow, ccol + 1
-        elif self.direction_vector.y == 1:  # Moving South
-            # Light should be to the right: col - 1
-            light_row, light_col = crow, ccol - 1
-        elif self.direction_vector.x == -1:  # Moving West
-            # Light should be to the right: row - 1
-            light_row, light_col = crow - 1, ccol
-        elif self.direction_vector.x == 1:  # Moving East
-            # Light should be to the right: row + 1
-            light_row, light_col = crow + 1, ccol
-        else:
+        direction = DIRECTION_OF_VECTOR.get((int(self.direction_vector.x), int(self.direction_vector.y)))
+        if direction is None:
             return None
-        
-        # Check if that position is valid and has a traffic light
-        if 0 <= light_row < map.GRID_HEIGHT and 0 <= light_col < map.GRID_WIDTH:
-            tile = self.world.grid[light_row][light_col]
-            if isinstance(tile, map.TrafficLight):
-                return tile
-        
-        return None
+        return self.world.crossing_lights.light_at(crow, ccol, direction)
 
     def update_state(self, obstacle_info):
         """Update state based on obstacle and its distance."""
@@ -365,14 +358,8 @@ class Car:
             nx = self.grid_x + dx
             ny = self.grid_y + dy
             
-            # Check if within bounds
-            if not (0 <= nx < map.GRID_WIDTH and 0 <= ny < map.GRID_HEIGHT):
-                continue
-            
-            tile = self.world.grid[ny][nx]
-            
-            # Check if it's a valid road/crosswalk
-            if not isinstance(tile, (map.Road, map.Crosswalk)):
+            # Check if it's a valid road/crosswalk inside the map (precompiled lane graph)
+            if not self.world.lane_graph.is_passable(ny, nx):
                 continue
             
             # Check if blocked by another car
@@ -399,7 +386,7 @@ class Car:
             if current_opposite in open_directions and len(open_directions) > 1:
                 open_directions.remove(current_opposite)
             
-            chosen_dir = random.choice(open_directions)
+            chosen_dir = self.rng.choice(open_directions)
             self.follow_road_direction(chosen_dir)
             
             # Force the car to start moving
@@ -419,7 +406,7 @@ class Car:
     def on_new_tile_ai(self, other_cars):
         """Called when the car enters a new grid cell (handles turns and lane following)."""
         # If we went out of map bounds
-        if not (0 <= self.grid_x < map.GRID_WIDTH and 0 <= self.grid_y < map.GRID_HEIGHT):
+        if not (0 <= self.grid_x < self.world.grid_width and 0 <= self.grid_y < self.world.grid_height):
             self.respawn() # Respawn
             return
 
@@ -450,24 +437,21 @@ class Car:
 
         for move_dir_str, (dx, dy) in moves.items():
             nx, ny = self.grid_x + dx, self.grid_y + dy
-            # Is it within map bounds?
-            if 0 <= nx < map.GRID_WIDTH and 0 <= ny < map.GRID_HEIGHT:
-                tile = self.world.grid[ny][nx]
-                # Is it an adjacent road or crosswalk?
-                if isinstance(tile, (map.Road, map.Crosswalk)):
-                    # Prevent U-turn (going back to the direction you came from)
-                    if pygame.math.Vector2(dx, dy) != -current_dir_vec:
-                        
-                        # Check if this path is open
-                        is_blocked = False
-                        if other_cars:
-                            for car in other_cars:
-                                if car != self and car.grid_x == nx and car.grid_y == ny:
-                                    is_blocked = True
-                                    break
-                        
-                        if not is_blocked:
-                            possible_dirs.append(move_dir_str)
+            # Is it an adjacent road or crosswalk within map bounds? (precompiled lane graph)
+            if self.world.lane_graph.is_passable(ny, nx):
+                # Prevent U-turn (going back to the direction you came from)
+                if pygame.math.Vector2(dx, dy) != -current_dir_vec:
+                    
+                    # Check if this path is open
+                    is_blocked = False
+                    if other_cars:
+                        for car in other_cars:
+                            if car != self and car.grid_x == nx and car.grid_y == ny:
+                                is_blocked = True
+                                break
+                    
+                    if not is_blocked:
+                        possible_dirs.append(move_dir_str)
 
         if possible_dirs:
             # If we need to reroute (collision happened), AVOID going straight
@@ -484,10 +468,10 @@ class Car:
                 
                 # If still have options after removing straight, pick one
                 if possible_dirs:
-                    chosen_dir = random.choice(possible_dirs)
+                    chosen_dir = self.rng.choice(possible_dirs)
                 else:
                     # No choice but to go straight or turn around
-                    chosen_dir = straight_move_str if straight_move_str else random.choice(['N', 'S', 'E', 'W'])
+                    chosen_dir = straight_move_str if straight_move_str else self.rng.choice(['N', 'S', 'E', 'W'])
                 
                 self.needs_reroute = False  # Reset flag
             else:
@@ -499,10 +483,10 @@ class Car:
                 elif current_dir_vec.y == -1: straight_move_str = 'N'
 
                 # 70% chance to go straight (if possible)
-                if straight_move_str in possible_dirs and random.random() < 0.7: 
+                if straight_move_str in possible_dirs and self.rng.random() < 0.7: 
                     chosen_dir = straight_move_str
                 else:
-                    chosen_dir = random.choice(possible_dirs)
+                    chosen_dir = self.rng.choice(possible_dirs)
             
             self.follow_road_direction(chosen_dir)
         else:
@@ -519,6 +503,8 @@ class Car:
         Rotate the car image based on the current angle.
         Avoids continuous spin artifact by rotating the original image.
         """
+        if self.image_orig is None:
+            return  # headless: nothing to rotate
         # Rotate the original image (to prevent quality loss)
         self.image = pygame.transform.rotate(self.image_orig, self.angle)
         # Set the center of the rotated image
@@ -532,7 +518,7 @@ class Car:
         self.speed = 0
         self.state = 'stopped'
         
-        if 0 <= self.grid_y < map.GRID_HEIGHT and 0 <= self.grid_x < map.GRID_WIDTH:
+        if 0 <= self.grid_y < self.world.grid_height and 0 <= self.grid_x < self.world.grid_width:
             self.current_tile = self.world.grid[self.grid_y][self.grid_x]
             self.set_initial_direction()
         else:
@@ -557,6 +543,6 @@ class Car:
         # 5. Rotate image
         self.rotate_image()
 
-    def draw(self, screen):
-        """Draw the car on the screen."""
-        screen.blit(self.image, self.rect)
\ No newline at end of file
+    def draw(self, screen, offset=(0, 0)):
+        """Draw the car on the screen; offset is added to its world position (camera view)."""
+        screen.blit(self.image, self.rect.move(offset))
\ No newline at end of file
@@ -0,0 +1,104 @@
+"""
+Seeded procedural city layout for maps of any size.
+
+Receives: a freshly created World (map.py) filled with grass; its rng (random.Random seeded
+          from World(seed=...)) drives every choice, so a seed always gives the same city.
+Outputs:  roads, intersections, crosswalks and traffic lights painted into world.grid through
+          the World's own painting helpers (_paint_road, _put_intersection,
+          _place_crosswalk_and_light); buildings are added afterwards by the World as usual.
+main.py: nothing to call directly - World(width, height, seed=..., procedural=True) uses this
+          instead of the hand-drawn 56x36 layout (the default for any other map size).
+
+Layout: two-lane roads on a jittered lattice of road lines spanning the whole map. The
+junction graph keeps a random spanning tree plus most of the remaining segments, so the
+network is always connected but has T-junctions, corners and longer blocks. Junctions get
+the existing rules: 4-way junctions a crosswalk and light on every side, T-junctions on the
+sides that have a road, corners and straight joins only the intersection block.
+"""
+
+# cells between two parallel road lines (>= 3 keeps crosswalks and lights of facing junctions apart)
+BLOCK_MIN = 6
+BLOCK_MAX = 12
+# share of non-tree junction links left out (more T-junctions and corners)
+DROP_RATE = 0.15
+
+_LIGHT_STATES = ('red', 'yellow', 'green')
+
+
+def _road_lines(size, rng, block_min, block_max):
+    """Top/left index of each two-cell road line across a map dimension of `size` cells."""
+    lines = []
+    p = rng.randint(2, 2 + block_min // 2)
+    while p + 3 < size:
+        lines.append(p)
+        p += 2 + rng.randint(block_min, block_max)
+    return lines
+
+
+def _find(parent, i):
+    while parent[i] != i:
+        parent[i] = parent[parent[i]]
+        i = parent[i]
+    return i
+
+
+def generate_city(world, block_min=BLOCK_MIN, block_max=BLOCK_MAX, drop_rate=DROP_RATE):
+    rng = world.rng
+    rows = _road_lines(world.grid_height, rng, block_min, block_max)
+    cols = _road_lines(world.grid_width, rng, block_min, block_max)
+    if not rows or not cols:
+        return
+    nr, nc = len(rows), len(cols)
+
+    # links between neighbouring junctions: ('h', i, j) joins (i, j)-(i, j+1), ('v', i, j) joins (i, j)-(i+1, j)
+    links = [('h', i, j) for i in range(nr) for j in range(nc - 1)] + \
+            [('v', i, j) for i in range(nr - 1) for j in range(nc)]
+    rng.shuffle(links)
+    parent = list(range(nr * nc))
+    kept = set()
+    for link in links:
+        kind, i, j = link
+        a = i * nc + j
+        b = a + 1 if kind == 'h' else a + nc
+        ra, rb = _find(parent, a), _find(parent, b)
+        if ra != rb:
+            parent[ra] = rb
+            kept.add(link)
+        elif rng.random() >= drop_rate:
+            kept.add(link)
+
+    # road segments: kept links, plus the stubs from the outer junctions to the map edges
+    for i, r in enumerate(rows):
+        for j, c in enumerate(cols):
+            world._paint_road(r, c, r, c + 1)
+            if j + 1 < nc and ('h', i, j) in kept:
+                world._paint_road(r, c + 2, r, cols[j + 1] - 1)
+            if i + 1 < nr and ('v', i, j) in kept:
+                world._paint_road(r + 2, c, rows[i + 1] - 1, c)
+    for r in rows:
+        world._paint_road(r, 0, r, cols[0] - 1)
+        world._paint_road(r, cols[-1] + 2, r, world.grid_width - 1)
+    for c in cols:
+        world._paint_road(0, c, rows[0] - 1, c)
+        world._paint_road(rows[-1] + 2, c, world.grid_height - 1, c)
+
+    # junctions: intersection block, then crosswalks + lights by the existing rules
+    for i, r in enumerate(rows):
+        for j, c in enumerate(cols):
+            north = i == 0 or ('v', i - 1, j) in kept
+            south = i == nr - 1 or ('v', i, j) in kept
+            west = j == 0 or ('h', i, j - 1) in kept
+            east = j == nc - 1 or ('h', i, j) in kept
+            world._put_intersection(r, c)
+            if north + south + west + east < 3:
+                continue
+            state = rng.choice(_LIGHT_STATES)
+            other = 'green' if state == 'red' else 'red'
+            if north:
+                world._place_crosswalk_and_light(r - 1, c, 'vertical', state, 'top-right')
+            if south:
+                world._place_crosswalk_and_light(r + 2, c, 'vertical', other, 'bottom-left')
+            if west:
+                world._place_crosswalk_and_light(r, c - 1, 'horizontal', other, 'top-left')
+            if east:
+                world._place_crosswalk_and_light(r, c + 2, 'horizontal', state, 'bottom-right')
@@ -0,0 +1,304 @@
+"""
+Cooperative multi-agent planning: space-time A* over a reservation table.
+
+Receives: the World's LaneGraph and a fleet of (agent id, start cell, goal cell) requests
+          in priority order.
+Outputs:  per agent a timed path - one (row, col) cell per tick, a repeated cell is a wait -
+          and FleetSchedule, which runs timed paths on the planner's clock.
+main.py: keeps one CooperativePlanner and FleetSchedule per World, plans the fleet agents
+          together after a reset and replans an agent (releasing its old reservations first)
+          when an obstacle blocks it. Every frame it hands the agents' cells to
+          FleetSchedule.step() and gives each agent its hold_index (the last waypoint it may
+          drive to), so agents wait out their wait steps and the clock only advances once
+          every agent stands on its cell for the current tick.
+
+Agents are planned one after another; each reserves its (cell, tick) pairs and then stays
+parked on its goal, so later agents route or wait around it. Vertex conflicts (two agents
+in one cell at one tick) and swap conflicts (two agents exchanging cells between ticks) are
+avoided. Routes that hit the horizon or expansion budget fall back to a plain shortest path;
+it is still reserved (without taking cells other agents hold) but may conflict, and
+plan() reports it with conflict_free = False. Within a tick agents drive with their own
+physics (lights and pedestrians still stop them, which holds the clock); other traffic is
+not in the table. The heuristic is the exact lane distance to the goal from a shared
+distfield.DistanceFieldCache, so without conflicts the search walks straight down a
+shortest path. Reservations are flat int keys (tick * size + node) bucketed per tick:
+a lookup is one dict probe and expiring a tick drops its whole bucket.
+"""
+import heapq
+from distfield import DistanceFieldCache
+from lanegraph import STRIDE
+
+
+class ReservationTable:
+    def __init__(self, size):
+        self.size = size
+        # tick * size + node -> agent id
+        self._cells = {}
+        # tick -> keys reserved at that tick
+        self._by_tick = {}
+        # agent id -> keys it holds, and the node it is parked on from some tick on
+        self._by_agent = {}
+        # node -> (agent id, tick): the agent occupies the node from that tick on
+        self._parked = {}
+        self._parked_by_agent = {}
+        # node -> latest tick any agent passes it (an upper bound, never lowered by release)
+        self._last = {}
+
+    def __len__(self):
+        return len(self._cells)
+
+    def owner(self, node, tick):
+        agent = self._cells.get(tick * self.size + node)
+        if agent is None:
+            park = self._parked.get(node)
+            if park is not None and tick >= park[1]:
+                return park[0]
+        return agent
+
+    def is_free(self, node, tick, agent=None):
+        owner = self.owner(node, tick)
+        return owner is None or owner == agent
+
+    def swap_conflict(self, u, v, tick, agent=None):
+        """True if moving u -> v between tick and tick + 1 swaps places with another agent."""
+        other = self.owner(v, tick)
+        return other is not None and other != agent and self.owner(u, tick + 1) == other
+
+    def parked_by(self, node):
+        park = self._parked.get(node)
+        return park[0] if park is not None else None
+
+    def can_park(self, node, tick, agent=None):
+        """True if the agent may stay on node from tick on (nobody passes it later)."""
+        park = self._parked.get(node)
+        if park is not None and park[0] != agent:
+            return False
+        return self._last.get(node, -1) < tick
+
+    def reserve(self, agent, nodes, start_tick, park=True, keep_others=False):
+        """
+        Reserve nodes[k] at start_tick + k (and park on the last node). keep_others: leave
+        (cell, tick) pairs and parking spots other agents hold to them (fallback routes).
+        """
+        size = self.size
+        keys = self._by_agent.setdefault(agent, [])
+        for dt, node in enumerate(nodes):
+            tick = start_tick + dt
+            key = tick * size + node
+            if keep_others and not self.is_free(node, tick, agent):
+                continue
+            self._cells[key] = agent
+            self._by_tick.setdefault(tick, []).append(key)
+            keys.append(key)
+            if self._last.get(node, -1) < tick:
+                self._last[node] = tick
+        if park and nodes:
+            node = nodes[-1]
+            if keep_others and self.parked_by(node) not in (None, agent):
+                return
+            self._parked[node] = (agent, start_tick + len(nodes) - 1)
+            self._parked_by_agent[agent] = node
+
+    def release(self, agent):
+        """Drop every reservation of the agent (before replanning it)."""
+        cells = self._cells
+        for key in self._by_agent.pop(agent, ()):
+            if cells.get(key) == agent:
+                del cells[key]
+        node = self._parked_by_agent.pop(agent, None)
+        if node is not None and self._parked.get(node, (None,))[0] == agent:
+            del self._parked[node]
+
+    def expire(self, before_tick):
+        """Forget every reservation at ticks < before_tick."""
+        cells = self._cells
+        for tick in [t for t in self._by_tick if t < before_tick]:
+            for key in self._by_tick.pop(tick):
+                cells.pop(key, None)
+
+
+class CooperativePlanner:
+    def __init__(self, lane_graph, horizon=None, fields=None, max_expansions=None):
+        self.graph = lane_graph
+        self.table = ReservationTable(lane_graph.size)
+        # exact distance-to-goal heuristics, one field per goal
+        self.fields = fields if fields is not None else DistanceFieldCache(lane_graph, max_fields=64)
+        # search at most this many ticks ahead (default: a generous multiple of the grid perimeter)
+        self.horizon = horizon if horizon is not None else 4 * (lane_graph.width + lane_graph.height)
+        # give up on one agent after this many space-time expansions
+        self.max_expansions = max_expansions if max_expansions is not None else 2 * lane_graph.size
+        self.tick = 0
+        # (goal, lane graph version) -> distance list, so the search reads plain Python ints
+        self._heuristics = {}
+        # space-time states expanded by the latest plan() call, and whether it found a
+        # conflict-free route
+        self.expanded = 0
+        self.conflict_free = True
+
+    def advance_tick(self, keep=2):
+        """Move the clock one tick on and expire reservations older than `keep` ticks."""
+        self.tick += 1
+        self.table.expire(self.tick - keep)
+
+    def _distances(self, goal):
+        key = (goal, self.graph.version)
+        dist = self._heuristics.get(key)
+        if dist is None:
+            if len(self._heuristics) > 256:
+                self._heuristics.clear()
+            dist = self.fields.field(goal)._dist.tolist()
+            self._heuristics[key] = dist
+        return dist
+
+    def _search(self, agent, s, t, start_tick, dist):
+        g = self.graph
+        size, succ, succ_deg = g.size, g.succ, g.succ_deg
+        table = self.table
+        limit = start_tick + self.horizon
+        budget = self.max_expansions
+        start_key = start_tick * size + s
+        parent = {start_key: -1}
+        closed = set()
+        # (ticks so far + exact remaining distance, -tick (deeper first on ties), node)
+        open_heap = [(dist[s], -start_tick, s)]
+        while open_heap:
+            _, neg_tick, u = heapq.heappop(open_heap)
+            tick = -neg_tick
+            key = tick * size + u
+            if key in closed:
+                continue
+            closed.add(key)
+            self.expanded += 1
+            if self.expanded > budget:
+                return None
+
+            if u == t and table.can_park(t, tick, agent):
+                nodes = []
+                while key != -1:
+                    nodes.append(key % size)
+                    key = parent[key]
+                nodes.reverse()
+                return nodes
+            if tick >= limit:
+                continue
+
+            nt = tick + 1
+            base = u * STRIDE
+            # every lane move plus waiting in place
+            for v in [succ[k] for k in range(base, base + succ_deg[u])] + [u]:
+                dv = dist[v]
+                if dv < 0:
+                    continue
+                nk = nt * size + v
+                if nk in parent:
+                    continue
+                if not table.is_free(v, nt, agent):
+                    continue
+                if v != u and table.swap_conflict(u, v, tick, agent):
+                    continue
+                parent[nk] = key
+                heapq.heappush(open_heap, (nt - start_tick + dv, -nt, v))
+        return None
+
+    def plan(self, agent, start, goal, start_tick=None):
+        """
+        Timed path (one cell per tick from start_tick, default: now) for one agent, reserved
+        in the table. If no conflict-free route is found within the horizon and expansion
+        budget, returns a plain shortest path, reserved where nobody else holds the cells
+        (conflict_free is False); [] if the goal is unreachable.
+        """
+        g = self.graph
+        start_tick = self.tick if start_tick is None else start_tick
+        self.table.release(agent)
+        self.expanded = 0
+        self.conflict_free = True
+        if not (g.is_passable(start[0], start[1]) and g.is_passable(goal[0], goal[1])):
+            return []
+        goal = (int(goal[0]), int(goal[1]))
+        s, t = g.index(int(start[0]), int(start[1])), g.index(*goal)
+        dist = self._distances(goal)
+        if dist[s] < 0:
+            return []
+
+        nodes = None
+        if self.table.parked_by(t) in (None, agent):
+            nodes = self._search(agent, s, t, start_tick, dist)
+        if nodes is None:
+            self.conflict_free = False
+            route = self.fields.route(start, goal)
+            self.table.reserve(agent, [g.index(*cell) for cell in route], start_tick, keep_others=True)
+            return route
+        self.table.reserve(agent, nodes, start_tick)
+        cells = g.cells
+        return [cells[i] for i in nodes]
+
+    def plan_fleet(self, requests, start_tick=None):
+        """Plan (agent id, start, goal) requests in priority order; returns {agent id: timed path}."""
+        g = self.graph
+        tick = self.tick if start_tick is None else start_tick
+        # everyone stands on their start cell until planned: higher-priority agents must not plan
+        # through it (parked from now on; plan() releases it when the agent itself is planned)
+        for agent, start, _ in requests:
+            self.table.release(agent)
+            if g.is_passable(start[0], start[1]):
+                self.table.reserve(agent, [g.index(int(start[0]), int(start[1]))], tick)
+        return {agent: self.plan(agent, start, goal, tick) for agent, start, goal in requests}
+
+
+class FleetSchedule:
+    """
+    Runs timed paths on the planner's clock: at tick t an agent may drive up to the cell of its
+    timed path at t (a wait step keeps it where it is), and the clock moves to t + 1 once every
+    scheduled agent stands on its cell for t.
+    """
+    def __init__(self, planner):
+        self.planner = planner
+        # agent id -> (start tick, timed cells, waypoint index of each step in the collapsed path)
+        self._plans = {}
+
+    def __len__(self):
+        return len(self._plans)
+
+    def assign(self, agent, timed_path, start_tick=None):
+        """Schedule a timed path from start_tick (default: now); returns the Agent.move() waypoints."""
+        if not timed_path:
+            self._plans.pop(agent, None)
+            return []
+        waypoints, steps = [], []
+        for cell in timed_path:
+            if not waypoints or waypoints[-1] != cell:
+                waypoints.append(cell)
+            steps.append(len(waypoints) - 1)
+        start_tick = self.planner.tick if start_tick is None else start_tick
+        self._plans[agent] = (start_tick, list(timed_path), steps)
+        return waypoints
+
+    def drop(self, agent):
+        self._plans.pop(agent, None)
+
+    def _step_index(self, agent, tick):
+        start_tick, timed, _ = self._plans[agent]
+        return min(max(tick - start_tick, 0), len(timed) - 1)
+
+    def cell_at(self, agent, tick=None):
+        """Cell the agent must be on at tick (default: now); after its path ends, its goal."""
+        tick = self.planner.tick if tick is None else tick
+        return self._plans[agent][1][self._step_index(agent, tick)]
+
+    def hold_index(self, agent):
+        """Last waypoint (index into the assigned waypoints) the agent may drive to now; None if unscheduled."""
+        if agent not in self._plans:
+            return None
+        return self._plans[agent][2][self._step_index(agent, self.planner.tick)]
+
+    def step(self, positions):
+        """
+        positions: agent id -> current (row, col). Advances the planner's clock if every
+        scheduled agent is on its cell for the current tick; returns True if it did.
+        """
+        tick = self.planner.tick
+        for agent in self._plans:
+            if positions.get(agent) != self.cell_at(agent, tick):
+                return False
+        self.planner.advance_tick()
+        return True
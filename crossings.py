@@ -0,0 +1,70 @@
+"""
+Crosswalk -> controlling traffic light lookup table.
+
+Receives: a World (map.py): its typed tile mirror (world.tiles) and light registry
+          (world.lights); the World forwards its edit events to update(cells).
+Outputs:  CrossingLights with
+            - light_index(r, c, direction): registry index of the light that controls traffic
+              entering crosswalk cell (r, c) heading `direction` (code 0..3 in
+              lanegraph.DIRECTIONS order), or None,
+            - light_at(r, c, direction): the same light as a TrafficLight tile.
+          The controlling light stands on the driver's right: east of the crosswalk when
+          heading north, west heading south, north heading west, south heading east.
+main.py: nothing to call directly - World builds it (world.crossing_lights); Car.look_ahead
+          and PedestrianManager read it instead of searching the grid around crosswalks.
+"""
+import numpy as np
+from lanegraph import DIRECTIONS
+from tilegrid import KIND_CROSSWALK, KIND_LIGHT
+
+# driver's right-hand (dr, dc) per direction code: N -> E, W -> N, E -> S, S -> W
+_RIGHT = [(dc, -dr) for _, dr, dc in DIRECTIONS]
+# direction code of a unit (dx, dy) movement vector (Car.direction_vector)
+DIRECTION_OF_VECTOR = {(dc, dr): k for k, (_, dr, dc) in enumerate(DIRECTIONS)}
+
+
+class CrossingLights:
+    def __init__(self, world):
+        self.world = world
+        self.width = world.grid_width
+        self.height = world.grid_height
+        # (r * width + c) * 4 + direction -> light index; only crosswalk cells with a light
+        self._light_of = {}
+        self.rebuild()
+
+    def _set_cell(self, r, c):
+        tiles, index_at = self.world.tiles, self.world.lights.index_at
+        base = (r * self.width + c) * 4
+        crosswalk = tiles.kind_of(r, c) == KIND_CROSSWALK
+        for k, (dr, dc) in enumerate(_RIGHT):
+            i = index_at.get((r + dr, c + dc)) if crosswalk and tiles.kind_of(r + dr, c + dc) == KIND_LIGHT else None
+            if i is None:
+                self._light_of.pop(base + k, None)
+            else:
+                self._light_of[base + k] = i
+
+    def rebuild(self):
+        self._light_of.clear()
+        rows, cols = np.nonzero(self.world.tiles.kind == KIND_CROSSWALK)
+        for r, c in zip(rows.tolist(), cols.tolist()):
+            self._set_cell(r, c)
+
+    def update(self, cells):
+        """Re-resolve the edited cells and their neighbours (a light serves the crosswalks next to it)."""
+        touched = set()
+        for r, c in cells:
+            touched.add((r, c))
+            for _, dr, dc in DIRECTIONS:
+                touched.add((r + dr, c + dc))
+        for r, c in touched:
+            if 0 <= r < self.height and 0 <= c < self.width:
+                self._set_cell(r, c)
+
+    def light_index(self, r, c, direction):
+        if 0 <= r < self.height and 0 <= c < self.width:
+            return self._light_of.get((r * self.width + c) * 4 + direction)
+        return None
+
+    def light_at(self, r, c, direction):
+        i = self.light_index(r, c, direction)
+        return self.world.lights.lights[i] if i is not None else None
@@ -0,0 +1,200 @@
+"""
+Goal-rooted distance fields over the directed lane graph (NumPy wavefronts).
+
+Receives: a LaneGraph (lanegraph.py) and a goal (row, col) cell.
+Outputs:  DistanceField with
+            - dist:      int32 array (grid_height, grid_width), lane moves to the goal, -1 = unreachable
+            - next_slot: int8 array (grid_height, grid_width), direction slot of the next move
+                         (0..3 -> 'N', 'W', 'E', 'S' as in lanegraph.DIRECTIONS), -1 = none
+          and route(start) -> list of (row, col) cells read off the field in O(path length).
+main.py / agent.py: DistanceFieldCache keeps one field per goal, so every vehicle heading to
+          the same destination (or repeated replans to it) shares one reverse search;
+          Agent.follow_field() turns a field into a path for Agent.move().
+
+Moves have unit cost, so the reverse search is a breadth-first wavefront: each step
+expands the whole frontier at once through the predecessor table. After lane graph
+edits only the part of the field whose routes ran through the edited cells is
+recomputed, plus the wave of nodes that got closer because new moves appeared.
+"""
+from collections import OrderedDict
+import numpy as np
+from lanegraph import DIRECTIONS, STRIDE
+
+UNREACHABLE = -1
+_BIG = np.int32(2 ** 30)
+
+
+def _tables(graph):
+    n = graph.size
+    succ = np.frombuffer(graph.succ, dtype=np.int32).reshape(n, STRIDE)
+    pred = np.frombuffer(graph.pred, dtype=np.int32).reshape(n, STRIDE)
+    return succ, pred
+
+
+class DistanceField:
+    def __init__(self, graph, goal):
+        self.graph = graph
+        self.goal_cell = (int(goal[0]), int(goal[1]))
+        self.goal = graph.index(*self.goal_cell)
+        n = graph.size
+        self._dist = np.full(n, UNREACHABLE, dtype=np.int32)
+        self._next = np.full(n, -1, dtype=np.int32)
+        self._slot = np.full(n, -1, dtype=np.int8)
+        self.compute()
+
+    # --- views ---
+    @property
+    def dist(self):
+        return self._dist.reshape(self.graph.height, self.graph.width)
+
+    @property
+    def next_slot(self):
+        return self._slot.reshape(self.graph.height, self.graph.width)
+
+    def distance(self, cell):
+        return int(self._dist[cell[0] * self.graph.width + cell[1]])
+
+    def direction(self, cell):
+        slot = int(self._slot[cell[0] * self.graph.width + cell[1]])
+        return DIRECTIONS[slot][0] if slot >= 0 else None
+
+    def route(self, start):
+        """Path from start to the goal by following next hops; [] if unreachable."""
+        graph = self.graph
+        v = graph.index(int(start[0]), int(start[1]))
+        if self._dist[v] < 0 or not graph.allow[self.goal]:
+            return []
+        nxt, cells = self._next, graph.cells
+        path = [cells[v]]
+        while v != self.goal:
+            v = int(nxt[v])
+            path.append(cells[v])
+        return path
+
+    # --- computation ---
+    def _wave(self, frontier):
+        """Reverse BFS from `frontier` (nodes with final distances) into unreached nodes."""
+        _, pred = _tables(self.graph)
+        dist = self._dist
+        while frontier.size:
+            d = dist[frontier[0]] + 1
+            cand = pred[frontier].ravel()
+            cand = cand[cand >= 0]
+            cand = np.unique(cand[dist[cand] == UNREACHABLE])
+            dist[cand] = d
+            frontier = cand
+
+    def _update_next(self, nodes):
+        """Pick, for each node, the first successor (N, W, E, S order) one step closer to the goal."""
+        succ, _ = _tables(self.graph)
+        rows = succ[nodes]
+        dist = self._dist
+        sd = np.where(rows >= 0, dist[np.maximum(rows, 0)], UNREACHABLE)
+        want = dist[nodes][:, None] - 1
+        ok = (rows >= 0) & (sd == want) & (want >= 0)
+        has = ok.any(axis=1)
+        slot = np.where(has, ok.argmax(axis=1), -1).astype(np.int8)
+        self._slot[nodes] = slot
+        self._next[nodes] = np.where(has, rows[np.arange(len(nodes)), np.maximum(slot, 0)], -1)
+
+    def compute(self):
+        self._dist.fill(UNREACHABLE)
+        if self.graph.allow[self.goal]:
+            self._dist[self.goal] = 0
+            # BFS levels: every frontier node shares one distance
+            self._wave(np.array([self.goal], dtype=np.int32))
+        self._update_next(np.arange(self.graph.size, dtype=np.int32))
+
+    def refresh(self, affected):
+        """Repair the field after the lane rows of `affected` nodes were rebuilt."""
+        graph = self.graph
+        if not graph.allow[self.goal]:
+            self.compute()
+            return
+        succ, pred = _tables(graph)
+        dist, nxt = self._dist, self._next
+        affected = np.fromiter(affected, dtype=np.int32)
+
+        # 1. region whose route to the goal ran through an affected node (subtrees of the next-hop tree)
+        region = np.zeros(graph.size, dtype=bool)
+        frontier = affected[dist[affected] > 0]
+        region[frontier] = True
+        while frontier.size:
+            cand = pred[frontier].ravel()
+            cand = cand[cand >= 0]
+            cand = np.unique(cand[~region[cand] & (dist[cand] > 0)])
+            cand = cand[np.isin(nxt[cand], frontier)]
+            region[cand] = True
+            frontier = cand
+        nodes = np.flatnonzero(region).astype(np.int32)
+        dist[nodes] = UNREACHABLE
+
+        # 2. relax the region from its (fixed) surroundings until nothing improves
+        if nodes.size:
+            rows = succ[nodes]
+            while True:
+                sd = np.where(rows >= 0, dist[np.maximum(rows, 0)], UNREACHABLE)
+                cand = np.where(sd >= 0, sd + 1, _BIG).min(axis=1)
+                cur = np.where(dist[nodes] >= 0, dist[nodes], _BIG)
+                better = cand < cur
+                if not better.any():
+                    break
+                dist[nodes[better]] = cand[better]
+
+        # 3. new moves can bring other nodes closer: decrease wave through predecessors
+        changed = np.union1d(nodes, affected)
+        frontier = changed[dist[changed] >= 0]
+        while frontier.size:
+            p = pred[frontier]
+            dp = np.repeat(dist[frontier] + 1, STRIDE)
+            p = p.ravel()
+            keep = p >= 0
+            p, dp = p[keep], dp[keep]
+            improve = (dist[p] < 0) | (dp < dist[p])
+            p, dp = p[improve], dp[improve]
+            if not p.size:
+                break
+            # several frontier nodes may reach the same predecessor: keep the smallest
+            order = np.lexsort((dp, p))
+            p, dp = p[order], dp[order]
+            first = np.ones(p.size, dtype=bool)
+            first[1:] = p[1:] != p[:-1]
+            p, dp = p[first], dp[first]
+            dist[p] = dp
+            changed = np.union1d(changed, p)
+            frontier = p
+
+        # 4. next hops of changed nodes and of their predecessors (their best successor may differ now)
+        around = pred[changed].ravel()
+        self._update_next(np.union1d(changed, around[around >= 0]).astype(np.int32))
+
+
+class DistanceFieldCache:
+    """One DistanceField per goal (LRU-bounded), kept in sync with LaneGraph edits."""
+    def __init__(self, lane_graph, max_fields=32):
+        self.graph = lane_graph
+        self.max_fields = max_fields
+        self._fields = OrderedDict()
+        lane_graph.subscribe(self._on_lane_change)
+
+    def __len__(self):
+        return len(self._fields)
+
+    def field(self, goal):
+        key = (int(goal[0]), int(goal[1]))
+        f = self._fields.get(key)
+        if f is None:
+            f = DistanceField(self.graph, key)
+            self._fields[key] = f
+            while len(self._fields) > self.max_fields:
+                self._fields.popitem(last=False)
+        else:
+            self._fields.move_to_end(key)
+        return f
+
+    def route(self, start, goal):
+        return self.field(goal).route(start)
+
+    def _on_lane_change(self, affected):
+        for f in self._fields.values():
+            f.refresh(affected)
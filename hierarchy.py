@@ -0,0 +1,227 @@
+"""
+Intersection-level abstraction of the lane graph for hierarchical pathfinding.
+
+Receives: a LaneGraph (lanegraph.py).
+Outputs:  CorridorGraph.route(start, goal) -> list of (row, col) cells, the same
+          kind of path Agent.move() expects; None when start/goal are not covered
+          by the abstraction (the caller then falls back to a flat search).
+map.py / search.py: World builds one CorridorGraph next to its LaneGraph; it
+          subscribes to LaneGraph.update_cells() so obstacle edits only re-walk the
+          corridors around the edited cells. SearchEngine.hierarchical() uses it.
+
+Decision points ("junctions") are intersections (Road.direction is None), cells
+where lanes merge or split, dead ends and crosswalk entry cells. Every maximal
+run of single-successor / single-predecessor lane cells between two junctions is
+collapsed into one edge weighted by its number of moves, so A* on the abstract
+graph pops a handful of junctions instead of every cell along the lanes.
+"""
+import heapq
+from lanegraph import STRIDE, ALL_DIRS, DIR_BITS
+
+CROSSWALK_MASKS = (DIR_BITS['E'] | DIR_BITS['W'], DIR_BITS['N'] | DIR_BITS['S'])
+
+# sentinel abstract node for "goal reached through the corridor that contains it"
+_GOAL = -1
+
+
+class CorridorGraph:
+    def __init__(self, lane_graph):
+        self.lane = lane_graph
+        n = lane_graph.size
+        self.is_junction = bytearray(n)
+        # edge id -> (from junction, to junction, interior cells as node ints)
+        self.edges = {}
+        self.out_edges = {}
+        self.in_edges = {}
+        # interior node -> (edge id, offset inside the edge's cells)
+        self.corridor_of = {}
+        self._next_id = 0
+        # abstract nodes popped by the latest route() call
+        self.expanded = 0
+
+        self.rebuild()
+        lane_graph.subscribe(self.on_lane_change)
+
+    # --- building ---
+    def _junction_test(self, i):
+        g = self.lane
+        mask = g.allow[i]
+        if mask == 0:
+            return False
+        if mask == ALL_DIRS:
+            return True
+        if g.succ_deg[i] != 1 or g.pred_deg[i] != 1:
+            return True
+        # crosswalk entry: a crosswalk cell entered from a non-crosswalk cell
+        if mask in CROSSWALK_MASKS and g.allow[g.pred[i * STRIDE]] not in CROSSWALK_MASKS:
+            return True
+        return False
+
+    def _add_edge(self, u, v, cells):
+        eid = self._next_id
+        self._next_id += 1
+        self.edges[eid] = (u, v, cells)
+        self.out_edges.setdefault(u, []).append(eid)
+        self.in_edges.setdefault(v, set()).add(eid)
+        for off, c in enumerate(cells):
+            self.corridor_of[c] = (eid, off)
+
+    def _drop_edge(self, eid):
+        u, v, cells = self.edges.pop(eid)
+        out = self.out_edges.get(u)
+        if out and eid in out:
+            out.remove(eid)
+        ins = self.in_edges.get(v)
+        if ins:
+            ins.discard(eid)
+        for c in cells:
+            info = self.corridor_of.get(c)
+            if info is not None and info[0] == eid:
+                del self.corridor_of[c]
+
+    def _walk_from(self, u):
+        """Follow every lane leaving junction u up to the next junction."""
+        g = self.lane
+        succ, is_junction = g.succ, self.is_junction
+        base = u * STRIDE
+        for k in range(base, base + g.succ_deg[u]):
+            cur = succ[k]
+            cells = []
+            # interior cells have exactly one successor; the guard only protects against bad input
+            while not is_junction[cur] and len(cells) < g.size:
+                cells.append(cur)
+                cur = succ[cur * STRIDE]
+            self._add_edge(u, cur, tuple(cells))
+
+    def rebuild(self):
+        self.edges.clear()
+        self.out_edges.clear()
+        self.in_edges.clear()
+        self.corridor_of.clear()
+        for i in range(self.lane.size):
+            self.is_junction[i] = self._junction_test(i)
+        for i in range(self.lane.size):
+            if self.is_junction[i]:
+                self._walk_from(i)
+
+    def on_lane_change(self, affected):
+        """Re-walk only the corridors that start at, end at or pass through affected nodes."""
+        edges = self.edges
+        redo = set()
+        for n in affected:
+            info = self.corridor_of.get(n)
+            if info is not None:
+                redo.add(edges[info[0]][0])
+            if self.is_junction[n]:
+                redo.add(n)
+                for eid in self.in_edges.get(n, ()):
+                    redo.add(edges[eid][0])
+        for n in affected:
+            self.is_junction[n] = self._junction_test(n)
+            if self.is_junction[n]:
+                redo.add(n)
+        for u in redo:
+            for eid in list(self.out_edges.get(u, ())):
+                self._drop_edge(eid)
+        for u in redo:
+            if self.is_junction[u]:
+                self._walk_from(u)
+
+    # --- queries ---
+    def junction_count(self):
+        return sum(self.is_junction)
+
+    def _expand(self, parent, node, start_prefix, goal_edge_cells):
+        """Turn the abstract parent chain into the flat node list from start to goal."""
+        chain = []
+        while node in parent:
+            prev, eid = parent[node]
+            chain.append((prev, node, eid))
+            node = prev
+        chain.reverse()
+        out = list(start_prefix)
+        for prev, node, eid in chain:
+            if node == _GOAL:
+                out.extend(goal_edge_cells)
+            else:
+                out.extend(self.edges[eid][2])
+                out.append(node)
+        return out
+
+    def route(self, start, goal, result=None):
+        """
+        A* over junctions, then expansion to cells. Path costs equal flat BFS / A* costs.
+        If `result` (search.SearchResult) is given, popped junctions are appended to its trace.
+        """
+        g = self.lane
+        w = g.width
+        if not (g.is_passable(start[0], start[1]) and g.is_passable(goal[0], goal[1])):
+            return []
+        s = start[0] * w + start[1]
+        t = goal[0] * w + goal[1]
+        cells = g.cells
+        self.expanded = 0
+        if s == t:
+            return [cells[s]]
+
+        # attach goal
+        goal_edge = None
+        goal_cells = ()
+        if not self.is_junction[t]:
+            info = self.corridor_of.get(t)
+            if info is None:
+                return None
+            goal_edge, goal_off = info
+            goal_cells = self.edges[goal_edge][2][:goal_off + 1]
+
+        # attach start
+        if self.is_junction[s]:
+            source, g0, prefix = s, 0, (s,)
+        else:
+            info = self.corridor_of.get(s)
+            if info is None:
+                return None
+            eid, off = info
+            u, v, ecells = self.edges[eid]
+            if eid == goal_edge and off < goal_off:
+                return [cells[i] for i in ecells[off:goal_off + 1]]
+            source, g0, prefix = v, len(ecells) - off, ecells[off:] + (v,)
+
+        gr, gc = goal
+        def h(i):
+            return abs(i // w - gr) + abs(i % w - gc)
+
+        gscore = {source: g0}
+        parent = {}
+        closed = set()
+        open_heap = [(g0 + h(source), g0, source)]
+        while open_heap:
+            _, gcur, node = heapq.heappop(open_heap)
+            if node in closed:
+                continue
+            closed.add(node)
+            self.expanded += 1
+            if result is not None and node != _GOAL:
+                p = parent.get(node)
+                result.record(node, p[0] if p else -1)
+
+            if node == t or node == _GOAL:
+                flat = self._expand(parent, node, prefix, goal_cells)
+                return [cells[i] for i in flat]
+
+            for eid in self.out_edges.get(node, ()):
+                u, v, ecells = self.edges[eid]
+                if eid == goal_edge:
+                    cand = gcur + len(goal_cells)
+                    if cand < gscore.get(_GOAL, float('inf')):
+                        gscore[_GOAL] = cand
+                        parent[_GOAL] = (node, eid)
+                        heapq.heappush(open_heap, (cand, cand, _GOAL))
+                if v in closed:
+                    continue
+                cand = gcur + len(ecells) + 1
+                if cand < gscore.get(v, float('inf')):
+                    gscore[v] = cand
+                    parent[v] = (node, eid)
+                    heapq.heappush(open_heap, (cand + h(v), cand, v))
+        return []
@@ -26,7 +26,7 @@ VIVID_RED = (220, 20, 60)     # CANCEL butonu için parlak kırmızı
 
 class UIState:
     def __init__(self):
-        self.algo_list = ["BFS", "DFS", "A*", "Greedy"]
+        self.algo_list = ["BFS", "DFS", "A*", "Anytime A*", "Greedy"]
         self.current_algo_index = 0
         self.selected_algorithm = self.algo_list[self.current_algo_index]
         
@@ -35,6 +35,11 @@ class UIState:
         self.path_cost = 0
         self.visited_count = 0
         self.is_running = False
+        # Arama / yeniden planlama sürüyor mu (arka plan planlayıcısı veya adım adım arama)
+        self.is_planning = False
+        # Anytime A*: son yolun kanıtlanmış üst sınırı (maliyet / optimum) ve geçen süre (ms)
+        self.search_bound = None
+        self.search_elapsed_ms = None
         self.path_found = None 
         self.mode = 'VIEW' 
         self.traffic_light_info = None
@@ -160,11 +165,12 @@ class Interface:
         self.x_offset = screen_width
         self.state = UIState()
         
-        self.font_header = pygame.font.SysFont("Arial", 20, bold=True)
-        self.font_btn = pygame.font.SysFont("Arial", 14, bold=True)
-        self.font_log = pygame.font.SysFont("Consolas", 12)
-        self.font_label = pygame.font.SysFont("Arial", 11)
-        self.font_cam = pygame.font.SysFont("Consolas", 12, bold=True)
+        # Fontlar ilk draw() çağrısında yüklenir: panel durumu fontsuz (başsız) da kullanılabilir
+        self.font_header = None
+        self.font_btn = None
+        self.font_log = None
+        self.font_label = None
+        self.font_cam = None
 
         # Buton Listeleri
         self.static_buttons = []
@@ -248,7 +254,16 @@ class Interface:
             self.state.status_message = "Mode: Remove Obstacles"
         return code
 
-    def draw(self, screen, agent=None):
+    def _load_fonts(self):
+        self.font_header = pygame.font.SysFont("Arial", 20, bold=True)
+        self.font_btn = pygame.font.SysFont("Arial", 14, bold=True)
+        self.font_log = pygame.font.SysFont("Consolas", 12)
+        self.font_label = pygame.font.SysFont("Arial", 11)
+        self.font_cam = pygame.font.SysFont("Consolas", 12, bold=True)
+
+    def draw(self, screen, agent=None, camera=None):
+        if self.font_header is None:
+            self._load_fonts()
         # 1. Arka Plan
         panel_rect = pygame.Rect(self.x_offset, 0, self.width, self.height)
         pygame.draw.rect(screen, BG_MAIN, panel_rect)
@@ -289,22 +304,26 @@ class Interface:
             self.btn_cancel.draw_special(screen, self.font_btn, VIVID_RED, icon_type="CROSS")
         else:
             # Normal durum: Başlat butonu
+            # Planlama sürerken butonda animasyonlu "PLANNING..." yazısı
+            label = self.btn_start.text
+            if self.state.is_planning:
+                label = "PLANNING" + "." * ((pygame.time.get_ticks() // 400) % 4)
             if self.btn_start.is_hovered:
-                self.btn_start.draw(screen, self.font_btn, ACCENT_GREEN)
+                self.btn_start.draw(screen, self.font_btn, ACCENT_GREEN, override_text=label)
             else:
                 # Özel Başlat Görünümü
                 shadow = self.btn_start.rect.copy(); shadow.x+=2; shadow.y+=3
                 pygame.draw.rect(screen, BTN_SHADOW, shadow, border_radius=6)
                 pygame.draw.rect(screen, (30, 100, 60), self.btn_start.rect, border_radius=6)
                 pygame.draw.rect(screen, ACCENT_GREEN, self.btn_start.rect, 2, border_radius=6)
-                txt = self.font_btn.render(self.btn_start.text, True, (255,255,255))
+                txt = self.font_btn.render(label, True, (255,255,255))
                 screen.blit(txt, txt.get_rect(center=self.btn_start.rect.center))
 
         # 5. Takip Kamerası
         cam_y = self.last_button_y + 25
-        self._draw_tracking_camera(screen, agent, cam_y)
+        self._draw_tracking_camera(screen, agent, cam_y, camera)
 
-    def _draw_tracking_camera(self, screen, agent, start_y):
+    def _draw_tracking_camera(self, screen, agent, start_y, camera=None):
         available_height = self.height - start_y - 20
         cam_h = max(150, available_height)
         cam_w = self.width - 40
@@ -319,6 +338,9 @@ class Interface:
             crop_h = int(cam_h / zoom_factor)
             
             ax, ay = agent.rect.centerx, agent.rect.centery
+            # Harita kamerası kaydırılmış/yakınlaştırılmışsa ajanın ekrandaki konumu
+            if camera is not None:
+                ax, ay = (int(v) for v in camera.to_screen((ax, ay)))
             crop_x = ax - crop_w // 2
             crop_y = ay - crop_h // 2
             
@@ -356,9 +378,16 @@ class Interface:
         pygame.draw.rect(screen, BG_CARD, card_rect, border_radius=10)
         pygame.draw.rect(screen, (60, 65, 75), card_rect, 1, border_radius=10)
 
+        # Anytime A* sonucu varsa algoritma satırında sınır ve süreyi göster
+        algo_text = self.state.selected_algorithm
+        if self.state.search_bound is not None:
+            algo_text += f" <={self.state.search_bound:.2f}x"
+            if self.state.search_elapsed_ms is not None:
+                algo_text += f" {self.state.search_elapsed_ms:.0f}ms"
+
         infos = [
             ("STATUS", self.state.status_message),
-            ("ALGORITHM", self.state.selected_algorithm),
+            ("ALGORITHM", algo_text),
             ("POSITION", str(self.state.agent_pos)),
             ("COST", str(self.state.path_cost))
         ]
@@ -390,6 +419,7 @@ class Interface:
             if "No Path" in str(val): val_col = ACCENT_RED
             if "Frozen" in str(val): val_col = ACCENT_CYAN
             if "Waiting" in str(val) or "Approve?" in str(val): val_col = ACCENT_YELLOW
+            if "Planning" in str(val): val_col = ACCENT_CYAN
             
             val_str = str(val)
             # Allow longer visible text before truncating
@@ -0,0 +1,114 @@
+"""
+Landmark (ALT) heuristic for A* and Greedy Best-First.
+
+Receives: a LaneGraph (lanegraph.py) and the number of landmarks to pick.
+Outputs:  LandmarkHeuristic(a, b) -> admissible, consistent lower bound on the number of
+          lane moves from cell a to cell b; a drop-in replacement for manhattan(a, b).
+main.py / algorithm.py: main.py builds one per World and hands it to the A* and Greedy
+          visualizers (SearchEngine(world, heuristic=...)).
+
+For every landmark L the exact directed distances d(L, v) and d(v, L) are stored as
+compact int arrays (one BFS over successors, one over predecessors). The triangle
+inequality on the directed lane graph then gives
+    d(v, t) >= d(L, t) - d(L, v)    and    d(v, t) >= d(v, L) - d(t, L),
+which sees the long one-way detours that Manhattan distance ignores. The tables are
+recomputed lazily after the lane graph changes, since edits invalidate the bounds.
+"""
+from array import array
+from collections import deque
+from lanegraph import STRIDE
+
+UNREACHABLE = 1 << 30
+
+
+class LandmarkHeuristic:
+    def __init__(self, lane_graph, count=8):
+        self.graph = lane_graph
+        self.count = count
+        self.landmarks = []
+        # from_lm[k][v] = d(L_k, v), to_lm[k][v] = d(v, L_k)
+        self.from_lm = []
+        self.to_lm = []
+        self._dirty = True
+        # goal-side terms of the last goal, reused for every call of a query
+        self._goal = None
+        self._goal_terms = ()
+        lane_graph.subscribe(self._on_lane_change)
+
+    def _on_lane_change(self, affected):
+        self._dirty = True
+
+    # --- precomputation ---
+    def _bfs(self, source, rows, degs):
+        dist = array('i', [UNREACHABLE]) * self.graph.size
+        dist[source] = 0
+        q = deque([source])
+        while q:
+            u = q.popleft()
+            du = dist[u] + 1
+            base = u * STRIDE
+            for k in range(base, base + degs[u]):
+                v = rows[k]
+                if dist[v] == UNREACHABLE:
+                    dist[v] = du
+                    q.append(v)
+        return dist
+
+    def _select_landmarks(self):
+        """Farthest-point selection: each new landmark maximises the distance to the chosen ones."""
+        g = self.graph
+        passable = [i for i in range(g.size) if g.allow[i]]
+        if not passable:
+            return []
+        chosen = []
+        # seed with the cell farthest from an arbitrary road cell
+        d = self._bfs(passable[0], g.succ, g.succ_deg)
+        closest = array('i', [UNREACHABLE]) * g.size
+        seed = max(passable, key=lambda i: d[i] if d[i] != UNREACHABLE else -1)
+        while len(chosen) < min(self.count, len(passable)):
+            lm = seed
+            chosen.append(lm)
+            d = self._bfs(lm, g.succ, g.succ_deg)
+            for i in passable:
+                if d[i] < closest[i]:
+                    closest[i] = d[i]
+            # next landmark: the cell hardest to reach from every chosen landmark
+            seed = max(passable, key=lambda i: closest[i])
+            if closest[seed] == 0:
+                break
+        return chosen
+
+    def refresh(self):
+        g = self.graph
+        self.landmarks = self._select_landmarks()
+        self.from_lm = [self._bfs(lm, g.succ, g.succ_deg) for lm in self.landmarks]
+        self.to_lm = [self._bfs(lm, g.pred, g.pred_deg) for lm in self.landmarks]
+        self._goal = None
+        self._dirty = False
+
+    # --- heuristic ---
+    def _terms_for_goal(self, t):
+        terms = []
+        for fl, tl in zip(self.from_lm, self.to_lm):
+            terms.append((fl, fl[t], tl, tl[t]))
+        return tuple(terms)
+
+    def __call__(self, a, b):
+        if self._dirty:
+            self.refresh()
+        w = self.graph.width
+        t = b[0] * w + b[1]
+        if t != self._goal:
+            self._goal = t
+            self._goal_terms = self._terms_for_goal(t)
+        v = a[0] * w + a[1]
+
+        best = abs(a[0] - b[0]) + abs(a[1] - b[1])
+        for fl, d_lt, tl, d_tl in self._goal_terms:
+            d_lv = fl[v]
+            if d_lt != UNREACHABLE and d_lv != UNREACHABLE and d_lt - d_lv > best:
+                best = d_lt - d_lv
+            d_vl = tl[v]
+            if d_vl != UNREACHABLE and d_tl != UNREACHABLE and d_vl - d_tl > best:
+                best = d_vl - d_tl
+        return best
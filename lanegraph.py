@@ -0,0 +1,228 @@
+"""
+Precompiled directed lane graph of a World.
+
+Receives: a World (map.py); cells are (row, col), nodes are flat ints r * width + c.
+Outputs:  CSR-style integer arrays of successors / predecessors with a fixed row
+          stride of 4 (a cell has at most 4 neighbours), so one cell's row can be
+          rewritten in place when the map is edited.
+main.py / search.py / car.py: World builds one graph at creation, SearchEngine and the
+car AI read it, World.set_tiles() calls update_cells() for every map edit. update_cells()
+rewrites the arrays (and runs its listeners) under `lock`; a thread that reads the graph
+while another edits it (planner.PlannerService) holds the same lock around its reads.
+
+Movement rules are the ones SearchVisualizer used to evaluate on every query:
+  - only Road and Crosswalk tiles are passable,
+  - a Road with a lane direction only allows moving in that direction,
+  - a Road with direction None (intersection) allows every direction,
+  - a Crosswalk only allows moving along its orientation,
+  - a move a -> b in direction d needs both tiles to allow d.
+"""
+import threading
+from array import array
+
+# same order SearchEngine.neighbors used (N, W, E, S) so search results do not change;
+# slot k of a row moves in direction DIRECTIONS[k] whose bit is 1 << k
+DIRECTIONS = (('N', -1, 0), ('W', 0, -1), ('E', 0, 1), ('S', 1, 0))
+DIR_BITS = {'N': 1, 'W': 2, 'E': 4, 'S': 8}
+# direction bit of the move j -> i when j sits in slot k of i (N<->S, W<->E)
+_OPPOSITE_BIT = (DIR_BITS['S'], DIR_BITS['E'], DIR_BITS['W'], DIR_BITS['N'])
+ALL_DIRS = 1 | 2 | 4 | 8
+
+STRIDE = 4
+
+
+def tile_allow_mask(tile):
+    """Bitmask of directions a tile lets traffic move in (0 = impassable)."""
+    kind = getattr(tile, 'type', None)
+    if kind == 'Road':
+        direction = tile.direction
+        return ALL_DIRS if direction is None else DIR_BITS.get(direction, 0)
+    if kind == 'Crosswalk':
+        if getattr(tile, 'orientation', 'horizontal') == 'horizontal':
+            return DIR_BITS['E'] | DIR_BITS['W']
+        return DIR_BITS['N'] | DIR_BITS['S']
+    return 0
+
+
+class LaneGraph:
+    def __init__(self, world):
+        self.world = world
+        self._allocate(world.grid_width, world.grid_height)
+        self.rebuild()
+
+    def _allocate(self, width, height):
+        self.width = width
+        self.height = height
+        self.size = self.width * self.height
+
+        n = self.size
+        # per-cell direction mask derived from the tile
+        self.allow = bytearray(n)
+        # successors / predecessors: row i lives in [i * STRIDE, i * STRIDE + deg[i])
+        self.succ = array('i', [-1]) * (n * STRIDE)
+        self.succ_deg = bytearray(n)
+        self.pred = array('i', [-1]) * (n * STRIDE)
+        self.pred_deg = bytearray(n)
+        # shared (row, col) tuples so callers never allocate while walking the graph
+        self.cells = [(i // self.width, i % self.width) for i in range(n)]
+
+        # neighbour index per (node, direction slot), -1 outside the grid
+        self._nb = array('i', [-1]) * (n * STRIDE)
+        for i in range(n):
+            r, c = self.cells[i]
+            for k, (_, dr, dc) in enumerate(DIRECTIONS):
+                nr, nc = r + dr, c + dc
+                if 0 <= nr < self.height and 0 <= nc < self.width:
+                    self._nb[i * STRIDE + k] = nr * self.width + nc
+
+        # callbacks(affected_nodes) run after update_cells() (e.g. the corridor abstraction)
+        self._listeners = []
+        # held while update_cells() rewrites rows and notifies; reentrant so listeners can read
+        self.lock = threading.RLock()
+        # bumped by every update_cells(); last_update_added_edges tells listeners whether
+        # the latest update created new moves (cached routes may then no longer be optimal)
+        self.version = 0
+        self.last_update_added_edges = False
+
+    # --- serialization ---
+    def snapshot(self):
+        """Compact bytes copy of the compiled arrays (no World / pygame objects)."""
+        header = array('i', [self.width, self.height, self.version]).tobytes()
+        return b''.join((header, bytes(self.allow), self.succ.tobytes(), bytes(self.succ_deg),
+                         self.pred.tobytes(), bytes(self.pred_deg)))
+
+    @classmethod
+    def from_snapshot(cls, data):
+        """Read-only graph rebuilt from snapshot() bytes; it has no World, so update_cells() is unavailable."""
+        header = array('i')
+        header.frombytes(data[:header.itemsize * 3])
+        width, height, version = header
+        graph = cls.__new__(cls)
+        graph.world = None
+        graph._allocate(width, height)
+        graph.version = version
+
+        n = graph.size
+        rows = n * STRIDE * graph.succ.itemsize
+        pos = header.itemsize * 3
+        graph.allow[:] = data[pos:pos + n]
+        pos += n
+        graph.succ = array('i')
+        graph.succ.frombytes(data[pos:pos + rows])
+        pos += rows
+        graph.succ_deg[:] = data[pos:pos + n]
+        pos += n
+        graph.pred = array('i')
+        graph.pred.frombytes(data[pos:pos + rows])
+        pos += rows
+        graph.pred_deg[:] = data[pos:pos + n]
+        return graph
+
+    def subscribe(self, callback):
+        """Call callback(affected_nodes) every time update_cells() rebuilds rows."""
+        self._listeners.append(callback)
+
+    def unsubscribe(self, callback):
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    # --- lookups ---
+    def index(self, r, c):
+        return r * self.width + c
+
+    def in_bounds(self, r, c):
+        return 0 <= r < self.height and 0 <= c < self.width
+
+    def is_passable(self, r, c):
+        if not (0 <= r < self.height and 0 <= c < self.width):
+            return False
+        return self.allow[r * self.width + c] != 0
+
+    def successors(self, i):
+        base = i * STRIDE
+        return self.succ[base:base + self.succ_deg[i]]
+
+    def predecessors(self, i):
+        base = i * STRIDE
+        return self.pred[base:base + self.pred_deg[i]]
+
+    def has_edge(self, a, b):
+        base = a * STRIDE
+        return b in self.succ[base:base + self.succ_deg[a]]
+
+    def edge_count(self):
+        return sum(self.succ_deg)
+
+    # --- building ---
+    def _refresh_allow(self, nodes):
+        grid = self.world.grid
+        w = self.width
+        for i in nodes:
+            self.allow[i] = tile_allow_mask(grid[i // w][i % w])
+
+    def _build_rows(self, nodes):
+        allow, nb = self.allow, self._nb
+        succ, succ_deg = self.succ, self.succ_deg
+        pred, pred_deg = self.pred, self.pred_deg
+        for i in nodes:
+            base = i * STRIDE
+            a_i = allow[i]
+            ns = 0
+            np_ = 0
+            for k in range(STRIDE):
+                j = nb[base + k]
+                if j < 0:
+                    continue
+                if a_i & allow[j] & (1 << k):
+                    # i -> j moving in direction k
+                    succ[base + ns] = j
+                    ns += 1
+                # j -> i moves in the opposite direction of slot k
+                opp = _OPPOSITE_BIT[k]
+                if a_i & allow[j] & opp:
+                    pred[base + np_] = j
+                    np_ += 1
+            for k in range(ns, STRIDE):
+                succ[base + k] = -1
+            for k in range(np_, STRIDE):
+                pred[base + k] = -1
+            succ_deg[i] = ns
+            pred_deg[i] = np_
+
+    def rebuild(self):
+        """Compile the whole grid (done once when the World is created)."""
+        nodes = range(self.size)
+        self._refresh_allow(nodes)
+        self._build_rows(nodes)
+
+    def update_cells(self, cells):
+        """
+        Recompile only what the edited cells touch: their own rows and the rows of their
+        4-neighbours (whose edges into / out of the edited cells may have changed).
+        Returns the set of node indices whose rows were rebuilt.
+        """
+        w = self.width
+        touched = set()
+        for r, c in cells:
+            if 0 <= r < self.height and 0 <= c < w:
+                touched.add(r * w + c)
+        if not touched:
+            return set()
+        with self.lock:
+            self._refresh_allow(touched)
+
+            affected = set(touched)
+            nb = self._nb
+            for i in touched:
+                base = i * STRIDE
+                for k in range(STRIDE):
+                    j = nb[base + k]
+                    if j >= 0:
+                        affected.add(j)
+            old_rows = {i: set(self.successors(i)) for i in affected}
+            self._build_rows(affected)
+            self.last_update_added_edges = any(not set(self.successors(i)) <= old_rows[i] for i in affected)
+            self.version += 1
+            for callback in list(self._listeners):
+                callback(affected)
+        return affected
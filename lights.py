@@ -0,0 +1,88 @@
+"""
+Traffic light registry: every light's state, timer and durations as parallel NumPy arrays.
+
+Receives: TrafficLight tiles (map.py) registered by the World with their (row, col) cell.
+Outputs:  tick() advances every light in one vectorized step and returns the indices of
+          the lights that changed state; changed / changed_cells() expose the same list
+          until the next tick.
+main.py: nothing to call directly - World.update() ticks the registry once per frame,
+          World.draw() repaints only the changed lights and PedestrianManager re-evaluates
+          only the crossings whose light changed.
+
+A registered TrafficLight keeps no state of its own: its state, timer and state_duration
+read and write this registry (see TrafficLight in map.py). Lights are never deleted, only
+deactivated when an edit replaces their tile, so indices stay stable.
+"""
+import numpy as np
+
+# cycle order: red -> green -> yellow -> red
+STATES = ('red', 'green', 'yellow')
+STATE_CODES = {name: code for code, name in enumerate(STATES)}
+_NEXT = np.array([1, 2, 0], dtype=np.int8)
+
+
+class LightRegistry:
+    def __init__(self, capacity=64):
+        self.count = 0
+        # (row, col) and TrafficLight object per index
+        self.positions = []
+        self.lights = []
+        self.index_at = {}
+        self.state = np.zeros(capacity, dtype=np.int8)
+        self.timer = np.zeros(capacity, dtype=np.int32)
+        # frames per state, columns in STATES order
+        self.duration = np.zeros((capacity, len(STATES)), dtype=np.int32)
+        self.active = np.zeros(capacity, dtype=bool)
+        # light indices that changed state in the latest tick()
+        self.changed = []
+
+    def __len__(self):
+        return self.count
+
+    def _grow(self):
+        cap = max(1, 2 * len(self.state))
+        for name in ('state', 'timer', 'duration', 'active'):
+            old = getattr(self, name)
+            new = np.zeros((cap,) + old.shape[1:], dtype=old.dtype)
+            new[:len(old)] = old
+            setattr(self, name, new)
+
+    def add(self, light, r, c, state, timer, durations):
+        """Register a light at (r, c); returns its index."""
+        if self.count == len(self.state):
+            self._grow()
+        i = self.count
+        self.count += 1
+        self.positions.append((r, c))
+        self.lights.append(light)
+        self.index_at[(r, c)] = i
+        self.state[i] = STATE_CODES[state]
+        self.timer[i] = timer
+        self.duration[i] = [durations[name] for name in STATES]
+        self.active[i] = True
+        return i
+
+    def deactivate(self, i):
+        """Stop ticking light i (its tile was replaced)."""
+        self.active[i] = False
+        if self.index_at.get(self.positions[i]) == i:
+            del self.index_at[self.positions[i]]
+
+    def tick(self):
+        """Advance every active light by one frame; returns the indices that changed state."""
+        n = self.count
+        state, timer, active = self.state[:n], self.timer[:n], self.active[:n]
+        timer += active
+        expired = np.flatnonzero(active & (timer >= self.duration[np.arange(n), state]))
+        if len(expired):
+            state[expired] = _NEXT[state[expired]]
+            timer[expired] = 0
+        self.changed = expired.tolist()
+        return self.changed
+
+    def changed_cells(self):
+        """(row, col) cells of the lights that changed state in the latest tick()."""
+        return [self.positions[i] for i in self.changed]
+
+    def get_state(self, i):
+        return STATES[self.state[i]]
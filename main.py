@@ -1,8 +1,15 @@
 import pygame
+import os
 import sys
-import random
 import map
 import algorithm
+import planner
+import landmarks
+import routecache
+import cooperative
+import mapfile
+import backend
+from camera import Camera
 from car import Car
 from agent import Agent
 from pedestrian import PedestrianManager
@@ -12,8 +19,37 @@ from interface import Interface, PANEL_WIDTH
 TOTAL_WIDTH = map.SCREEN_WIDTH + PANEL_WIDTH
 TOTAL_HEIGHT = map.SCREEN_HEIGHT
 
+# Kare başına arama bütçesi: arama ana döngü içinde adım adım ilerler, trafik akmaya devam eder.
+# En fazla bu kadar düğüm / milisaniye; None = sınır yok (arama tek karede biter)
+SEARCH_NODES_PER_FRAME = 30
+SEARCH_MS_PER_FRAME = 4
+
+# True: aramalar arka plandaki planlayıcı iş parçacığında çalışır (ekran hiç takılmaz)
+# False: manuel arama ana döngüde kare bütçesiyle adım adım ilerler (keşif animasyonu)
+PLAN_IN_BACKGROUND = True
+
+# Simülasyon tohumu: harita, araçlar, yayalar ve ajanlar ayrı rastgele akışlar kullanır (rngstreams.py);
+# aynı tohum kare kare aynı simülasyonu üretir (yayalar sabit adımla ilerler). None = her sıfırlamada farklı
+SIMULATION_SEED = None
+# Harita dosyası: verilirse RESET SYSTEM her seferinde bu dosyadaki şehri yükler (yoksa ilk üretilen şehir
+# bu dosyaya kaydedilir); None = her sıfırlamada yeni şehir üretilir
+MAP_FILE = None
+
+# Anytime A*: ilk yol en fazla ANYTIME_WEIGHT kat pahalı olabilir, ardından bu süre (ms) boyunca iyileştirilir
+ANYTIME_WEIGHT = 2.0
+ANYTIME_BUDGET_MS = 50
+
+# Ortak planlanan filo: bu kadar ek ajan uzay-zaman rezervasyon tablosuyla birlikte planlanır ve
+# planın tick saatine göre sürülür (0 = kapalı). Yedek (en kısa) yollar rezerve edilir ama çakışabilir.
+FLEET_SIZE = 0
+
+# Harita kamerası: ok tuşları kare başına bu kadar piksel kaydırır, fare tekerleği her adımda bu oranda yakınlaştırır
+CAMERA_PAN_SPEED = 12
+CAMERA_ZOOM_STEP = 1.1
+
 def main():
-    pygame.init()
+    # pencereli arka uç: pygame burada başlatılır (modüller içe aktarılırken başlatmaz)
+    backend.setup()
     try:
         # Ana ekran: hem harita hem kontrol paneli tek yüzeyde
         screen = pygame.display.set_mode((TOTAL_WIDTH, TOTAL_HEIGHT))
@@ -37,6 +73,14 @@ def main():
     # Onay ve Görselleştirme Değişkenleri (YENİ)
     pending_path = None         # Onay bekleyen geçici yol
     active_visualizer = None    # Arama algoritmasının görselleştirmesini saklamak için
+    planner_service = None      # Arka plan planlayıcısı: manuel arama ve yeniden planlama istekleri (D* Lite durumu dahil)
+    landmark_h = None           # A* / Greedy için yer işareti (ALT) sezgiseli, dünya başına bir tane
+    route_cache = None          # Aynı (algoritma, başlangıç, hedef) sorguları için LRU rota önbelleği
+    search_overlay = None       # Arama izi / yol çizgileri: dünya başına bir tane, kamera görünümü boyutunda çizilir
+    fleet_planner = None        # Filo ajanları için ortak (uzay-zaman) planlayıcı
+    fleet_agents = []           # Ortak planlanan ek ajanlar (FLEET_SIZE)
+    fleet_schedule = None       # Filo ajanlarının zamanlı yollarını tick saatine göre yürütür
+    camera = None               # Haritanın görünen kısmı (kaydırma / yakınlaştırma), dünya başına bir tane
 
     def reset_simulation_state():
         """
@@ -46,9 +90,26 @@ def main():
         - Panel durumu temizlenir.
         """
         # TODO: [DEĞİŞTİRİLDİ] Yeni değişkenler (pending_path, active_visualizer) sıfırlama işlemine eklendi.
-        nonlocal world, all_vehicles, player_agent, pedestrians, destination, is_simulation_frozen, pending_path, active_visualizer
+        nonlocal world, all_vehicles, player_agent, pedestrians, destination, is_simulation_frozen, pending_path, active_visualizer, planner_service, landmark_h, route_cache, search_overlay, fleet_planner, fleet_agents, fleet_schedule, camera
         
-        world = map.World(map.GRID_WIDTH, map.GRID_HEIGHT)
+        # Eski dünyanın planlayıcı iş parçacığını kapat
+        if planner_service:
+            planner_service.shutdown()
+
+        if MAP_FILE and os.path.exists(MAP_FILE):
+            world = mapfile.load_world(MAP_FILE, seed=SIMULATION_SEED)
+        else:
+            world = map.World(map.GRID_WIDTH, map.GRID_HEIGHT, seed=SIMULATION_SEED)
+            if MAP_FILE:
+                mapfile.save_world(world, MAP_FILE)
+        camera = Camera(map.SCREEN_WIDTH, map.SCREEN_HEIGHT, world.pixel_width, world.pixel_height, map.CELL_SIZE)
+        landmark_h = landmarks.LandmarkHeuristic(world.lane_graph)
+        route_cache = routecache.RouteCache(world.lane_graph)
+        search_overlay = algorithm.SearchOverlay(map.CELL_SIZE)
+        # Planlayıcının kendi sezgisel örneği var: iş parçacıkları arasında paylaşılmaz
+        planner_service = planner.PlannerService(world, heuristic=landmarks.LandmarkHeuristic(world.lane_graph))
+        planner_service.engine.anytime_weight = ANYTIME_WEIGHT
+        planner_service.engine.anytime_budget_ms = ANYTIME_BUDGET_MS
         all_vehicles = []
         
         # Normal araçları oluştur
@@ -66,13 +127,30 @@ def main():
             
         # Oyuncu ajanını oluştur
         player_agent = Agent(world)
-        start_pos = (map.GRID_HEIGHT - 2, 2)
+        start_pos = (world.grid_height - 2, 2)
         try:
             player_agent.set_position(start_pos[0], start_pos[1])
         except:
             pass
         player_agent.stop()
         all_vehicles.append(player_agent)
+
+        # Filo ajanları: hepsi birlikte, öncelik sırasıyla planlanır ve rezervasyon tablosu paylaşılır
+        fleet_planner = cooperative.CooperativePlanner(world.lane_graph)
+        fleet_agents = []
+        fleet_schedule = cooperative.FleetSchedule(fleet_planner)
+        if FLEET_SIZE:
+            graph = world.lane_graph
+            road_cells = [graph.cells[i] for i in range(graph.size) if graph.allow[i]]
+            requests = []
+            for i in range(FLEET_SIZE):
+                fleet_agent = Agent(world)
+                fleet_agents.append(fleet_agent)
+                all_vehicles.append(fleet_agent)
+                requests.append((i, (fleet_agent.grid_y, fleet_agent.grid_x), world.random.stream('agent').choice(road_cells)))
+            for i, timed_path in fleet_planner.plan_fleet(requests).items():
+                fleet_agents[i].move(fleet_schedule.assign(i, timed_path))
+                fleet_agents[i].hold_index = fleet_schedule.hold_index(i)
         
         # Değişkenleri sıfırla
         destination = None
@@ -98,18 +176,21 @@ def main():
         Seçilen algoritma ismine göre uygun görselleştirici sınıfını döndürür.
         """
         if algo_choice == "bfs":
-            return algorithm.BFSVisualizer(world, screen, map.CELL_SIZE, clock)
+            return algorithm.BFSVisualizer(world, screen, map.CELL_SIZE, clock, cache=route_cache, overlay=search_overlay)
         elif algo_choice == "dfs":
-            return algorithm.DFSVisualizer(world, screen, map.CELL_SIZE, clock)
+            return algorithm.DFSVisualizer(world, screen, map.CELL_SIZE, clock, cache=route_cache, overlay=search_overlay)
+        elif algo_choice == "anytime a*":
+            return algorithm.AnytimeAStarVisualizer(world, screen, map.CELL_SIZE, clock, heuristic=landmark_h, cache=route_cache,
+                                                    weight=ANYTIME_WEIGHT, budget_ms=ANYTIME_BUDGET_MS, overlay=search_overlay)
         elif algo_choice == "greedy":
-             return algorithm.GreedyBestFirstVisualizer(world, screen, map.CELL_SIZE, clock) 
+             return algorithm.GreedyBestFirstVisualizer(world, screen, map.CELL_SIZE, clock, heuristic=landmark_h, cache=route_cache, overlay=search_overlay) 
         else: 
-            return algorithm.AStarVisualizer(world, screen, map.CELL_SIZE, clock)
+            return algorithm.AStarVisualizer(world, screen, map.CELL_SIZE, clock, heuristic=landmark_h, cache=route_cache, overlay=search_overlay)
 
     def run_search_algorithm():
         """
-        Ajanın mevcut konumundan hedefe yol arar.
-        Yolu hemen uygulamaz, kullanıcı onayı için bekletir.
+        Ajanın mevcut konumundan hedefe aramayı başlatır.
+        Arama ana döngüde kare kare ilerler (advance_search); bulunan yol kullanıcı onayı için bekletilir.
         """
         nonlocal pending_path, active_visualizer
         
@@ -119,29 +200,131 @@ def main():
 
         ui.state.status_message = "Searching..."
         algo_choice = ui.state.selected_algorithm.lower()
+        pending_path = None
         
         # TODO: [DEĞİŞTİRİLDİ] Gri renkli ziyaret edilen hücreleri daha sonra çizebilmek için görselleştirici örneği saklanıyor.
         active_visualizer = get_visualizer(algo_choice)
 
+        # Arama sürerken trafik akar; ajan ise aramanın başladığı hücrede bekler
+        player_agent.stop()
         start = (player_agent.grid_y, player_agent.grid_x)
+
+        if not PLAN_IN_BACKGROUND:
+            active_visualizer.begin_search(start, destination)
+            return
+
+        # Önceki manuel istek hâlâ sürüyorsa iptal et
+        planner_service.cancel('manual')
+        cached = route_cache.get(active_visualizer.algorithm, start, destination)
+        if cached is not None:
+            show_search_result(start, active_visualizer.show_result(cached))
+        else:
+            planner_service.submit('manual', active_visualizer.algorithm, start, destination)
+            ui.state.status_message = "Planning..."
+
+    def show_search_result(start, path):
+        """
+        Manuel aramanın sonucunu gösterir.
+        Yolu hemen uygulamaz, kullanıcı onayı için bekletir.
+        """
+        nonlocal pending_path, active_visualizer
+
+        # Anytime A* için sınır ve süre (diğer algoritmalarda None: kartta gösterilmez)
+        result = active_visualizer.last_result
+        ui.state.search_bound = result.bound if result else None
+        ui.state.search_elapsed_ms = result.elapsed_ms if result else None
+
+        visited_est = len(active_visualizer.visited_edges) if hasattr(active_visualizer, 'visited_edges') else 0
+        cost = len(path) if path else 0
+        
+        if path:
+            # TODO: [DEĞİŞTİRİLDİ] Hemen hareket etme. Yolu kaydet ve onay iste.
+            pending_path = path 
+            ui.state.awaiting_confirmation = True 
+            ui.state.update_log("Path Found! Approve?", start, cost, visited_est, None)
+        else:
+            ui.state.update_log("No Path Found!", start, 0, visited_est, False)
+            active_visualizer = None 
+
+    def show_replan_result(start, path, visited_est):
+        """
+        Ajanın yeniden planlama sonucunu gösterir (D* Lite).
+        """
+        nonlocal pending_path, active_visualizer
+
+        ui.state.search_bound = None
+        ui.state.search_elapsed_ms = None
+
+        if path:
+            # Alternatif bir yol bulundu: Göster ve onay bekle
+            pending_path = path 
+            ui.state.awaiting_confirmation = True 
+            ui.state.update_log("Replan Found. Approve?", start, len(path), visited_est, None)
+        else:
+            # TODO: [DEĞİŞTİRİLDİ] [DÜZELTME 2] Yol bulunamadığında oluşan sonsuz döngü düzeltildi.
+            # Ajanı durdur ve tekrar denememesi için hedefini temizle.
+            ui.state.update_log("Stuck! No Path.", start, 0, visited_est, False)
+            player_agent.stop()
+            player_agent.destination = None 
+            player_agent.awaiting_approval = False
+            player_agent.replan_needed = False
+            active_visualizer = None 
+
+    def handle_planner_results():
+        """
+        Arka plan planlayıcısından gelen bitmiş sonuçları işler (her karede bir kez).
+        """
+        nonlocal active_visualizer
+
+        for res in planner_service.poll():
+            req = res.request
+            if res.error is not None:
+                print(f"Algorithm Error: {res.error}")
+                ui.state.update_log("Algo Error", req.start, 0, 0, False)
+                if req.kind == 'replan':
+                    player_agent.stop()
+                    player_agent.awaiting_approval = False
+                else:
+                    active_visualizer = None
+            elif req.kind == 'manual' and active_visualizer:
+                show_search_result(req.start, active_visualizer.show_result(res.result))
+            elif req.kind == 'replan':
+                show_replan_result(req.start, res.path, res.visited)
+
+    def replan_fleet():
+        """
+        Engele takılan filo ajanlarını yeniden planlar (her karede bir kez).
+        Eski rezervasyonları bırakılır, yeni yol diğer ajanların rezervasyonlarının etrafından geçer.
+        """
+        for i, fleet_agent in enumerate(fleet_agents):
+            if not (fleet_agent.awaiting_approval and fleet_agent.destination):
+                continue
+            start = (fleet_agent.grid_y, fleet_agent.grid_x)
+            path = fleet_schedule.assign(i, fleet_planner.plan(i, start, fleet_agent.destination))
+            fleet_agent.awaiting_approval = False
+            fleet_agent.approve_replan(path)
+            if not path:
+                fleet_agent.destination = None
+
+    def advance_search():
+        """
+        Süren aramayı bu karenin bütçesi kadar ilerletir.
+        Arama bittiğinde yolu hemen uygulamaz, kullanıcı onayı için bekletir.
+        """
+        nonlocal pending_path, active_visualizer
+
+        start = active_visualizer.stepper.start
         try:
-            path = active_visualizer.search(start, destination, speed=0.02, auto_accept=True)
-            
-            visited_est = len(active_visualizer.visited_edges) if hasattr(active_visualizer, 'visited_edges') else 0
-            cost = len(path) if path else 0
-            
-            if path:
-                # TODO: [DEĞİŞTİRİLDİ] Hemen hareket etme. Yolu kaydet ve onay iste.
-                pending_path = path 
-                ui.state.awaiting_confirmation = True 
-                ui.state.update_log("Path Found! Approve?", start, cost, visited_est, None)
-            else:
-                ui.state.update_log("No Path Found!", start, 0, visited_est, False)
-                active_visualizer = None 
+            path = active_visualizer.advance(SEARCH_NODES_PER_FRAME, SEARCH_MS_PER_FRAME)
+            if path is None:
+                # Arama sürüyor: keşif izi overlay üzerinde büyümeye devam eder
+                return
+            show_search_result(start, path)
                 
         except Exception as e:
             print(f"Algorithm Error: {e}")
             ui.state.update_log("Algo Error", start, 0, 0, False)
+            active_visualizer = None
 
     # --- Ana Döngü ---
     running = True
@@ -162,6 +345,9 @@ def main():
                 elif action == "CMD_CONFIRM":
                     if pending_path:
                         player_agent.move(pending_path)
+
+                        # Onaylanan hedef için artımlı planlayıcının (D* Lite) durumunu arka planda hazırla
+                        planner_service.submit('prepare', 'dstar', pending_path[0], pending_path[-1])
                         ui.state.status_message = "Moving..."
                         
                         # [DÜZELTME 1] Ajanın onaylandığını bilmesini sağla. 
@@ -200,44 +386,51 @@ def main():
             
             # Sadece harita alanında (sol taraf) fare etkileşimini işle
             if mouse_pos[0] < map.SCREEN_WIDTH:
-                grid_col = mouse_pos[0] // map.CELL_SIZE
-                grid_row = mouse_pos[1] // map.CELL_SIZE
-                
+                # Ekran pikseli -> dünya pikseli / hücre (kamera kaydırması ve yakınlaştırması dahil)
+                grid_row, grid_col = camera.cell_at(mouse_pos)
+                world_pos = tuple(int(v) for v in camera.to_world(mouse_pos))
+
+                # Fare tekerleği: imlecin altındaki nokta sabit kalacak şekilde yakınlaştır
+                if event.type == pygame.MOUSEWHEEL:
+                    camera.zoom_at(CAMERA_ZOOM_STEP ** event.y, mouse_pos)
+
                 # Sol Tıklama
                 if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
                     agent_rect = player_agent.rect
-                    if agent_rect.collidepoint(mouse_pos):
+                    if agent_rect.collidepoint(world_pos):
                         dragging_agent = True
                         player_agent.stop()
                         ui.state.traffic_light_info = None
-                        # Sürükleme sırasında bekleyen durumları sıfırla
+                        # Sürükleme sırasında bekleyen durumları ve süren planlamaları sıfırla
+                        planner_service.cancel()
                         pending_path = None
                         ui.state.awaiting_confirmation = False
                         active_visualizer = None
 
-                    elif isinstance(world.grid[grid_row][grid_col], map.TrafficLight):
+                    elif 0 <= grid_row < world.grid_height and 0 <= grid_col < world.grid_width and isinstance(world.grid[grid_row][grid_col], map.TrafficLight):
                         tile = world.grid[grid_row][grid_col]
                         state_upper = tile.state.upper()
                         ui.state.traffic_light_info = f"{state_upper}"
                         ui.state.status_message = f"Light Info: {state_upper}"
 
                     elif ui.state.mode == 'ADD_OBSTACLE':
-                         if 0 <= grid_row < map.GRID_HEIGHT and 0 <= grid_col < map.GRID_WIDTH:
+                         if 0 <= grid_row < world.grid_height and 0 <= grid_col < world.grid_width:
                              current_tile = world.grid[grid_row][grid_col]
                              if not isinstance(current_tile, (map.TrafficLight, map.Crosswalk)):
-                                world.grid[grid_row][grid_col] = map.Grass()
+                                # Düzenleme API'si: şerit grafiği, önbellekler ve planlayıcı değişiklik olayıyla güncellenir
+                                world.set_tile(grid_row, grid_col, map.Grass(world.rng))
                                 ui.state.traffic_light_info = None
 
                     elif ui.state.mode == 'REMOVE_OBSTACLE':
-                         if 0 <= grid_row < map.GRID_HEIGHT and 0 <= grid_col < map.GRID_WIDTH:
-                             world.grid[grid_row][grid_col] = map.Road()
+                         if 0 <= grid_row < world.grid_height and 0 <= grid_col < world.grid_width:
+                             world.set_tile(grid_row, grid_col, map.Road())
                              ui.state.traffic_light_info = None
 
                 # Sol Tıklamayı Bırakma
                 elif event.type == pygame.MOUSEBUTTONUP and event.button == 1:
                     if dragging_agent:
                         dragging_agent = False
-                        if 0 <= grid_row < map.GRID_HEIGHT and 0 <= grid_col < map.GRID_WIDTH:
+                        if 0 <= grid_row < world.grid_height and 0 <= grid_col < world.grid_width:
                             tile = world.grid[grid_row][grid_col]
                             if isinstance(tile, (map.Road, map.Crosswalk)):
                                 player_agent.set_position(grid_row, grid_col)
@@ -250,18 +443,26 @@ def main():
                 # Fare Hareketi
                 elif event.type == pygame.MOUSEMOTION:
                     if dragging_agent:
-                        player_agent.rect.center = mouse_pos
+                        player_agent.rect.center = world_pos
 
                 # Sağ Tıklama (Hedef Belirleme)
                 if event.type == pygame.MOUSEBUTTONDOWN and event.button == 3:
-                     if 0 <= grid_row < map.GRID_HEIGHT and 0 <= grid_col < map.GRID_WIDTH:
+                     if 0 <= grid_row < world.grid_height and 0 <= grid_col < world.grid_width:
                          destination = (grid_row, grid_col)
                          ui.state.status_message = f"Target Set: {destination}"
-                         # Yeni hedef belirlendiğinde bekleyen durumları sıfırla
+                         # Yeni hedef belirlendiğinde bekleyen durumları ve süren planlamaları sıfırla
+                         planner_service.cancel()
                          pending_path = None
                          ui.state.awaiting_confirmation = False
                          active_visualizer = None
 
+        # Ok tuşları haritayı kaydırır (zaman dondurulmuşken de)
+        keys = pygame.key.get_pressed()
+        pan_x = keys[pygame.K_RIGHT] - keys[pygame.K_LEFT]
+        pan_y = keys[pygame.K_DOWN] - keys[pygame.K_UP]
+        if pan_x or pan_y:
+            camera.pan(pan_x * CAMERA_PAN_SPEED, pan_y * CAMERA_PAN_SPEED)
+
         # --- Güncelleme Mantığı (Update Logic) ---
         
         # TODO: [DEĞİŞTİRİLDİ] Koşula 'not ui.state.awaiting_confirmation' eklendi.
@@ -269,51 +470,44 @@ def main():
         # (ve dolayısıyla sonsuz yeniden planlama döngülerine girmesini) engeller.
         if not is_simulation_frozen and not ui.state.awaiting_confirmation:
             dt = clock.tick(map.FPS) / 1000.0
+            if SIMULATION_SEED is not None:
+                # tohumlu çalışma: gerçek kare süresi yerine sabit adım (tekrarlanabilirlik)
+                dt = 1.0 / map.FPS
             world.update()
             for vehicle in all_vehicles:
                 vehicle.update(all_vehicles)
             if pedestrians:
                 pedestrians.update(dt)
+
+            # Filo saati: tüm ajanlar bu tick'in hücresine vardığında ilerler (geçmiş rezervasyonlar silinir),
+            # her ajan en fazla bu tick'e ait yol noktasına kadar sürer (bekleme adımlarında yerinde kalır)
+            replan_fleet()
+            if fleet_agents:
+                fleet_schedule.step({i: (a.grid_y, a.grid_x) for i, a in enumerate(fleet_agents)})
+                for i, fleet_agent in enumerate(fleet_agents):
+                    fleet_agent.hold_index = fleet_schedule.hold_index(i)
             
             # --- Otomatik Yeniden Planlama Mantığı (Düzeltildi) ---
             # Ajan yeni bir yol talep ederse ve halihazırda bekleyen bir yol yoksa
-            if player_agent and player_agent.awaiting_approval and not pending_path:
-                ui.state.status_message = "Obstacle! Searching..."
+            # (zaten süren bir yeniden planlama isteği yoksa)
+            if player_agent and player_agent.awaiting_approval and not pending_path and not planner_service.busy('replan'):
+                ui.state.status_message = "Obstacle! Planning..."
                 
-                algo_choice = ui.state.selected_algorithm.lower()
-                active_visualizer = get_visualizer(algo_choice) 
+                # Artımlı yeniden planlama arka planda: aynı hedef için D* Lite durumu korunur,
+                # yalnızca değişen hücrelerin etkilediği kısım onarılır. Sonuç handle_planner_results() ile gelir.
+                active_visualizer = None
                 
                 start = (player_agent.grid_y, player_agent.grid_x)
-                goal = player_agent.destination
-                
-                try:
-                    path = active_visualizer.search(start, goal, speed=0.02, auto_accept=True)
-                    
-                    visited_est = len(active_visualizer.visited_edges) if hasattr(active_visualizer, 'visited_edges') else 0
-                    cost = len(path) if path else 0
-                    
-                    if path:
-                        # Alternatif bir yol bulundu: Göster ve onay bekle
-                        pending_path = path 
-                        ui.state.awaiting_confirmation = True 
-                        ui.state.update_log("Replan Found. Approve?", start, len(path), visited_est, None)
-                    else:
-                        # TODO: [DEĞİŞTİRİLDİ] [DÜZELTME 2] Yol bulunamadığında oluşan sonsuz döngü düzeltildi.
-                        # Ajanı durdur ve tekrar denememesi için hedefini temizle.
-                        ui.state.update_log("Stuck! No Path.", start, 0, visited_est, False)
-                        player_agent.stop()
-                        player_agent.destination = None 
-                        player_agent.awaiting_approval = False
-                        player_agent.replan_needed = False
-                        active_visualizer = None 
-                        
-                except Exception as e:
-                    print(f"Algorithm Error: {e}")
-                    player_agent.stop()
-                    player_agent.awaiting_approval = False
+                planner_service.submit('replan', 'dstar', start, player_agent.destination)
         else:
             clock.tick(map.FPS) 
 
+        # Biten arka plan planlarını al, süren aramayı ilerlet: dünya güncellemesinden sonra, çizimden önce
+        handle_planner_results()
+        if active_visualizer and active_visualizer.searching:
+            advance_search()
+        ui.state.is_planning = planner_service.busy() or bool(active_visualizer and active_visualizer.searching)
+
         # UI'daki ajan konumunu canlı güncel tut
         if player_agent:
             # always update agent position in the UI (even if stopped)
@@ -330,38 +524,53 @@ def main():
         # Harita alanını (sol taraf) kırp ve temizle
         screen.set_clip(pygame.Rect(0, 0, map.SCREEN_WIDTH, map.SCREEN_HEIGHT))
         screen.fill(map.WHITE) 
-        world.draw(screen)
+
+        # Yalnızca kameranın gördüğü dünya parçası çizilir (1:1); yakınlaştırma varsa ara yüzeye
+        # çizilip harita alanına ölçeklenir
+        view = camera.world_rect()
+        canvas = screen if camera.zoom == 1 else pygame.Surface(view.size, 0, screen)
+        offset = (-view.x, -view.y)
+        world.draw(canvas, view)
         
         # Hedef noktayı çiz
         if destination:
-            dx, dy = destination[1] * map.CELL_SIZE, destination[0] * map.CELL_SIZE
-            pygame.draw.circle(screen, (255, 0, 0), (dx + map.CELL_SIZE//2, dy + map.CELL_SIZE//2), 6)
+            dx, dy = destination[1] * map.CELL_SIZE - view.x, destination[0] * map.CELL_SIZE - view.y
+            pygame.draw.circle(canvas, (255, 0, 0), (dx + map.CELL_SIZE//2, dy + map.CELL_SIZE//2), 6)
 
         # TODO: [DEĞİŞTİRİLDİ] Arama işlemlerini çiz (Gri hücreler - active_visualizer içinde saklı)
-        if active_visualizer and active_visualizer.overlay:
-            screen.blit(active_visualizer.overlay, (0, 0))
+        if active_visualizer:
+            canvas.blit(active_visualizer.overlay.render(view), (0, 0))
 
         # TODO: [DEĞİŞTİRİLDİ] Bekleyen (onaylanmamış) Yeşil yolu çiz
         if pending_path and len(pending_path) > 1:
             points = []
             for r, c in pending_path:
-                cx = c * map.CELL_SIZE + map.CELL_SIZE // 2
-                cy = r * map.CELL_SIZE + map.CELL_SIZE // 2
+                cx = c * map.CELL_SIZE + map.CELL_SIZE // 2 - view.x
+                cy = r * map.CELL_SIZE + map.CELL_SIZE // 2 - view.y
                 points.append((cx, cy))
-            pygame.draw.lines(screen, (0, 255, 0), False, points, 4)
+            pygame.draw.lines(canvas, (0, 255, 0), False, points, 4)
 
+        # Görünüm dışındaki araçlar atlanır (ajanın yol çizgisi görünümü aşabileceği için ajan her zaman çizilir)
         for vehicle in all_vehicles:
-            vehicle.draw(screen)
+            if isinstance(vehicle, Agent) or view.colliderect(vehicle.rect):
+                vehicle.draw(canvas, offset)
         if pedestrians:
-            pedestrians.draw(screen)
+            pedestrians.draw(canvas, view)
+
+        if canvas is not screen:
+            size = (round(view.width * camera.zoom), round(view.height * camera.zoom))
+            # view köşesi tam sayıya yuvarlandı: kameranın kesirli konumu kadar kaydır
+            shift = (round((view.x - camera.x) * camera.zoom), round((view.y - camera.y) * camera.zoom))
+            screen.blit(pygame.transform.scale(canvas, size), shift)
         
         # Paneli çizmek için kırpmayı kaldır
         screen.set_clip(None)
         
         # TODO: [DEĞİŞTİRİLDİ] Kameranın konumunu çizmesi için ajanı parametre olarak gönder
-        ui.draw(screen, player_agent)
+        ui.draw(screen, player_agent, camera)
         pygame.display.flip()
 
+    planner_service.shutdown()
     pygame.quit()
     sys.exit()
 
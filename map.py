@@ -1,19 +1,29 @@
 import pygame
 import sys
 import random
+import numpy as np
 from typing import Tuple, List, Dict, Union
+from lanegraph import LaneGraph
+from hierarchy import CorridorGraph
+from rngstreams import RandomStreams
+from crossings import CrossingLights
+from lights import LightRegistry, STATES, STATE_CODES
+from tilegrid import TileArrays, KIND_GRASS, KIND_CROSSWALK, KIND_ROAD
+import citygen
 
-# initialize pygame (safe to call again from main)
-pygame.init()
+# pygame is initialized by the entry point (backend.setup()), never at import time
 
 # --- Grid-based Constants ---
 CELL_SIZE = 17
+# size of the default (hand-drawn) map; World(width, height) takes any size
 GRID_WIDTH = 56
 GRID_HEIGHT = 36
 
 SCREEN_WIDTH = GRID_WIDTH * CELL_SIZE
 SCREEN_HEIGHT = GRID_HEIGHT * CELL_SIZE
 FPS = 60
+# cells per side of one cached background chunk (World.draw)
+CHUNK_CELLS = 32
 
 # --- Professional palette ---
 WHITE = (255, 255, 255)
@@ -49,7 +59,8 @@ class Tile:
     def __init__(self, type_name: str):
         self.type = type_name
 
-    def draw(self, screen: pygame.Surface, x: int, y: int):
+    def draw(self, screen: pygame.Surface, x: int, y: int, origin: Tuple[int, int] = (0, 0)):
+        """Draw the tile of cell (row y, col x); origin = world pixel drawn at the surface's (0, 0)."""
         pass
 
     def __repr__(self):
@@ -64,8 +75,8 @@ class Road(Tile):
         self.orientation = orientation
         self.direction = direction
 
-    def draw(self, screen: pygame.Surface, x: int, y: int):
-        px, py = x * CELL_SIZE, y * CELL_SIZE
+    def draw(self, screen: pygame.Surface, x: int, y: int, origin: Tuple[int, int] = (0, 0)):
+        px, py = x * CELL_SIZE - origin[0], y * CELL_SIZE - origin[1]
 
         # asphalt base
         pygame.draw.rect(screen, COLOR_ASPHALT, (px, py, CELL_SIZE, CELL_SIZE))
@@ -92,8 +103,8 @@ class Crosswalk(Tile):
         super().__init__('Crosswalk')
         self.orientation = orientation
 
-    def draw(self, screen: pygame.Surface, x: int, y: int):
-        px, py = x * CELL_SIZE, y * CELL_SIZE
+    def draw(self, screen: pygame.Surface, x: int, y: int, origin: Tuple[int, int] = (0, 0)):
+        px, py = x * CELL_SIZE - origin[0], y * CELL_SIZE - origin[1]
 
         # asphalt base
         pygame.draw.rect(screen, COLOR_ASPHALT, (px, py, CELL_SIZE, CELL_SIZE))
@@ -119,8 +130,8 @@ class Building(Tile):
         self.width = width
         self.height = height
 
-    def draw(self, screen: pygame.Surface, x: int, y: int):
-        px, py = x * CELL_SIZE, y * CELL_SIZE
+    def draw(self, screen: pygame.Surface, x: int, y: int, origin: Tuple[int, int] = (0, 0)):
+        px, py = x * CELL_SIZE - origin[0], y * CELL_SIZE - origin[1]
         w_px, h_px = self.width * CELL_SIZE, self.height * CELL_SIZE
 
         # sidewalk / base
@@ -161,14 +172,20 @@ class Building(Tile):
 
 
 class Grass(Tile):
-    def __init__(self):
+    def __init__(self, rng: random.Random = None):
         super().__init__('Grass')
         self.color = COLOR_GRASS_BASE
-        self.has_tree = random.random() < 0.15
-        self.tree_size = random.randint(3, 5)
-
-    def draw(self, screen: pygame.Surface, x: int, y: int):
-        px, py = x * CELL_SIZE, y * CELL_SIZE
+        if rng is None:
+            # no stream given (e.g. mapfile.py, which sets the tree itself): plain grass, no draws
+            self.has_tree = False
+            self.tree_size = 3
+            return
+        self.has_tree = rng.random() < 0.15
+        # 3..5 from one random() draw (randint is slow when a big map creates a million of these)
+        self.tree_size = 3 + int(rng.random() * 3)
+
+    def draw(self, screen: pygame.Surface, x: int, y: int, origin: Tuple[int, int] = (0, 0)):
+        px, py = x * CELL_SIZE - origin[0], y * CELL_SIZE - origin[1]
 
         # base grass
         pygame.draw.rect(screen, self.color, (px, py, CELL_SIZE, CELL_SIZE))
@@ -183,18 +200,67 @@ class Grass(Tile):
 class TrafficLight(Tile):
     def __init__(self, initial_state: str = None, state_duration: Dict[str, int] = None, base_tile: Tile = None):
         super().__init__('TrafficLight')
-        # initialize with a random state if not provided
-        self.state = initial_state if initial_state in ('red', 'yellow', 'green') else random.choice(['red', 'yellow', 'green'])
-        self.timer = 0
+        # own values until the World registers the light; from then on state, timer and
+        # durations live in the World's LightRegistry (lights.py) and these are views onto it
+        self._registry = None
+        self._index = None
+        # callers pick the (random) initial state from their own stream; without one it starts red
+        self._state = initial_state if initial_state in ('red', 'yellow', 'green') else 'red'
+        self._timer = 0
         # if durations provided use them, otherwise create per-light randomized durations
-        self.state_duration = state_duration if state_duration else {'red': 180, 'yellow': 60, 'green': 300}
+        self._state_duration = state_duration if state_duration else {'red': 180, 'yellow': 60, 'green': 300}
         
         self.group_id: Union[int, None] = None
         # tile to draw beneath the pole (preserve underlying tile like grass/road)
         self.base_tile = base_tile
 
+    def attach(self, registry: LightRegistry, r: int, c: int):
+        """Move this light's state into the registry (World does this for every light on the map)."""
+        self._index = registry.add(self, r, c, self.state, self.timer, self.state_duration)
+        self._registry = registry
+
+    @property
+    def state(self) -> str:
+        if self._registry is None:
+            return self._state
+        return STATES[self._registry.state[self._index]]
+
+    @state.setter
+    def state(self, value: str):
+        if self._registry is None:
+            self._state = value
+        else:
+            self._registry.state[self._index] = STATE_CODES[value]
+
+    @property
+    def timer(self) -> int:
+        if self._registry is None:
+            return self._timer
+        return int(self._registry.timer[self._index])
+
+    @timer.setter
+    def timer(self, value: int):
+        if self._registry is None:
+            self._timer = value
+        else:
+            self._registry.timer[self._index] = value
+
+    @property
+    def state_duration(self) -> Dict[str, int]:
+        if self._registry is None:
+            return self._state_duration
+        row = self._registry.duration[self._index]
+        return {name: int(row[k]) for k, name in enumerate(STATES)}
+
+    @state_duration.setter
+    def state_duration(self, value: Dict[str, int]):
+        if self._registry is None:
+            self._state_duration = value
+        else:
+            self._registry.duration[self._index] = [value[name] for name in STATES]
+
     def update(self):
-        """Advance this light independently when its timer expires."""
+        """Advance this light on its own (World.update() advances all registered lights at once)."""
         self.timer += 1
         dur = self.state_duration.get(self.state)
         if self.timer >= dur:
@@ -211,13 +277,13 @@ class TrafficLight(Tile):
         self.state = new_state
         self.timer = 0
 
-    def draw(self, screen: pygame.Surface, x: int, y: int):
-        px, py = x * CELL_SIZE, y * CELL_SIZE
+    def draw(self, screen: pygame.Surface, x: int, y: int, origin: Tuple[int, int] = (0, 0)):
+        px, py = x * CELL_SIZE - origin[0], y * CELL_SIZE - origin[1]
 
         # draw underlying tile (grass/road/crosswalk) if available
         if self.base_tile:
             try:
-                self.base_tile.draw(screen, x, y)
+                self.base_tile.draw(screen, x, y, origin)
             except Exception:
                 pygame.draw.rect(screen, COLOR_SIDEWALK, (px, py, CELL_SIZE, CELL_SIZE))
 
@@ -248,16 +314,76 @@ class TrafficLight(Tile):
 
 # --- World class ---
 class World:
-    def __init__(self, width: int, height: int):
+    def __init__(self, width: int, height: int, seed: int = None, procedural: bool = None,
+                 grid: List[List[Tile]] = None):
+        """
+        width / height: map size in cells. seed: simulation seed; the layout, lights, buildings
+        and trees come from its 'map' stream, and cars, agents and pedestrians draw from their
+        own streams of world.random, so a seed reproduces the whole run. procedural: use the citygen.py generator instead of the hand-drawn
+        56x36 layout (default: only when the size differs from GRID_WIDTH x GRID_HEIGHT).
+        grid: a ready tile grid (height rows of width tiles, e.g. from mapfile.load_world);
+        no layout is generated and no buildings are added.
+        """
         self.grid_width = width
         self.grid_height = height
-        self.grid: List[List[Tile]] = [[Grass() for _ in range(width)] for _ in range(height)]
+        self.pixel_width = width * CELL_SIZE
+        self.pixel_height = height * CELL_SIZE
+        self.seed = seed
+        # one independent random stream per subsystem (rngstreams.py); the map uses 'map'
+        self.random = RandomStreams(seed)
+        self.rng = self.random.stream('map')
+        if procedural is None:
+            procedural = (width, height) != (GRID_WIDTH, GRID_HEIGHT)
+        self.procedural = procedural
         # remove grouped traffic light structures; lights are independent now
         self.default_duration = {'red': 180, 'yellow': 60, 'green': 300}
-
-        self._generate_grid()
-        # keep _organize_lights for compatibility but it will not group/synchronize lights
-        self._organize_lights()
+        loaded = grid is not None
+        if loaded:
+            self.grid: List[List[Tile]] = grid
+        else:
+            self.grid: List[List[Tile]] = [[Grass(self.rng) for _ in range(width)] for _ in range(height)]
+            self._generate_grid()
+            # keep _organize_lights for compatibility but it will not group/synchronize lights
+            self._organize_lights()
+
+        # typed integer mirror of the grid (kind, lane direction, crosswalk orientation,
+        # intersection flag) for hot loops and whole-map NumPy queries
+        self.tiles = TileArrays(self)
+        if not loaded:
+            self._place_buildings()
+
+        # all light timers in parallel arrays, advanced in one vectorized step per update()
+        self.lights = LightRegistry()
+        for r in range(self.grid_height):
+            for c in range(self.grid_width):
+                tile = self.grid[r][c]
+                if isinstance(tile, TrafficLight):
+                    tile.attach(self.lights, r, c)
+
+        # directed lane graph used by the search engine and the car AI;
+        # set_tile() / set_tiles() keep it in sync with grid edits
+        self.lane_graph = LaneGraph(self)
+        # intersection-level abstraction for hierarchical routing (follows lane_graph edits)
+        self.corridor_graph = CorridorGraph(self.lane_graph)
+
+        # pre-rendered static layer in CHUNK_CELLS x CHUNK_CELLS chunks, each rendered the first
+        # time it comes into view: draw() only repaints the dirty cells (light changes, edits,
+        # building windows once per second) of the chunks in view and blits the rest
+        self._chunks = {}            # (chunk row, chunk col) -> Surface
+        self._chunk_dirty = {}       # chunk -> cells to repaint
+        self._chunk_buildings = {}   # chunk -> its building cells
+        self._chunk_second = {}      # chunk -> get_ticks() // 1000 its windows were drawn at
+
+        # edit API state: bumped by every set_tiles() call; listeners get the edited cells
+        self.version = 0
+        self._listeners = []
+        # cached spawn index (lane cells), rebuilt lazily after edits
+        self._spawn_cells = None
+        self.subscribe(self._on_tiles_changed)
+        # (crosswalk cell, approach direction) -> controlling light, for cars and pedestrians;
+        # subscribed after _on_tiles_changed so newly placed lights are registered first
+        self.crossing_lights = CrossingLights(self)
+        self.subscribe(self.crossing_lights.update)
 
     def get_original_tile(self, r: int, c: int) -> Road:
         """Helper to return a default Road object when needed."""
@@ -296,9 +422,9 @@ class World:
             lr, lc = light_pos
             if 0 <= lr < self.grid_height and 0 <= lc < self.grid_width:
                 # preserve underlying tile (grass, road, etc.)
-                base = self.grid[lr][lc] if self.grid[lr][lc] is not None else Grass()
+                base = self.grid[lr][lc] if self.grid[lr][lc] is not None else Grass(self.rng)
                 # initialize light randomly (ignore synchronized grouping)
-                initial = random.choice(['red', 'yellow', 'green'])
+                initial = self.rng.choice(['red', 'yellow', 'green'])
                 
                 self.grid[lr][lc] = TrafficLight(initial_state=initial, state_duration=self.default_duration, base_tile=base)
 
@@ -314,12 +440,12 @@ class World:
 
             lr, lc = light_pos
             if 0 <= lr < self.grid_height and 0 <= lc < self.grid_width:
-                base = self.grid[lr][lc] if self.grid[lr][lc] is not None else Grass()
-                initial = random.choice(['red', 'yellow', 'green'])
+                base = self.grid[lr][lc] if self.grid[lr][lc] is not None else Grass(self.rng)
+                initial = self.rng.choice(['red', 'yellow', 'green'])
                 durations = {
-                    'red': random.randint(150, 360),
-                    'yellow': random.randint(40, 90),
-                    'green': random.randint(150, 360)
+                    'red': self.rng.randint(150, 360),
+                    'yellow': self.rng.randint(40, 90),
+                    'green': self.rng.randint(150, 360)
                 }
                 self.grid[lr][lc] = TrafficLight(initial_state=initial, state_duration=durations, base_tile=base)
 
@@ -328,20 +454,130 @@ class World:
         return
 
     def update(self):
-        """Update dynamic elements. Each TrafficLight updates independently."""
-        # Update all traffic lights independently
-        for r in range(self.grid_height):
-            for c in range(self.grid_width):
-                tile = self.grid[r][c]
-                if isinstance(tile, TrafficLight):
-                    tile.update()
-
-    def draw(self, screen: pygame.Surface):
-        """Draw the entire world grid."""
-        for y in range(self.grid_height):
-            for x in range(self.grid_width):
-                tile = self.grid[y][x]
-                tile.draw(screen, x, y)
+        """Update dynamic elements. Every light keeps its own timer; the registry steps them together."""
+        self.lights.tick()
+        self.mark_dirty(self.lights.changed_cells())
+
+    def mark_dirty(self, cells):
+        """Repaint these (row, col) cells of the cached background when their chunk is next drawn."""
+        for r, c in cells:
+            dirty = self._chunk_dirty.get((r // CHUNK_CELLS, c // CHUNK_CELLS))
+            # chunks that were never drawn are rendered whole on first sight
+            if dirty is not None:
+                dirty.add((r, c))
+
+    # --- editing ---
+    def subscribe(self, callback):
+        """Call callback(cells) after every set_tiles() edit, cells = list of edited (row, col)."""
+        self._listeners.append(callback)
+
+    def unsubscribe(self, callback):
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def set_tile(self, r: int, c: int, tile: Tile) -> List[Tuple[int, int]]:
+        """Replace one cell's tile; see set_tiles()."""
+        return self.set_tiles([((r, c), tile)])
+
+    def set_tiles(self, edits) -> List[Tuple[int, int]]:
+        """
+        Apply ((row, col), tile) edits as one change: the typed mirror and the lane graph are
+        updated, the version is bumped and listeners are notified once. Out-of-bounds cells
+        are skipped. Returns the edited cells.
+        """
+        cells = []
+        for (r, c), tile in edits:
+            if 0 <= r < self.grid_height and 0 <= c < self.grid_width:
+                self.grid[r][c] = tile
+                cells.append((r, c))
+        if not cells:
+            return cells
+        self.tiles.refresh(cells)
+        self.lane_graph.update_cells(cells)
+        self.version += 1
+        for callback in list(self._listeners):
+            callback(cells)
+        return cells
+
+    def fill_region(self, r1: int, c1: int, r2: int, c2: int, make_tile) -> List[Tuple[int, int]]:
+        """Bulk edit: set every cell of the inclusive rectangle to make_tile() (one change event)."""
+        return self.set_tiles(((r, c), make_tile())
+                              for r in range(min(r1, r2), max(r1, r2) + 1)
+                              for c in range(min(c1, c2), max(c1, c2) + 1))
+
+    def spawn_cells(self) -> List[Tuple[int, int]]:
+        """Road cells with a lane direction (row-major), cached until the next edit."""
+        if self._spawn_cells is None:
+            self._spawn_cells = self.tiles.lane_cells()
+        return self._spawn_cells
+
+    def _on_tiles_changed(self, cells):
+        self.mark_dirty(cells)
+        self._spawn_cells = None
+        for r, c in cells:
+            tile = self.grid[r][c]
+            # a light whose tile was replaced stops ticking; a newly placed light starts
+            i = self.lights.index_at.get((r, c))
+            if i is not None and tile is not self.lights.lights[i]:
+                self.lights.deactivate(i)
+            if isinstance(tile, TrafficLight) and tile._registry is None:
+                tile.attach(self.lights, r, c)
+
+    def _draw_cell(self, surface: pygame.Surface, r: int, c: int, origin: Tuple[int, int], buildings: set):
+        # later cells paint over a tile's overflow (buildings are drawn 2x2), so clipping
+        # each tile to its own cell gives the same picture as a full row-major redraw
+        surface.set_clip((c * CELL_SIZE - origin[0], r * CELL_SIZE - origin[1], CELL_SIZE, CELL_SIZE))
+        tile = self.grid[r][c]
+        tile.draw(surface, c, r, origin)
+        if isinstance(tile, Building):
+            buildings.add((r, c))
+        else:
+            buildings.discard((r, c))
+
+    def _chunk(self, key: Tuple[int, int], template: pygame.Surface, second: int):
+        """Cached surface of one chunk, brought up to date; returns (surface, world pixel origin)."""
+        r0, c0 = key[0] * CHUNK_CELLS, key[1] * CHUNK_CELLS
+        r1, c1 = min(r0 + CHUNK_CELLS, self.grid_height), min(c0 + CHUNK_CELLS, self.grid_width)
+        origin = (c0 * CELL_SIZE, r0 * CELL_SIZE)
+        surface = self._chunks.get(key)
+        if surface is None:
+            surface = pygame.Surface(((c1 - c0) * CELL_SIZE, (r1 - r0) * CELL_SIZE), 0, template)
+            buildings = set()
+            for r in range(r0, r1):
+                for c in range(c0, c1):
+                    self._draw_cell(surface, r, c, origin, buildings)
+            self._chunks[key] = surface
+            self._chunk_dirty[key] = set()
+            self._chunk_buildings[key] = buildings
+            self._chunk_second[key] = second
+        else:
+            dirty, buildings = self._chunk_dirty[key], self._chunk_buildings[key]
+            # building windows only change with get_ticks() // 1000
+            if self._chunk_second[key] != second:
+                self._chunk_second[key] = second
+                dirty.update(buildings)
+            for r, c in dirty:
+                self._draw_cell(surface, r, c, origin, buildings)
+            dirty.clear()
+        surface.set_clip(None)
+        return surface, origin
+
+    def draw(self, screen: pygame.Surface, view: pygame.Rect = None):
+        """
+        Draw the world pixels inside `view` (world pixel Rect, default: the whole map) with the
+        view's top-left at the screen's (0, 0). Only the cached chunks that intersect the view
+        are touched, so the cost follows the view size, not the map size.
+        """
+        if view is None:
+            view = pygame.Rect(0, 0, self.pixel_width, self.pixel_height)
+        second = pygame.time.get_ticks() // 1000
+        span = CHUNK_CELLS * CELL_SIZE
+        chunk_rows = (self.grid_height + CHUNK_CELLS - 1) // CHUNK_CELLS
+        chunk_cols = (self.grid_width + CHUNK_CELLS - 1) // CHUNK_CELLS
+        for cr in range(max(0, view.top // span), min(chunk_rows, (view.bottom - 1) // span + 1)):
+            for cc in range(max(0, view.left // span), min(chunk_cols, (view.right - 1) // span + 1)):
+                surface, (ox, oy) = self._chunk((cr, cc), screen, second)
+                screen.blit(surface, (ox - view.x, oy - view.y))
 
     def _put_intersection(self, r: int, c: int):
         """Mark a 2x2 block as an intersection by clearing direction flags on roads."""
@@ -355,7 +591,11 @@ class World:
             self.grid[r + 1][c + 1].direction = None
 
     def _generate_grid(self):
-        """Create the map layout: paint roads, place intersections, crosswalks, lights and buildings."""
+        """Create the map layout: paint roads, place intersections, crosswalks and lights."""
+        if self.procedural:
+            citygen.generate_city(self)
+            return
+
         # major road segments
         self._paint_road(0, 6, 17, 6)
         self._paint_road(20, 6, 34, 6)
@@ -430,30 +670,21 @@ class World:
         for r, c in l_turns:
             self._put_intersection(r, c)
 
-        # place buildings near roads with some probability
-        for r in range(self.grid_height):
-            for c in range(self.grid_width):
-                tile = self.grid[r][c]
-                if not isinstance(tile, Grass):
-                    continue
-
-                # check adjacency to road/crosswalk
-                is_near_road = False
-                for dr in (-1, 0, 1):
-                    for dc in (-1, 0, 1):
-                        if dr == 0 and dc == 0:
-                            continue
-                        nr, nc = r + dr, c + dc
-                        if 0 <= nr < self.grid_height and 0 <= nc < self.grid_width:
-                            if isinstance(self.grid[nr][nc], (Road, Crosswalk)):
-                                # avoid placing building on a true intersection cell with direction=None
-                                near_tile = self.grid[nr][nc]
-                                if not (isinstance(near_tile, Road) and near_tile.direction is None):
-                                    is_near_road = True
-                                    break
-                    if is_near_road:
-                        break
-
-                if is_near_road and random.random() <= 0.30:
-                    color = random.choice(BUILDING_PALETTE)
-                    self.grid[r][c] = Building(color)
\ No newline at end of file
+    def _place_buildings(self):
+        """Place buildings on grass next to roads/crosswalks (not intersection cells) with some probability."""
+        kind = self.tiles.kind
+        # lane roads and crosswalks; intersection cells (direction None) do not attract buildings
+        attract = (kind == KIND_CROSSWALK) | ((kind == KIND_ROAD) & (self.tiles.intersection == 0))
+        near = np.zeros((self.grid_height + 2, self.grid_width + 2), dtype=bool)
+        for dr in (-1, 0, 1):
+            for dc in (-1, 0, 1):
+                if dr or dc:
+                    near[1 + dr:self.grid_height + 1 + dr, 1 + dc:self.grid_width + 1 + dc] |= attract
+        rows, cols = np.nonzero(near[1:-1, 1:-1] & (kind == KIND_GRASS))
+
+        placed = []
+        for r, c in zip(rows.tolist(), cols.tolist()):
+            if self.rng.random() <= 0.30:
+                self.grid[r][c] = Building(self.rng.choice(BUILDING_PALETTE))
+                placed.append((r, c))
+        self.tiles.refresh(placed)
\ No newline at end of file
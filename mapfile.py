@@ -0,0 +1,148 @@
+"""
+Compact binary save / load of a World's map.
+
+Receives: a World (map.py) to save, or the path of a file written by save_world().
+Outputs:  save_world(world, path) writes the map; load_world(path) returns a new World with
+          the same tiles (kinds, lane directions, crosswalk orientations, trees, building
+          colors) and the same traffic lights (state, timer, durations, underlying tile).
+main.py: with MAP_FILE set, RESET SYSTEM loads that file instead of generating a new city
+          (the file is written from the first generated city if it does not exist yet).
+
+File layout (little-endian):
+    header   magic b'AAIMAP', uint16 version, uint32 width, uint32 height, uint32 light count
+    kind     width * height int8   tilegrid KIND_* code per cell, row-major
+    style    width * height uint8  per-kind detail (see _style_of)
+    lights   light count records of LIGHT_DTYPE, row-major order of their cells
+Sections are read through np.memmap, so only the pages that are touched get loaded.
+Tiles with the same (kind, style) are decoded once and shared between cells; only traffic
+lights are separate objects.
+"""
+import struct
+import numpy as np
+import map
+from lanegraph import DIRECTIONS
+from tilegrid import (KIND_CODES, KIND_GRASS, KIND_ROAD, KIND_CROSSWALK, KIND_BUILDING,
+                      KIND_LIGHT, DIR_CODES, ORIENTATION_CODES)
+from lights import STATES, STATE_CODES
+
+MAGIC = b'AAIMAP'
+VERSION = 1
+_HEADER = struct.Struct('<6sHIII')
+
+LIGHT_DTYPE = np.dtype([
+    ('row', '<i4'), ('col', '<i4'),
+    ('state', 'i1'),
+    ('base_kind', 'i1'),     # KIND_* of the tile under the light, -1 = none
+    ('base_style', 'u1'),
+    ('timer', '<i4'),
+    ('duration', '<i4', (len(STATES),)),   # frames per state, STATES order
+])
+
+_ORIENTATIONS = {code: name for name, code in ORIENTATION_CODES.items()}
+_PALETTE_CODES = {color: i for i, color in enumerate(map.BUILDING_PALETTE)}
+
+
+def _kind_of(tile):
+    kind = KIND_CODES.get(getattr(tile, 'type', None))
+    if kind is None:
+        raise ValueError(f"cannot save tile {tile!r}")
+    return kind
+
+
+def _style_of(tile, kind):
+    """
+    One byte of detail per tile:
+    Grass: bit 0 tree, bits 1-3 tree size. Road: bit 0 vertical, bits 1-3 direction code + 1
+    (0 = intersection). Crosswalk: bit 0 vertical. Building: BUILDING_PALETTE index.
+    """
+    if kind == KIND_GRASS:
+        return int(tile.has_tree) | (tile.tree_size << 1)
+    if kind == KIND_ROAD:
+        return ORIENTATION_CODES.get(tile.orientation, 0) | ((DIR_CODES.get(tile.direction, -1) + 1) << 1)
+    if kind == KIND_CROSSWALK:
+        return ORIENTATION_CODES.get(tile.orientation, 0)
+    if kind == KIND_BUILDING:
+        if tuple(tile.color) not in _PALETTE_CODES:
+            raise ValueError(f"building color {tile.color} is not in BUILDING_PALETTE")
+        return _PALETTE_CODES[tuple(tile.color)]
+    return 0
+
+
+def _make_tile(kind, style):
+    if kind == KIND_GRASS:
+        tile = map.Grass()
+        tile.has_tree = bool(style & 1)
+        tile.tree_size = style >> 1
+        return tile
+    if kind == KIND_ROAD:
+        direction = style >> 1
+        return map.Road(_ORIENTATIONS[style & 1], DIRECTIONS[direction - 1][0] if direction else None)
+    if kind == KIND_CROSSWALK:
+        return map.Crosswalk(_ORIENTATIONS[style & 1])
+    if kind == KIND_BUILDING:
+        return map.Building(map.BUILDING_PALETTE[style])
+    raise ValueError(f"unknown tile kind {kind}")
+
+
+def save_world(world, path):
+    """Write the world's tiles and traffic lights to `path`."""
+    h, w = world.grid_height, world.grid_width
+    kind = np.empty(h * w, dtype=np.int8)
+    style = np.zeros(h * w, dtype=np.uint8)
+    lights = []
+    for r in range(h):
+        row = world.grid[r]
+        for c in range(w):
+            tile = row[c]
+            k = _kind_of(tile)
+            kind[r * w + c] = k
+            if k != KIND_LIGHT:
+                style[r * w + c] = _style_of(tile, k)
+                continue
+            # a light placed over an older light keeps it as base_tile; the older box is
+            # painted over completely, so only the tile under the bottom light is kept
+            base = tile.base_tile
+            while isinstance(base, map.TrafficLight):
+                base = base.base_tile
+            base_kind = _kind_of(base) if base is not None else -1
+            durations = tile.state_duration
+            lights.append((r, c, STATE_CODES[tile.state], base_kind,
+                           _style_of(base, base_kind) if base is not None else 0,
+                           tile.timer, [durations[name] for name in STATES]))
+    records = np.array(lights, dtype=LIGHT_DTYPE)
+
+    with open(path, 'wb') as f:
+        f.write(_HEADER.pack(MAGIC, VERSION, w, h, len(records)))
+        f.write(kind.tobytes())
+        f.write(style.tobytes())
+        f.write(records.tobytes())
+
+
+def load_world(path, seed=None):
+    """Build a World from a file written by save_world(); seed seeds the new World's rng."""
+    with open(path, 'rb') as f:
+        magic, version, w, h, count = _HEADER.unpack(f.read(_HEADER.size))
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"{path} is not a version {VERSION} map file")
+    n = w * h
+    offset = _HEADER.size
+    kind = np.memmap(path, dtype=np.int8, mode='r', offset=offset, shape=(n,))
+    style = np.memmap(path, dtype=np.uint8, mode='r', offset=offset + n, shape=(n,))
+    records = np.memmap(path, dtype=LIGHT_DTYPE, mode='r', offset=offset + 2 * n, shape=(count,)) \
+        if count else np.empty(0, dtype=LIGHT_DTYPE)
+
+    # one shared tile per distinct (kind, style) code; light cells are filled in below
+    codes = kind.astype(np.int32) * 256 + style
+    codes[kind == KIND_LIGHT] = KIND_GRASS * 256
+    unique, inverse = np.unique(codes, return_inverse=True)
+    tiles = [_make_tile(code >> 8, code & 255) for code in unique.tolist()]
+    grid = [[tiles[i] for i in row] for row in inverse.reshape(h, w).tolist()]
+
+    for rec in records.tolist():
+        r, c, state, base_kind, base_style, timer, duration = rec
+        base = _make_tile(base_kind, base_style) if base_kind >= 0 else None
+        light = map.TrafficLight(initial_state=STATES[state],
+                                 state_duration=dict(zip(STATES, duration)), base_tile=base)
+        light.timer = timer
+        grid[r][c] = light
+    return map.World(w, h, seed=seed, grid=grid)
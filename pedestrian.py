@@ -1,7 +1,7 @@
 import pygame
 import sys
-import random
 import map
+import backend
 
 # Import constants and grid parameters from the map module
 CELL_SIZE = map.CELL_SIZE
@@ -29,8 +29,13 @@ class Pedestrian(pygame.sprite.Sprite):
         super().__init__()
         # Scale the pedestrian image based on cell size and optional scaling factor
         base = int(CELL_SIZE * 0.9 * scale)
-        self.image = pygame.transform.smoothscale(sprite_surface, (base, base))
-        self.rect = self.image.get_rect()
+        if sprite_surface is None:
+            # headless backend: no image, only the rect that tracks the position
+            self.image = None
+            self.rect = pygame.Rect(0, 0, base, base)
+        else:
+            self.image = pygame.transform.smoothscale(sprite_surface, (base, base))
+            self.rect = self.image.get_rect()
 
         # Position vectors for start (near edge) and destination (far edge)
         self.pos = pygame.Vector2(near_edge_px[0], near_edge_px[1])
@@ -99,6 +104,8 @@ class PedestrianManager:
         # Keep references to the world and the pedestrian sprite sheet/surface
         self.world = world
         self.sprite_surface = sprite_surface
+        # spawn choices and crossing decisions come from the world's 'pedestrian' stream
+        self.rng = world.random.stream('pedestrian')
 
         # Sprite group to manage and draw all active pedestrians
         self.group = pygame.sprite.Group()
@@ -109,7 +116,14 @@ class PedestrianManager:
         # Initialize light state memory and waiting lists per crossing
         for cr in self.crossings:
             cr['prev_state'] = self._get_light_state(cr['light_rc'])
-            cr['waiting_peds'] = set()
+            # dict as an insertion-ordered set: crossing decisions draw in the same order every run
+            cr['waiting_peds'] = {}
+
+        # Crossing indices per controlling light, so light changes only touch their own crossings
+        self._crossings_by_light = {}
+        for idx, cr in enumerate(self.crossings):
+            if cr['light_rc'] is not None:
+                self._crossings_by_light.setdefault(cr['light_rc'], []).append(idx)
 
         # Spawn an initial batch of pedestrians and reset the spawn timer
         self._spawn_batch(self.INITIAL_BATCH)
@@ -119,7 +133,7 @@ class PedestrianManager:
     def _index_crosswalks_and_lights(self):
         """
         Scans the map grid and groups crosswalk tiles into clusters.
-        Associates each cluster with its nearest traffic light.
+        Associates each cluster with the traffic light that controls it (world.crossing_lights).
 
         IMPORTANT:
           The pedestrian waiting point is placed on the GRASS tile that contains
@@ -129,6 +143,7 @@ class PedestrianManager:
         # Readability aliases for the grid and its dimensions
         g = self.world.grid
         H, W = self.world.grid_height, self.world.grid_width
+        table = self.world.crossing_lights
 
         # Visited flags for BFS over crosswalk tiles
         visited = [[False]*W for _ in range(H)]
@@ -162,16 +177,15 @@ class PedestrianManager:
                     # Use the first tile's orientation as the cluster orientation
                     orient = g[cluster[0][0]][cluster[0][1]].orientation  # 'vertical' or 'horizontal'
 
-                    # Search for the nearest traffic light around the cluster (within a small window)
+                    # The cluster's light: the first light controlling one of its cells
+                    # (the World's crosswalk -> light table, shared with the cars)
                     light = None
                     for rr, cc in cluster:
-                        for dr in range(-2, 3):
-                            for dc in range(-2, 3):
-                                nr, nc = rr+dr, cc+dc
-                                if inb(nr, nc) and isinstance(g[nr][nc], TrafficLight):
-                                    light = (nr, nc)
-                                    break
-                            if light: break
+                        for direction in range(4):
+                            i = table.light_index(rr, cc, direction)
+                            if i is not None:
+                                light = self.world.lights.positions[i]
+                                break
                         if light: break
 
                     # Convert (row, col) to pixel center of a cell
@@ -233,8 +247,8 @@ class PedestrianManager:
     # ---------- TRAFFIC LIGHT DECISIONS ----------
     def _light_decision(self, state):
         # Probability model: often-cross-on-red (90%), slow-to-react-on-green (10%), never on yellow
-        if state == 'red':   return random.random() < 0.10
-        if state == 'green': return random.random() < 0.90
+        if state == 'red':   return self.rng.random() < 0.10
+        if state == 'green': return self.rng.random() < 0.90
         return False
 
     def _get_light_state(self, rc):
@@ -251,20 +265,20 @@ class PedestrianManager:
             return None
 
         # Choose a random crossing and a (near, far) pair
-        idx = random.randrange(len(self.crossings))
+        idx = self.rng.randrange(len(self.crossings))
         cr = self.crossings[idx]
-        near, far = random.choice(cr['pairs'])
+        near, far = self.rng.choice(cr['pairs'])
 
         # Randomize speed/scale and apply small jitter perpendicular to movement
-        speed = random.uniform(CELL_SIZE * 1.2, CELL_SIZE * 2.8)
-        scale = random.uniform(1.50, 1.75)
+        speed = self.rng.uniform(CELL_SIZE * 1.2, CELL_SIZE * 2.8)
+        scale = self.rng.uniform(1.50, 1.75)
         j = 0.15 * CELL_SIZE
         if cr['axis'] == 'x':
-            dy = random.uniform(-j, j)
+            dy = self.rng.uniform(-j, j)
             near = (near[0], near[1] + dy)
             far = (far[0], far[1] + dy)
         else:
-            dx = random.uniform(-j, j)
+            dx = self.rng.uniform(-j, j)
             near = (near[0] + dx, near[1])
             far = (far[0] + dx, far[1])
 
@@ -287,7 +301,7 @@ class PedestrianManager:
             active = len(self.group)
             if active < self.MAX_ACTIVE:
                 need = self.MAX_ACTIVE - active
-                batch = random.randint(self.MIN_BATCH, self.MAX_BATCH)
+                batch = self.rng.randint(self.MIN_BATCH, self.MAX_BATCH)
                 batch = min(batch, need)
                 self._spawn_batch(batch)
 
@@ -300,30 +314,32 @@ class PedestrianManager:
             # When a pedestrian reaches the near point, add to waiting set and maybe allow crossing
             if prev_state != 'waiting' and ped.state == 'waiting':
                 crw = self.crossings[ped.crossing_idx]
-                crw['waiting_peds'].add(ped)
+                crw['waiting_peds'][ped] = None
                 current_now = self._get_light_state(crw['light_rc'])
                 if self._light_decision(current_now):
                     ped.state = 'crossing'
-                    crw['waiting_peds'].discard(ped)
+                    crw['waiting_peds'].pop(ped, None)
 
             # Remove pedestrians that have finished crossing
             if ped.state == 'done':
-                self.crossings[ped.crossing_idx]['waiting_peds'].discard(ped)
+                self.crossings[ped.crossing_idx]['waiting_peds'].pop(ped, None)
                 to_remove.append(ped)
 
         # Physically delete finished pedestrians from the sprite group
         for p in to_remove:
             p.kill()
 
-        # On light state change, re-evaluate waiting pedestrians
-        for idx, cr in enumerate(self.crossings):
-            current = self._get_light_state(cr['light_rc'])
-            if current != cr['prev_state']:
-                for ped in list(cr['waiting_peds']):
-                    if ped.state == 'waiting' and self._light_decision(current):
-                        ped.state = 'crossing'
-                        cr['waiting_peds'].discard(ped)
-                cr['prev_state'] = current
+        # On light state change, re-evaluate waiting pedestrians (the World lists the lights that changed this tick)
+        for light_rc in self.world.lights.changed_cells():
+            for idx in self._crossings_by_light.get(light_rc, ()):
+                cr = self.crossings[idx]
+                current = self._get_light_state(cr['light_rc'])
+                if current != cr['prev_state']:
+                    for ped in list(cr['waiting_peds']):
+                        if ped.state == 'waiting' and self._light_decision(current):
+                            ped.state = 'crossing'
+                            cr['waiting_peds'].pop(ped, None)
+                    cr['prev_state'] = current
 
     # ---------- DETECTION & DRAW ----------
     def detect(self):
@@ -336,16 +352,25 @@ class PedestrianManager:
             boxes.append({'grid_rc': (grid_r, grid_c), 'bbox_px': (x, y, w, h), 'state': ped.state})
         return boxes
 
-    def draw(self, screen):
-        """Draws pedestrians on the screen."""
-        self.group.draw(screen)
+    def draw(self, screen, view=None):
+        """
+        Draws pedestrians on the screen. With a view (world pixel Rect, camera.world_rect()),
+        only the pedestrians inside it are drawn, shifted so the view's corner is at (0, 0).
+        """
+        if view is None:
+            self.group.draw(screen)
+            return
+        offset = (-view.x, -view.y)
+        for sprite in self.group:
+            if view.colliderect(sprite.rect):
+                screen.blit(sprite.image, sprite.rect.move(offset))
 
 
 # ---------- MAIN EXECUTION LOOP ----------
 def main():
     """Launches the simulation window and runs the pedestrian system."""
     # Initialize Pygame and create the main window
-    pygame.init()
+    backend.setup()
     screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
     pygame.display.set_caption("Autonomous Vehicle + Pedestrians")
     clock = pygame.time.Clock()
@@ -0,0 +1,176 @@
+"""
+Background planner service: route searches on a worker thread.
+
+Receives: route requests from main.py - the manual START search (any SearchEngine
+          algorithm) and the agent's replan requests (D* Lite, 'dstar').
+Outputs:  PlanResult objects on a queue that main.py drains with poll() once per frame.
+main.py: builds one PlannerService per World, submits a request instead of searching
+          inline, shows a "Planning..." state while busy() and cancels outstanding
+          requests when the target changes or the agent is dragged. Lane graph edits
+          reach notify_changed() through a LaneGraph subscription, so the service's
+          D* Lite stays in sync.
+
+The worker advances searches through search.SearchStepper in small chunks and checks
+the request's cancel flag between chunks. Each chunk (and each D* Lite plan) runs under
+LaneGraph.lock, the lock update_cells() holds while it rewrites the arrays and notifies its
+listeners, so the worker never reads half-rewritten rows or races a heuristic's dirty flag;
+an edit waits at most one chunk. A result computed while the lane graph changed between
+chunks is resubmitted by poll() instead of being delivered. The D* Lite planner lives on
+the worker thread only; edits reach it through a locked buffer.
+"""
+import queue
+import threading
+import time
+
+from replan import DStarLite
+from search import SearchEngine, SearchStepper
+
+# expansions between two cancellation checks
+CHUNK = 256
+
+
+class PlanRequest:
+    __slots__ = ('id', 'kind', 'algorithm', 'start', 'goal', 'cancelled')
+
+    def __init__(self, req_id, kind, algorithm, start, goal):
+        self.id = req_id
+        # 'manual' (START button), 'replan' (agent) or 'prepare' (warm up D* Lite, no result)
+        self.kind = kind
+        self.algorithm = algorithm
+        self.start = (int(start[0]), int(start[1]))
+        self.goal = (int(goal[0]), int(goal[1]))
+        self.cancelled = False
+
+
+class PlanResult:
+    __slots__ = ('request', 'path', 'visited', 'result', 'elapsed_ms', 'error', 'version')
+
+    def __init__(self, request, path, visited, result=None, elapsed_ms=0.0, error=None):
+        self.request = request
+        # LaneGraph.version the search started at
+        self.version = None
+        self.path = path
+        self.visited = visited
+        # search.SearchResult with the exploration trace (None for D* Lite)
+        self.result = result
+        self.elapsed_ms = elapsed_ms
+        self.error = error
+
+
+class PlannerService:
+    def __init__(self, world, heuristic=None):
+        self.graph = world.lane_graph
+        # own engine (and heuristic instance): nothing here is shared with the main thread's searches
+        self.engine = SearchEngine(world, heuristic=heuristic)
+        self._requests = queue.Queue()
+        self._results = queue.Queue()
+        self._outstanding = {}
+        self._lock = threading.Lock()
+        self._changes = []
+        self._next_id = 0
+        self._dstar = None
+        self.graph.subscribe(self.notify_changed)
+        self._thread = threading.Thread(target=self._run, name='planner', daemon=True)
+        self._thread.start()
+
+    # --- main thread API ---
+    def submit(self, kind, algorithm, start, goal):
+        with self._lock:
+            self._next_id += 1
+            req = PlanRequest(self._next_id, kind, algorithm, start, goal)
+            self._outstanding[req.id] = req
+        self._requests.put(req)
+        return req
+
+    def cancel(self, kind=None):
+        """Cancel every outstanding request (of `kind` if given); their results are never delivered."""
+        with self._lock:
+            for req in self._outstanding.values():
+                if kind is None or req.kind == kind:
+                    req.cancelled = True
+
+    def busy(self, kind=None):
+        with self._lock:
+            return any(not r.cancelled and r.kind != 'prepare' and (kind is None or r.kind == kind)
+                       for r in self._outstanding.values())
+
+    def notify_changed(self, nodes):
+        """Forward lane graph nodes returned by LaneGraph.update_cells() to the service's D* Lite."""
+        with self._lock:
+            self._changes.extend(nodes)
+
+    def poll(self):
+        """Finished, non-cancelled results since the last call (never blocks)."""
+        out = []
+        while True:
+            try:
+                res = self._results.get_nowait()
+            except queue.Empty:
+                return out
+            req = res.request
+            if not req.cancelled and res.version != self.graph.version:
+                # the world was edited while the worker searched: the answer may mix old and new lanes
+                self._requests.put(req)
+                continue
+            with self._lock:
+                self._outstanding.pop(req.id, None)
+            if not req.cancelled:
+                out.append(res)
+
+    def shutdown(self):
+        self.graph.unsubscribe(self.notify_changed)
+        self.cancel()
+        self._requests.put(None)
+
+    # --- worker thread ---
+    def _run(self):
+        while True:
+            req = self._requests.get()
+            if req is None:
+                return
+            res = None
+            if not req.cancelled:
+                with self.graph.lock:
+                    version = self.graph.version
+                t0 = time.perf_counter()
+                try:
+                    res = self._solve(req)
+                except Exception as e:
+                    res = PlanResult(req, [], 0, error=e)
+                if res is not None:
+                    res.elapsed_ms = (time.perf_counter() - t0) * 1000.0
+                    res.version = version
+            if res is not None and req.kind != 'prepare':
+                # stays outstanding (busy) until poll() hands it to the main thread
+                self._results.put(res)
+            else:
+                with self._lock:
+                    self._outstanding.pop(req.id, None)
+
+    def _solve(self, req):
+        if req.algorithm == 'dstar':
+            return self._solve_dstar(req)
+        lock = self.graph.lock
+        with lock:
+            stepper = SearchStepper(self.engine, req.algorithm, req.start, req.goal)
+        while True:
+            with lock:
+                done = stepper.advance(max_nodes=CHUNK)
+            if done:
+                break
+            if req.cancelled:
+                return None
+        result = stepper.result
+        return PlanResult(req, result.path, result.visited_count, result)
+
+    def _solve_dstar(self, req):
+        # graph lock first, then the buffer lock: the same order as update_cells() -> notify_changed()
+        with self.graph.lock:
+            with self._lock:
+                changes, self._changes = self._changes, []
+            if self._dstar is None or self._dstar.goal_cell != req.goal:
+                self._dstar = DStarLite(self.graph, req.goal)
+            else:
+                self._dstar.notify_changed(changes)
+            path = self._dstar.plan(req.start)
+            return PlanResult(req, path, self._dstar.expanded)
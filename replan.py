@@ -0,0 +1,156 @@
+"""
+Incremental replanning with D* Lite.
+
+Receives: the World's LaneGraph (lanegraph.py), a goal cell and, for every (re)plan,
+          the agent's current (row, col) cell.
+Outputs:  a list of (row, col) cells from the current cell to the goal ([] if unreachable).
+main.py: keeps one DStarLite per agent destination, forwards the node sets returned by
+         LaneGraph.update_cells() through notify_changed(), and calls plan() when the
+         agent asks for a replan. Only vertices around the edit are repaired, so the
+         cost of a replan grows with the size of the change, not with the map.
+
+The search runs backwards from the goal (g = distance to goal) over unit-cost lane
+moves, using Manhattan distance to the agent as a consistent heuristic.
+"""
+import heapq
+
+INF = float('inf')
+
+
+class DStarLite:
+    def __init__(self, graph, goal):
+        self.graph = graph
+        self.goal_cell = (int(goal[0]), int(goal[1]))
+        self.goal = graph.index(*self.goal_cell)
+
+        self.g = {}
+        self.rhs = {self.goal: 0}
+        self.km = 0
+        self.start = None
+        self.last = None
+
+        # lazy-deletion heap: an entry is live only if open_key[u] still equals its key
+        self.open = []
+        self.open_key = {}
+        # nodes whose lane rows changed since the last plan()
+        self._pending = set()
+
+        # vertex expansions performed by the latest plan() call
+        self.expanded = 0
+
+    # --- helpers ---
+    def _h(self, s):
+        # Manhattan distance between the current start and s (0 before the first plan)
+        if self.start is None:
+            return 0
+        w = self.graph.width
+        return abs(s // w - self.start // w) + abs(s % w - self.start % w)
+
+    def _key(self, s):
+        m = min(self.g.get(s, INF), self.rhs.get(s, INF))
+        return (m + self._h(s) + self.km, m)
+
+    def _push(self, u, key):
+        self.open_key[u] = key
+        heapq.heappush(self.open, (key, u))
+
+    def _top(self):
+        open_heap, open_key = self.open, self.open_key
+        while open_heap:
+            key, u = open_heap[0]
+            if open_key.get(u) == key:
+                return key, u
+            heapq.heappop(open_heap)
+        return None, None
+
+    def _update_vertex(self, u):
+        g, rhs = self.g, self.rhs
+        if u != self.goal:
+            best = INF
+            graph = self.graph
+            for s in graph.successors(u):
+                cost = 1 + g.get(s, INF)
+                if cost < best:
+                    best = cost
+            rhs[u] = best
+        if g.get(u, INF) != rhs.get(u, INF):
+            self._push(u, self._key(u))
+        else:
+            self.open_key.pop(u, None)
+
+    def _compute_shortest_path(self):
+        g, rhs = self.g, self.rhs
+        graph = self.graph
+        start = self.start
+        while True:
+            k_old, u = self._top()
+            if u is None:
+                break
+            if not (k_old < self._key(start) or rhs.get(start, INF) != g.get(start, INF)):
+                break
+            heapq.heappop(self.open)
+            k_new = self._key(u)
+            if k_old < k_new:
+                self._push(u, k_new)
+                continue
+            del self.open_key[u]
+            self.expanded += 1
+            if g.get(u, INF) > rhs.get(u, INF):
+                g[u] = rhs[u]
+                for p in graph.predecessors(u):
+                    self._update_vertex(p)
+            else:
+                g[u] = INF
+                self._update_vertex(u)
+                for p in graph.predecessors(u):
+                    self._update_vertex(p)
+
+    # --- public API ---
+    def notify_changed(self, nodes):
+        """Record lane graph nodes (flat indices) whose rows were rebuilt."""
+        self._pending.update(nodes)
+
+    def plan(self, start):
+        """Repair the search for the new start cell and return the path to the goal."""
+        graph = self.graph
+        s = graph.index(int(start[0]), int(start[1]))
+        self.expanded = 0
+        if self.start is None:
+            # first plan: the goal is the only inconsistent vertex
+            self.start = self.last = s
+            self._push(self.goal, self._key(self.goal))
+        elif s != self.start:
+            self.start = s
+            self.km += self._h(self.last)
+            self.last = s
+
+        if self._pending:
+            for u in self._pending:
+                self._update_vertex(u)
+            self._pending.clear()
+
+        self._compute_shortest_path()
+        return self.extract_path()
+
+    def extract_path(self):
+        g = self.g
+        s = self.start
+        if s is None or g.get(s, INF) == INF:
+            return []
+        graph = self.graph
+        cells = graph.cells
+        path = [cells[s]]
+        # a consistent start has a strictly decreasing g chain to the goal
+        for _ in range(graph.size):
+            if s == self.goal:
+                return path
+            best, best_s = INF, None
+            for t in graph.successors(s):
+                cost = 1 + g.get(t, INF)
+                if cost < best:
+                    best, best_s = cost, t
+            if best_s is None or best == INF:
+                return []
+            s = best_s
+            path.append(cells[s])
+        return []
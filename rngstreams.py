@@ -0,0 +1,26 @@
+"""
+Independent random number streams derived from one simulation seed.
+
+Receives: a seed (any int / str, or None for an unseeded run).
+Outputs:  RandomStreams; stream(name) returns the random.Random of one subsystem ('map',
+          'car', 'pedestrian', 'agent', ...), created on first use. With a seed, every stream
+          is seeded from (seed, name), so the same seed gives the same draws in every
+          subsystem no matter how many numbers the others consume.
+main.py: nothing to call directly - World(seed=...) owns the streams (world.random); the
+          map generator, cars, agents and pedestrians each draw from their own stream.
+"""
+import random
+
+
+class RandomStreams:
+    def __init__(self, seed=None):
+        self.seed = seed
+        self._streams = {}
+
+    def stream(self, name):
+        rng = self._streams.get(name)
+        if rng is None:
+            # str seeds are hashed (SHA-512) by random.seed, so "seed/name" streams are unrelated
+            rng = random.Random(None if self.seed is None else f"{self.seed}/{name}")
+            self._streams[name] = rng
+        return rng
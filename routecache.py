@@ -0,0 +1,123 @@
+"""
+LRU route cache in front of the search algorithms.
+
+Receives: (algorithm, start, goal) queries plus the SearchEngine that can answer them.
+Outputs:  search.SearchResult objects (path + exploration trace), shared between callers.
+main.py / algorithm.py: main.py keeps one RouteCache per World and passes it to the
+          SearchVisualizer subclasses; agents, the replan branch and experiment runs
+          asking for the same route get the stored result instead of a fresh search.
+
+Entries are stamped with the LaneGraph version they were computed at and are only
+served while that stamp is current. After an edit the cache re-stamps every entry
+whose path avoids the edited cells and drops the rest; edits that add new moves
+(e.g. removing an obstacle) can make any cached route suboptimal, so those leave
+every entry stale.
+
+Only results that answer the query the same way every time are stored: an anytime search
+stopped by its time budget (SearchResult.bound above 1.0) depends on how fast that run was,
+so put() skips it and the next query searches again; one that finished proves its path
+optimal (bound 1.0) and is cached like any other result.
+"""
+from collections import OrderedDict
+
+
+class RouteCache:
+    def __init__(self, lane_graph, max_entries=256):
+        self.graph = lane_graph
+        self.max_entries = max_entries
+        # (algorithm, start, goal) -> (graph version, SearchResult), oldest first
+        self._entries = OrderedDict()
+        # lane graph node -> keys whose cached path goes through it
+        self._by_node = {}
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+        lane_graph.subscribe(self._on_lane_change)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        return {
+            'entries': len(self._entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'invalidations': self.invalidations,
+        }
+
+    @staticmethod
+    def _key(algorithm, start, goal):
+        return (str(algorithm).lower(), (int(start[0]), int(start[1])), (int(goal[0]), int(goal[1])))
+
+    def _path_nodes(self, result):
+        w = self.graph.width
+        return {r * w + c for r, c in result.path}
+
+    def _forget(self, key):
+        version, result = self._entries.pop(key)
+        for i in self._path_nodes(result):
+            keys = self._by_node.get(i)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_node[i]
+
+    # --- lookup / store ---
+    def get(self, algorithm, start, goal):
+        key = self._key(algorithm, start, goal)
+        entry = self._entries.get(key)
+        if entry is None or entry[0] != self.graph.version:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, algorithm, start, goal, result):
+        if result.bound is not None and result.bound > 1.0:
+            # budget-limited anytime path: another run (or a longer budget) may find a better one
+            return
+        key = self._key(algorithm, start, goal)
+        if key in self._entries:
+            self._forget(key)
+        self._entries[key] = (self.graph.version, result)
+        for i in self._path_nodes(result):
+            self._by_node.setdefault(i, set()).add(key)
+        while len(self._entries) > self.max_entries:
+            oldest = next(iter(self._entries))
+            self._forget(oldest)
+            self.evictions += 1
+
+    def get_or_search(self, engine, algorithm, start, goal):
+        """Cached SearchResult for the query, running engine.search() on a miss."""
+        result = self.get(algorithm, start, goal)
+        if result is None:
+            result = engine.search(algorithm, start, goal)
+            self.put(algorithm, start, goal, result)
+        return result
+
+    def clear(self):
+        self._entries.clear()
+        self._by_node.clear()
+
+    # --- invalidation ---
+    def _on_lane_change(self, affected):
+        version = self.graph.version
+        if self.graph.last_update_added_edges:
+            # new moves can shorten any route: leave every entry stale (it ages out via LRU)
+            return
+        doomed = set()
+        for i in affected:
+            doomed.update(self._by_node.get(i, ()))
+        for key in doomed:
+            self._forget(key)
+            self.invalidations += 1
+        # routes that avoid the edit are still valid and still optimal (moves were only removed);
+        # "no path" results also stay correct
+        for key, (old_version, result) in self._entries.items():
+            if old_version == version - 1:
+                self._entries[key] = (version, result)
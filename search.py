@@ -0,0 +1,656 @@
+"""
+Headless search core.
+
+Receives: a World (map.py, with its lanegraph.LaneGraph) plus (row, col) start and goal cells.
+Outputs:  SearchResult objects holding the final path and a compact exploration
+          trace (expansion order + the parent edge that reached each cell).
+main.py / algorithm.py: the SearchVisualizer classes call SearchEngine to get the
+route instantly and replay the trace on their overlay afterwards.
+
+Nothing in this module draws, flips the display or pumps pygame events.
+"""
+import heapq
+import time
+from array import array
+from collections import deque
+from lanegraph import STRIDE, ALL_DIRS
+from hierarchy import CROSSWALK_MASKS
+
+INF = float('inf')
+
+
+class _Workspace:
+    """
+    Per-query scratch arrays of one SearchEngine, sized to the lane graph.
+    An entry is valid only where its stamp equals the current generation, so starting
+    a new query costs one increment instead of clearing or reallocating anything.
+    """
+    __slots__ = ('gen', 'seen', 'closed', 'parent', 'g')
+
+    def __init__(self, n):
+        self.gen = 0
+        # seen[i] == gen: parent[i] / g[i] belong to this query; closed[i] == gen: expanded
+        self.seen = [0] * n
+        self.closed = [0] * n
+        self.parent = [-1] * n
+        self.g = [0] * n
+
+    def next_generation(self):
+        self.gen += 1
+        if self.gen == 0x7fffffff:
+            n = len(self.seen)
+            self.seen = [0] * n
+            self.closed = [0] * n
+            self.gen = 1
+
+
+class SearchResult:
+    """Final path plus the exploration trace of one query."""
+    __slots__ = ('algorithm', 'start', 'goal', 'path', 'width', 'expanded_nodes', 'parent_nodes', 'skipped',
+                 'bound', 'elapsed_ms')
+
+    def __init__(self, algorithm, start, goal, width):
+        self.algorithm = algorithm
+        self.start = start
+        self.goal = goal
+        self.path = []
+        self.width = width
+        # trace as flat node ints: expanded_nodes[i] was reached from parent_nodes[i] (-1 for start)
+        self.expanded_nodes = array('i')
+        self.parent_nodes = array('i')
+        # lane cells passed over by corridor jumps (expansions the *_jump searches saved)
+        self.skipped = 0
+        # anytime search only: proven cost(path) / optimal cost factor and search time so far
+        self.bound = None
+        self.elapsed_ms = None
+
+    def record(self, node, parent):
+        self.expanded_nodes.append(node)
+        self.parent_nodes.append(parent)
+
+    def cell(self, node):
+        return divmod(node, self.width)
+
+    @property
+    def expanded(self):
+        """Expanded cells in order (built on demand)."""
+        w = self.width
+        return [divmod(n, w) for n in self.expanded_nodes]
+
+    @property
+    def parents(self):
+        """Cell each expanded cell was reached from, None for the start (built on demand)."""
+        w = self.width
+        return [divmod(p, w) if p >= 0 else None for p in self.parent_nodes]
+
+    @property
+    def found(self):
+        return bool(self.path)
+
+    @property
+    def visited_count(self):
+        return len(self.expanded_nodes)
+
+    @property
+    def cost(self):
+        return len(self.path)
+
+    def edges(self):
+        """Yield (parent, cell) for every expanded cell that was reached through an edge."""
+        w = self.width
+        for n, p in zip(self.expanded_nodes, self.parent_nodes):
+            if p >= 0:
+                yield divmod(p, w), divmod(n, w)
+
+    def __repr__(self):
+        return f"<SearchResult {self.algorithm} {self.start}->{self.goal} cost={self.cost} visited={self.visited_count} skipped={self.skipped}>"
+
+
+class SearchEngine:
+    """Direction-aware DFS / BFS / A* / Greedy over the World's LaneGraph without any rendering."""
+    # anytime A*: inflation of the first search and time allowed for improving the path
+    anytime_weight = 2.0
+    anytime_budget_ms = 50
+
+    def __init__(self, world, heuristic=None):
+        self.world = world
+        # compiled once per World (lanegraph.py); edits go through World.set_tiles()
+        self.graph = world.lane_graph
+        # h(cell, goal) used by A* and Greedy; e.g. landmarks.LandmarkHeuristic
+        self.heuristic = heuristic if heuristic is not None else self.manhattan
+        # scratch arrays reused across queries; a suspended steps() generator keeps its own
+        self._workspaces = []
+
+    # --- movement rules (precompiled in LaneGraph) ---
+    def is_passable(self, cell):
+        return self.graph.is_passable(cell[0], cell[1])
+
+    @staticmethod
+    def movement_dir(a, b):
+        dr = b[0] - a[0]
+        dc = b[1] - a[1]
+        if dr == -1 and dc == 0:
+            return 'N'
+        if dr == 1 and dc == 0:
+            return 'S'
+        if dr == 0 and dc == 1:
+            return 'E'
+        if dr == 0 and dc == -1:
+            return 'W'
+        return None
+
+    def can_move(self, a, b):
+        # respects road direction and allows turns only at intersections (Road.direction is None)
+        g = self.graph
+        if not (g.in_bounds(a[0], a[1]) and g.in_bounds(b[0], b[1])):
+            return False
+        return g.has_edge(g.index(a[0], a[1]), g.index(b[0], b[1]))
+
+    def neighbors(self, cell):
+        r, c = cell
+        # plain 4-neighbourhood inside the grid (N, W, E, S); no direction rules
+        for dr, dc in ((-1, 0), (0, -1), (0, 1), (1, 0)):
+            nr, nc = r + dr, c + dc
+            if self.graph.in_bounds(nr, nc):
+                yield (nr, nc)
+
+    def successors(self, cell):
+        """Cells reachable in one legal move from `cell`, in N, W, E, S order."""
+        g = self.graph
+        i = cell[0] * g.width + cell[1]
+        base = i * STRIDE
+        cells, succ = g.cells, g.succ
+        for k in range(base, base + g.succ_deg[i]):
+            yield cells[succ[k]]
+
+    @staticmethod
+    def manhattan(a, b):
+        return abs(a[0] - b[0]) + abs(a[1] - b[1])
+
+    # --- helpers ---
+    def _path_from(self, parent, s, t):
+        """Follow node parents back from t to s; the only place cell tuples are produced."""
+        cells = self.graph.cells
+        path = [cells[t]]
+        node = t
+        while node != s:
+            node = parent[node]
+            path.append(cells[node])
+        path.reverse()
+        return path
+
+    def _acquire(self):
+        pool = self._workspaces
+        ws = pool.pop() if pool else _Workspace(self.graph.size)
+        ws.next_generation()
+        return ws
+
+    def _release(self, ws):
+        self._workspaces.append(ws)
+
+    def _prepare(self, name, start, goal):
+        start = (int(start[0]), int(start[1]))
+        goal = (int(goal[0]), int(goal[1]))
+        result = SearchResult(name, start, goal, self.graph.width)
+        ok = self.is_passable(start) and self.is_passable(goal)
+        return start, goal, result, ok
+
+    # --- corridor jumps ---
+    def _jump(self, i, goal):
+        """
+        Follow the forced lane starting at node i up to the next decision point (or the goal).
+        Returns (decision node, skipped interior nodes); the node is -1 for dead ends.
+        """
+        g = self.graph
+        succ, succ_deg, allow, size = g.succ, g.succ_deg, g.allow, g.size
+        skipped = []
+        # forced cell: exactly one move, not an intersection, not entering / leaving a crosswalk
+        while i != goal and succ_deg[i] == 1 and allow[i] != ALL_DIRS:
+            nxt = succ[i * STRIDE]
+            if (allow[i] in CROSSWALK_MASKS) != (allow[nxt] in CROSSWALK_MASKS):
+                break
+            skipped.append(i)
+            i = nxt
+            if len(skipped) > size:
+                return -1, skipped
+        if i != goal and g.succ_deg[i] == 0:
+            return -1, skipped
+        return i, skipped
+
+    def _jump_steps(self, name, start, goal, use_heuristic):
+        """
+        Best-first search that only pushes decision points: every successor is advanced along its
+        forced corridor first. Path costs equal the plain BFS / A* costs; the trace lists jump points.
+        """
+        start, goal, result, ok = self._prepare(name, start, goal)
+        if not ok:
+            return result
+
+        g = self.graph
+        w = g.width
+        cells, succ, succ_deg = g.cells, g.succ, g.succ_deg
+        h = self.heuristic if use_heuristic else (lambda a, b: 0)
+        s = start[0] * w + start[1]
+        t = goal[0] * w + goal[1]
+        # jump point -> (previous jump point, corridor nodes in between)
+        came_from = {}
+        gscore = {s: 0}
+        closed = set()
+        open_heap = [(h(start, goal), 0, s)]
+        while open_heap:
+            _, gcur, current = heapq.heappop(open_heap)
+            if current in closed:
+                continue
+            closed.add(current)
+            prev = came_from.get(current)
+            result.record(current, prev[0] if prev else -1)
+            yield result
+
+            if current == t:
+                nodes = [t]
+                node = t
+                while node != s:
+                    node, between = came_from[node]
+                    nodes.extend(reversed(between))
+                    nodes.append(node)
+                nodes.reverse()
+                result.path = [cells[i] for i in nodes]
+                return result
+
+            base = current * STRIDE
+            for k in range(base, base + succ_deg[current]):
+                nb, between = self._jump(succ[k], t)
+                if nb < 0 or nb in closed:
+                    continue
+                tentative_g = gcur + len(between) + 1
+                if tentative_g < gscore.get(nb, 1e9):
+                    if nb not in gscore:
+                        result.skipped += len(between)
+                    came_from[nb] = (current, between)
+                    gscore[nb] = tentative_g
+                    heapq.heappush(open_heap, (tentative_g + h(cells[nb], goal), tentative_g, nb))
+        return result
+
+    # --- algorithms (generators: one yield per expansion, the SearchResult is returned at the end) ---
+    # Nodes are flat ints (r * width + c); visited / parent / g-score live in a reused _Workspace.
+    def _dfs_steps(self, start, goal):
+        start, goal, result, ok = self._prepare('dfs', start, goal)
+        if not ok:
+            return result
+
+        g = self.graph
+        succ, succ_deg = g.succ, g.succ_deg
+        s, t = g.index(*start), g.index(*goal)
+        ws = self._acquire()
+        gen, seen, closed, parent = ws.gen, ws.seen, ws.closed, ws.parent
+        try:
+            stack = [s]
+            while stack:
+                current = stack.pop()
+                if closed[current] == gen:
+                    continue
+                closed[current] = gen
+                result.record(current, parent[current] if seen[current] == gen else -1)
+                yield result
+
+                if current == t:
+                    result.path = self._path_from(parent, s, t)
+                    return result
+
+                # neighbors that obey tile-direction rules, pushed in reversed order to keep N, W, E, S preference
+                base = current * STRIDE
+                for k in range(base + succ_deg[current] - 1, base - 1, -1):
+                    nb = succ[k]
+                    if closed[nb] == gen:
+                        continue
+                    if seen[nb] != gen:
+                        seen[nb] = gen
+                        parent[nb] = current
+                    stack.append(nb)
+            return result
+        finally:
+            self._release(ws)
+
+    def _bfs_steps(self, start, goal):
+        start, goal, result, ok = self._prepare('bfs', start, goal)
+        if not ok:
+            return result
+
+        g = self.graph
+        succ, succ_deg = g.succ, g.succ_deg
+        s, t = g.index(*start), g.index(*goal)
+        ws = self._acquire()
+        gen, seen, parent = ws.gen, ws.seen, ws.parent
+        try:
+            q = deque([s])
+            seen[s] = gen
+            parent[s] = -1
+            while q:
+                current = q.popleft()
+                result.record(current, parent[current])
+                yield result
+
+                if current == t:
+                    result.path = self._path_from(parent, s, t)
+                    return result
+
+                base = current * STRIDE
+                for k in range(base, base + succ_deg[current]):
+                    nb = succ[k]
+                    if seen[nb] == gen:
+                        continue
+                    seen[nb] = gen
+                    parent[nb] = current
+                    q.append(nb)
+            return result
+        finally:
+            self._release(ws)
+
+    def _astar_steps(self, start, goal):
+        start, goal, result, ok = self._prepare('a*', start, goal)
+        if not ok:
+            return result
+
+        g = self.graph
+        cells, succ, succ_deg = g.cells, g.succ, g.succ_deg
+        s, t = g.index(*start), g.index(*goal)
+        h = self.heuristic
+        ws = self._acquire()
+        gen, seen, closed, parent, gscore = ws.gen, ws.seen, ws.closed, ws.parent, ws.g
+        try:
+            seen[s] = gen
+            parent[s] = -1
+            gscore[s] = 0
+            open_heap = [(h(start, goal), 0, s)]
+            while open_heap:
+                _, _, current = heapq.heappop(open_heap)
+                if closed[current] == gen:
+                    continue
+                closed[current] = gen
+                result.record(current, parent[current])
+                yield result
+
+                if current == t:
+                    result.path = self._path_from(parent, s, t)
+                    return result
+
+                tentative_g = gscore[current] + 1
+                base = current * STRIDE
+                for k in range(base, base + succ_deg[current]):
+                    nb = succ[k]
+                    if closed[nb] == gen:
+                        continue
+                    if seen[nb] != gen or tentative_g < gscore[nb]:
+                        seen[nb] = gen
+                        parent[nb] = current
+                        gscore[nb] = tentative_g
+                        heapq.heappush(open_heap, (tentative_g + h(cells[nb], goal), tentative_g, nb))
+            return result
+        finally:
+            self._release(ws)
+
+    def _greedy_steps(self, start, goal):
+        start, goal, result, ok = self._prepare('greedy', start, goal)
+        if not ok:
+            return result
+
+        g = self.graph
+        cells, succ, succ_deg = g.cells, g.succ, g.succ_deg
+        s, t = g.index(*start), g.index(*goal)
+        h = self.heuristic
+        ws = self._acquire()
+        gen, seen, closed, parent = ws.gen, ws.seen, ws.closed, ws.parent
+        try:
+            open_heap = [(h(start, goal), s)]
+            while open_heap:
+                _, current = heapq.heappop(open_heap)
+                if closed[current] == gen:
+                    continue
+                closed[current] = gen
+                result.record(current, parent[current] if seen[current] == gen else -1)
+                yield result
+
+                if current == t:
+                    result.path = self._path_from(parent, s, t)
+                    return result
+
+                base = current * STRIDE
+                for k in range(base, base + succ_deg[current]):
+                    nb = succ[k]
+                    if closed[nb] == gen:
+                        continue
+                    if seen[nb] != gen:
+                        seen[nb] = gen
+                        parent[nb] = current
+                        heapq.heappush(open_heap, (h(cells[nb], goal), nb))
+            return result
+        finally:
+            self._release(ws)
+
+    def _anytime_steps(self, start, goal):
+        """
+        Anytime weighted A*: the first path costs at most anytime_weight times the optimum;
+        the search then keeps expanding (reopening nodes whose g improves, pruning nodes that
+        cannot beat the incumbent) until the open list is empty - the path is then optimal -
+        or anytime_budget_ms has passed. result.bound is the proven suboptimality factor.
+        The budget and result.elapsed_ms count only time spent searching: while a driver
+        (SearchStepper, the planner worker) keeps the generator suspended, the clock stops.
+        """
+        start, goal, result, ok = self._prepare('anytime', start, goal)
+        if not ok:
+            return result
+
+        g = self.graph
+        cells, succ, succ_deg = g.cells, g.succ, g.succ_deg
+        s, t = g.index(*start), g.index(*goal)
+        h = self.heuristic
+        w = self.anytime_weight
+        budget = self.anytime_budget_ms
+        # search time before the last resume, and when the generator last resumed
+        spent = 0.0
+        resumed = time.perf_counter()
+
+        def searched_ms():
+            return (spent + time.perf_counter() - resumed) * 1000.0
+
+        ws = self._acquire()
+        gen, seen, closed, parent, gscore = ws.gen, ws.seen, ws.closed, ws.parent, ws.g
+        try:
+            seen[s] = gen
+            parent[s] = -1
+            gscore[s] = 0
+            open_heap = [(w * h(start, goal), 0, s)]
+            best = INF
+            while open_heap:
+                _, gcur, current = heapq.heappop(open_heap)
+                if gcur != gscore[current] or closed[current] == gen:
+                    continue
+                if gcur + h(cells[current], goal) >= best:
+                    continue
+                closed[current] = gen
+                result.record(current, parent[current])
+                spent += time.perf_counter() - resumed
+                yield result
+                resumed = time.perf_counter()
+
+                if current == t:
+                    best = gcur
+                    result.path = self._path_from(parent, s, t)
+                    result.bound = self._anytime_bound(best, open_heap, gscore, goal)
+                elif best == INF or budget is None or searched_ms() < budget:
+                    tentative_g = gcur + 1
+                    base = current * STRIDE
+                    for k in range(base, base + succ_deg[current]):
+                        nb = succ[k]
+                        if seen[nb] == gen and tentative_g >= gscore[nb]:
+                            continue
+                        seen[nb] = gen
+                        parent[nb] = current
+                        gscore[nb] = tentative_g
+                        # reopen: a node reached more cheaply is expanded again
+                        closed[nb] = 0
+                        hn = h(cells[nb], goal)
+                        if tentative_g + hn < best:
+                            heapq.heappush(open_heap, (tentative_g + w * hn, tentative_g, nb))
+                    continue
+                if best < INF and budget is not None and searched_ms() >= budget:
+                    result.bound = self._anytime_bound(best, open_heap, gscore, goal)
+                    break
+            else:
+                if result.path:
+                    result.bound = 1.0
+            result.elapsed_ms = searched_ms()
+            return result
+        finally:
+            self._release(ws)
+
+    def _anytime_bound(self, best, open_heap, gscore, goal):
+        """best / (lowest g + h still open): no path can be cheaper than that lower bound."""
+        h, cells = self.heuristic, self.graph.cells
+        lower = best
+        for _, gn, n in open_heap:
+            if gn == gscore[n]:
+                f = gn + h(cells[n], goal)
+                if f < lower:
+                    lower = f
+        if lower <= 0:
+            return 1.0
+        return min(self.anytime_weight, best / lower)
+
+    def _hierarchical_steps(self, start, goal):
+        # corridor routing is fast enough to finish in one step
+        result = self.hierarchical(start, goal)
+        yield result
+        return result
+
+    def _bfs_jump_steps(self, start, goal):
+        return self._jump_steps('bfs-jump', start, goal, use_heuristic=False)
+
+    def _astar_jump_steps(self, start, goal):
+        return self._jump_steps('a*-jump', start, goal, use_heuristic=True)
+
+    def steps(self, algorithm, start, goal):
+        """Resumable form of search(): a generator yielding the partial SearchResult after every expansion."""
+        name = ALGORITHM_ALIASES.get(str(algorithm).lower(), 'astar')
+        return getattr(self, f'_{name}_steps')(start, goal)
+
+    # --- algorithms (blocking) ---
+    def dfs(self, start, goal):
+        return _drain(self._dfs_steps(start, goal))
+
+    def bfs(self, start, goal):
+        return _drain(self._bfs_steps(start, goal))
+
+    def astar(self, start, goal):
+        return _drain(self._astar_steps(start, goal))
+
+    def greedy(self, start, goal):
+        return _drain(self._greedy_steps(start, goal))
+
+    def bfs_jump(self, start, goal):
+        """BFS costs with corridor jumps (uniform-cost search over decision points)."""
+        return _drain(self._bfs_jump_steps(start, goal))
+
+    def astar_jump(self, start, goal):
+        """A* with corridor jumps; same path cost as astar()."""
+        return _drain(self._astar_jump_steps(start, goal))
+
+    def anytime(self, start, goal):
+        """Bounded-suboptimal anytime A*; see _anytime_steps()."""
+        return _drain(self._anytime_steps(start, goal))
+
+    def hierarchical(self, start, goal):
+        """
+        Route on the World's CorridorGraph (junction-to-junction edges) and expand it to cells.
+        The trace lists the popped junctions; falls back to A* for cells outside the abstraction.
+        """
+        start, goal, result, ok = self._prepare('hierarchical', start, goal)
+        if not ok:
+            return result
+        corridors = getattr(self.world, 'corridor_graph', None)
+        path = corridors.route(start, goal, result) if corridors is not None else None
+        if path is None:
+            return self.astar(start, goal)
+        result.path = path
+        return result
+
+    def search(self, algorithm, start, goal):
+        """Run the algorithm named like UIState.algo_list entries ('BFS', 'DFS', 'A*', 'Greedy')."""
+        name = ALGORITHM_ALIASES.get(str(algorithm).lower(), 'astar')
+        return getattr(self, name)(start, goal)
+
+
+def _drain(steps):
+    """Run a step generator to the end and return its SearchResult."""
+    while True:
+        try:
+            next(steps)
+        except StopIteration as stop:
+            return stop.value
+
+
+class SearchStepper:
+    """
+    One search spread over several frames. advance() expands at most `max_nodes` nodes
+    and/or runs at most `max_ms` milliseconds, then returns; `result` holds the partial
+    trace meanwhile and the final SearchResult once `done` is True.
+    """
+    def __init__(self, engine, algorithm, start, goal):
+        self.algorithm = algorithm
+        self.start = start
+        self.goal = goal
+        self._steps = engine.steps(algorithm, start, goal)
+        self.result = None
+        self.done = False
+
+    @classmethod
+    def finished(cls, result):
+        """A stepper that is already done (e.g. for a cached result)."""
+        stepper = cls.__new__(cls)
+        stepper.algorithm = result.algorithm
+        stepper.start = result.start
+        stepper.goal = result.goal
+        stepper._steps = None
+        stepper.result = result
+        stepper.done = True
+        return stepper
+
+    def advance(self, max_nodes=None, max_ms=None):
+        """Continue the search within the budget (None = no limit). Returns done."""
+        if self.done:
+            return True
+        deadline = time.perf_counter() + max_ms / 1000.0 if max_ms is not None else None
+        count = 0
+        steps = self._steps
+        try:
+            while True:
+                self.result = next(steps)
+                count += 1
+                if max_nodes is not None and count >= max_nodes:
+                    break
+                if deadline is not None and time.perf_counter() >= deadline:
+                    break
+        except StopIteration as stop:
+            self.result = stop.value
+            self.done = True
+            self._steps = None
+        return self.done
+
+
+# UI / main.py names -> SearchEngine method names (unknown names fall back to A*)
+ALGORITHM_ALIASES = {
+    'dfs': 'dfs',
+    'bfs': 'bfs',
+    'a*': 'astar',
+    'astar': 'astar',
+    'greedy': 'greedy',
+    'anytime': 'anytime',
+    'anytime a*': 'anytime',
+    'ara*': 'anytime',
+    'bfs-jump': 'bfs_jump',
+    'a*-jump': 'astar_jump',
+    'astar-jump': 'astar_jump',
+    'jps': 'astar_jump',
+    'hierarchical': 'hierarchical',
+    'hpa': 'hierarchical',
+}
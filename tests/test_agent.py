@@ -0,0 +1,67 @@
+"""Agent path checks against World edits (headless; run with python -m pytest)."""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import backend
+import map
+from agent import Agent
+from search import SearchEngine
+
+backend.setup(headless=True)
+
+
+def _planned_agent():
+    world = map.World(map.GRID_WIDTH, map.GRID_HEIGHT, seed=1)
+    agent = Agent(world)
+    start = (agent.grid_y, agent.grid_x)
+    goal = max(world.spawn_cells(), key=lambda cell: abs(cell[0] - start[0]) + abs(cell[1] - start[1]))
+    path = SearchEngine(world).bfs(start, goal).path
+    assert len(path) > 10
+    return world, agent, path
+
+
+def test_edit_before_move_blocks_path():
+    # obstacle placed after planning, before move() (e.g. while GO/CANCEL is shown)
+    world, agent, path = _planned_agent()
+    blocked = path[8]
+    world.set_tile(blocked[0], blocked[1], map.Grass(world.rng))
+    agent.move(path)
+    assert blocked in agent._blocked_cells
+    assert blocked in agent._edited_grass
+
+    others = []
+    for _ in range(5000):
+        world.update()
+        agent.update(others)
+        assert (agent.grid_y, agent.grid_x) != blocked
+        if agent.replan_needed or agent.doing_uturn:
+            break
+    assert agent.replan_needed or agent.doing_uturn
+
+
+def test_clean_path_has_no_blocked_cells():
+    world, agent, path = _planned_agent()
+    agent.move(path)
+    assert not agent._blocked_cells and not agent._edited_grass
+
+
+def test_stop_clears_edit_sets():
+    world, agent, path = _planned_agent()
+    world.set_tile(path[8][0], path[8][1], map.Grass(world.rng))
+    agent.move(path)
+    agent.stop()
+    assert not agent._blocked_cells and not agent._edited_grass
+
+
+def test_edits_off_the_path_are_ignored():
+    world, agent, path = _planned_agent()
+    agent.move(path)
+    on_path = set(path)
+    far = next(cell for cell in world.spawn_cells()
+               if cell not in on_path and abs(cell[0] - agent.grid_y) + abs(cell[1] - agent.grid_x) > 3)
+    world.set_tile(far[0], far[1], map.Grass(world.rng))
+    assert not agent._blocked_cells and not agent._edited_grass
+    world.set_tile(path[8][0], path[8][1], map.Grass(world.rng))
+    assert agent._edited_grass == {path[8]}
@@ -0,0 +1,49 @@
+"""Fleet schedule on the cooperative planner's clock (headless; run with python -m pytest)."""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import backend
+import cooperative
+import map
+
+backend.setup(headless=True)
+
+
+def _planner():
+    world = map.World(map.GRID_WIDTH, map.GRID_HEIGHT, seed=1)
+    return cooperative.CooperativePlanner(world.lane_graph)
+
+
+def test_schedule_holds_waits_and_waits_for_every_agent():
+    schedule = cooperative.FleetSchedule(_planner())
+    a, b = (5, 5), (5, 6)
+    assert schedule.assign(0, [a, a, b]) == [a, b]
+    assert schedule.assign(1, [b, a]) == [b, a]
+    assert schedule.hold_index(0) == 0 and schedule.hold_index(1) == 0
+    # agent 1 is not on its tick-0 cell yet: the clock stays
+    assert not schedule.step({0: a, 1: a})
+    assert schedule.step({0: a, 1: b})
+    # tick 1: agent 0 waits on its first cell, agent 1 may drive to its second waypoint
+    assert schedule.hold_index(0) == 0 and schedule.hold_index(1) == 1
+    assert schedule.step({0: a, 1: a})
+    assert schedule.hold_index(0) == 1
+    # past the end of its path an agent stays on its goal
+    assert schedule.cell_at(1, schedule.planner.tick + 5) == a
+
+
+def test_fallback_route_is_reserved_around_others():
+    planner = _planner()
+    graph = planner.graph
+    cells = [graph.cells[i] for i in range(graph.size) if graph.allow[i] and graph.succ_deg[i]]
+    start = cells[0]
+    goal = next(cell for cell in reversed(cells) if len(planner.fields.route(start, cell)) > 10)
+    planner.max_expansions = 0
+    route = planner.plan(0, start, goal)
+    assert route and not planner.conflict_free
+    tick = planner.tick
+    assert all(planner.table.owner(graph.index(*cell), tick + k) == 0 for k, cell in enumerate(route))
+    # a second fallback through the same cells does not take them over
+    planner.plan(1, start, goal)
+    assert all(planner.table.owner(graph.index(*cell), tick + k) == 0 for k, cell in enumerate(route))
@@ -0,0 +1,55 @@
+"""Viewport-sized search overlay (headless; run with python -m pytest)."""
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pygame
+
+import backend
+import map
+from algorithm import SearchOverlay, GREY, GREEN
+
+backend.setup(headless=True)
+
+
+def _lines(count, seed=2):
+    rng = random.Random(seed)
+    cs = map.CELL_SIZE
+    lines = []
+    for k in range(count):
+        r, c = rng.randrange(150), rng.randrange(200)
+        dr, dc = rng.choice([(0, 1), (1, 0), (0, -1), (-1, 0)])
+        a = (c * cs + cs // 2, r * cs + cs // 2)
+        b = ((c + dc) * cs + cs // 2, (r + dr) * cs + cs // 2)
+        # trace first, then the path on top, as the visualizers draw them
+        lines.append((a, b, GREY, 2) if k < 3 * count // 4 else (a, b, GREEN, 4))
+    return lines
+
+
+def _overlay(lines):
+    overlay = SearchOverlay(map.CELL_SIZE)
+    for a, b, color, width in lines:
+        overlay.line(a, b, color, width)
+    return overlay
+
+
+def test_overlay_is_view_sized():
+    overlay = _overlay(_lines(100))
+    assert overlay.render((0, 0, 320, 240)).get_size() == (320, 240)
+
+
+def test_panned_overlay_matches_a_fresh_render():
+    lines = _lines(3000)
+    rng = random.Random(5)
+    view = pygame.Rect(300, 200, 640, 480)
+    overlay = _overlay(lines[:1000])
+    overlay.render(view)
+    for a, b, color, width in lines[1000:]:
+        overlay.line(a, b, color, width)
+    for _ in range(20):
+        view = view.move(rng.randint(-60, 60), rng.randint(-60, 60))
+        panned = overlay.render(view)
+        fresh = _overlay(lines).render(view)
+        assert pygame.image.tobytes(panned, 'RGBA') == pygame.image.tobytes(fresh, 'RGBA')
@@ -0,0 +1,55 @@
+"""Background planner vs. lane graph edits (headless; run with python -m pytest)."""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import backend
+import map
+import planner
+
+backend.setup(headless=True)
+
+
+def _wait(service, timeout=5.0):
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        results = service.poll()
+        if results:
+            return results
+        time.sleep(0.01)
+    return []
+
+
+def test_worker_does_not_search_during_an_edit():
+    world = map.World(map.GRID_WIDTH, map.GRID_HEIGHT, seed=1)
+    cells = world.spawn_cells()
+    service = planner.PlannerService(world)
+    try:
+        # an edit in progress holds the graph lock: the worker must not read the arrays meanwhile
+        with world.lane_graph.lock:
+            service.submit('manual', 'bfs', cells[0], cells[-1])
+            time.sleep(0.2)
+            assert service.poll() == []
+        results = _wait(service)
+        assert len(results) == 1 and results[0].error is None
+    finally:
+        service.shutdown()
+
+
+def test_results_match_the_edited_graph():
+    world = map.World(map.GRID_WIDTH, map.GRID_HEIGHT, seed=1)
+    cells = world.spawn_cells()
+    start, goal = cells[0], cells[-1]
+    service = planner.PlannerService(world)
+    try:
+        service.submit('replan', 'dstar', start, goal)
+        for r, c in cells[len(cells) // 3:len(cells) // 3 + 20]:
+            world.set_tile(r, c, map.Grass(world.rng))
+        results = _wait(service)
+        assert len(results) == 1 and results[0].version == world.lane_graph.version
+        graph = world.lane_graph
+        assert all(graph.is_passable(r, c) for r, c in results[0].path)
+    finally:
+        service.shutdown()
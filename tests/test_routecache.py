@@ -0,0 +1,36 @@
+"""Route cache keys vs. anytime results (headless; run with python -m pytest)."""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import backend
+import map
+from routecache import RouteCache
+from search import SearchEngine
+
+backend.setup(headless=True)
+
+
+def _setup():
+    world = map.World(map.GRID_WIDTH, map.GRID_HEIGHT, seed=1)
+    engine = SearchEngine(world)
+    cells = world.spawn_cells()
+    goal = next(cell for cell in reversed(cells) if engine.bfs(cells[0], cell).path)
+    return world, RouteCache(world.lane_graph), engine, cells[0], goal
+
+
+def test_budget_limited_anytime_result_is_not_cached():
+    world, cache, engine, start, goal = _setup()
+    result = engine.search('anytime', start, goal)
+    result.bound = 1.5
+    cache.put('anytime', start, goal, result)
+    assert cache.get('anytime', start, goal) is None
+
+
+def test_finished_anytime_result_is_cached():
+    world, cache, engine, start, goal = _setup()
+    engine.anytime_budget_ms = None
+    result = cache.get_or_search(engine, 'anytime', start, goal)
+    assert result.bound == 1.0
+    assert cache.get('anytime', start, goal) is result
@@ -0,0 +1,35 @@
+"""Anytime A* timing under a stepping driver (headless; run with python -m pytest)."""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import backend
+import map
+from search import SearchEngine
+
+backend.setup(headless=True)
+
+
+def test_anytime_clock_stops_while_suspended():
+    world = map.World(map.GRID_WIDTH, map.GRID_HEIGHT, seed=1)
+    engine = SearchEngine(world)
+    cells = world.spawn_cells()
+    goal = next(cell for cell in reversed(cells) if engine.bfs(cells[0], cell).path)
+    engine.anytime_budget_ms = None
+    steps = engine.steps('anytime', cells[0], goal)
+    suspended = 0.0
+    try:
+        for _ in range(20):
+            next(steps)
+            # another frame / chunk runs meanwhile
+            t0 = time.perf_counter()
+            time.sleep(0.005)
+            suspended += time.perf_counter() - t0
+        while True:
+            next(steps)
+    except StopIteration as stop:
+        result = stop.value
+    assert result.bound == 1.0
+    assert result.elapsed_ms < suspended * 1000.0
@@ -0,0 +1,111 @@
+"""
+Typed mirror of World.grid: small integer arrays instead of tile objects.
+
+Receives: a World (map.py); World.set_tiles() calls refresh(cells) directly for every
+          grid edit, before the lane graph is updated, so TileArrays stays in sync.
+Outputs:  TileArrays with, per cell (flat index r * width + c):
+            - kind:         KIND_* code
+            - direction:    lane direction code (0..3 -> 'N', 'W', 'E', 'S' as in
+                            lanegraph.DIRECTIONS), -1 = none (intersections, non-roads)
+            - orientation:  crosswalk orientation (0 horizontal, 1 vertical), -1 = not a crosswalk
+            - intersection: 1 for roads without a direction
+          each as a flat array.array (fast scalar reads in Python loops) and as a
+          (grid_height, grid_width) NumPy view sharing the same memory (whole-map queries).
+main.py / car.py / agent.py: read world.tiles instead of isinstance() on grid objects.
+"""
+from array import array
+import numpy as np
+from lanegraph import DIRECTIONS
+
+KIND_GRASS = 0
+KIND_ROAD = 1
+KIND_CROSSWALK = 2
+KIND_BUILDING = 3
+KIND_LIGHT = 4
+KIND_OTHER = 5
+KIND_CODES = {'Grass': KIND_GRASS, 'Road': KIND_ROAD, 'Crosswalk': KIND_CROSSWALK,
+              'Building': KIND_BUILDING, 'TrafficLight': KIND_LIGHT}
+DIR_CODES = {d[0]: k for k, d in enumerate(DIRECTIONS)}
+ORIENTATION_CODES = {'horizontal': 0, 'vertical': 1}
+
+_STEPS = {name: (dr, dc) for name, dr, dc in DIRECTIONS}
+
+
+class TileArrays:
+    def __init__(self, world):
+        self.world = world
+        self.width = world.grid_width
+        self.height = world.grid_height
+        n = self.width * self.height
+        self.kind_at = array('b', [KIND_GRASS]) * n
+        self.direction_at = array('b', [-1]) * n
+        self.orientation_at = array('b', [-1]) * n
+        self.intersection_at = array('b', [0]) * n
+
+        shape = (self.height, self.width)
+        self.kind = np.frombuffer(self.kind_at, dtype=np.int8).reshape(shape)
+        self.direction = np.frombuffer(self.direction_at, dtype=np.int8).reshape(shape)
+        self.orientation = np.frombuffer(self.orientation_at, dtype=np.int8).reshape(shape)
+        self.intersection = np.frombuffer(self.intersection_at, dtype=np.int8).reshape(shape)
+        self.rebuild()
+
+    def _set(self, i, tile):
+        kind = KIND_CODES.get(getattr(tile, 'type', None), KIND_OTHER)
+        direction = getattr(tile, 'direction', None) if kind == KIND_ROAD else None
+        self.kind_at[i] = kind
+        self.direction_at[i] = DIR_CODES.get(direction, -1)
+        self.orientation_at[i] = ORIENTATION_CODES.get(getattr(tile, 'orientation', None), -1) if kind == KIND_CROSSWALK else -1
+        self.intersection_at[i] = 1 if kind == KIND_ROAD and direction is None else 0
+
+    def rebuild(self):
+        grid, w = self.world.grid, self.width
+        for r in range(self.height):
+            row = grid[r]
+            for c in range(w):
+                self._set(r * w + c, row[c])
+
+    def refresh(self, cells):
+        """Re-read these (row, col) cells from World.grid."""
+        grid, w = self.world.grid, self.width
+        for r, c in cells:
+            if 0 <= r < self.height and 0 <= c < w:
+                self._set(r * w + c, grid[r][c])
+
+    # --- scalar lookups ---
+    def kind_of(self, r, c):
+        if 0 <= r < self.height and 0 <= c < self.width:
+            return self.kind_at[r * self.width + c]
+        return -1
+
+    def is_passable(self, r, c):
+        return self.kind_of(r, c) in (KIND_ROAD, KIND_CROSSWALK)
+
+    # --- whole-map queries ---
+    def passable_mask(self):
+        """Bool (H, W): roads and crosswalks."""
+        return (self.kind == KIND_ROAD) | (self.kind == KIND_CROSSWALK)
+
+    def kind_mask(self, *kinds):
+        return np.isin(self.kind, kinds)
+
+    def lane_cells(self):
+        """(row, col) of every road cell with a lane direction, in row-major order."""
+        rows, cols = np.nonzero((self.kind == KIND_ROAD) & (self.direction >= 0))
+        return list(zip(rows.tolist(), cols.tolist()))
+
+    def neighbour_open(self, direction):
+        """Bool (H, W): the neighbour one step in `direction` ('N', 'W', 'E', 'S') is passable."""
+        passable = self.passable_mask()
+        out = np.zeros_like(passable)
+        dr, dc = _STEPS[direction]
+        h, w = passable.shape
+        out[max(0, -dr):h - max(0, dr), max(0, -dc):w - max(0, dc)] = \
+            passable[max(0, dr):h + min(0, dr), max(0, dc):w + min(0, dc)]
+        return out
+
+    def open_directions(self):
+        """Int8 (H, W) bitmask: bit k set if the neighbour in DIRECTIONS[k] is passable."""
+        out = np.zeros((self.height, self.width), dtype=np.int8)
+        for k, (name, _, _) in enumerate(DIRECTIONS):
+            out |= self.neighbour_open(name).astype(np.int8) << k
+        return out